@@ -0,0 +1 @@
+"""Benchmarks of pipeline modules on local pipeline artifacts."""
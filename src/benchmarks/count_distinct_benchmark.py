@@ -0,0 +1,195 @@
+"""
+Error-versus-speed benchmark of the daily distinct counts of FeatureEngineer.
+
+Runs the business indicators (num_transactions, num_unique_customers,
+num_unique_articles) with each count_distinct method on a raw features file:
+- the exact methods ('pandas' groupby nunique and 'packed' (day, key) pairs)
+- 'hll' at several HyperLogLog precisions
+and reports the best wall time of a few repeats, and the mean/max relative error
+of every approximate column against the exact counts.
+
+The rows can be replicated (--scale) to measure larger inputs. Replicated rows
+repeat the same keys, so distinct counts (and the HLL error) stay the same while
+the number of rows grows.
+
+Usage:
+    python -m src.benchmarks.count_distinct_benchmark \
+        --features_raw_file data/pipeline_runs/features_raw.parquet [--scale 10]
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from src.modules.data_processing.feature_engineer import FeatureEngineer
+from src.modules.data_processing.hyperloglog import MAX_PRECISION, MIN_PRECISION
+from src.modules.log_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+APPROXIMATE_COLUMNS = ["num_unique_customers", "num_unique_articles"]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Distinct count benchmark")
+
+    parser.add_argument(
+        "--features_raw_file",
+        type=str,
+        required=True,
+        help="Path to the raw features Parquet file (output of split_data)",
+    )
+    parser.add_argument(
+        "--date_column", type=str, default="InvoiceDate", help="Date column"
+    )
+    parser.add_argument(
+        "--transaction_id_column",
+        type=str,
+        default="InvoiceNo",
+        help="Transaction ID column",
+    )
+    parser.add_argument(
+        "--customer_id_column",
+        type=str,
+        default="CustomerID",
+        help="Customer ID column",
+    )
+    parser.add_argument(
+        "--article_id_column", type=str, default="StockCode", help="Article ID column"
+    )
+    parser.add_argument(
+        "--precisions",
+        type=int,
+        nargs="+",
+        default=[10, 12, 14, 16],
+        help=f"HyperLogLog precisions to benchmark ({MIN_PRECISION}-{MAX_PRECISION})",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Number of times to replicate the input rows",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of timed runs per method (best run is reported)",
+    )
+    return parser.parse_args()
+
+
+def time_business_indicators(
+    features_raw: pd.DataFrame,
+    feature_engineer: FeatureEngineer,
+    repeats: int,
+) -> tuple:
+    """
+    Time FeatureEngineer._compute_business_indicators.
+    Returns:
+        Tuple of (best wall time in seconds, business indicators DataFrame)
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        business_indicators = feature_engineer._compute_business_indicators(
+            features_raw
+        )
+        best = min(best, time.perf_counter() - start)
+    return best, business_indicators
+
+
+def relative_errors(
+    approximate: pd.DataFrame, exact: pd.DataFrame
+) -> Dict[str, Dict[str, float]]:
+    """
+    Mean and max relative error per approximate column.
+    Returns:
+        Dictionary of {column: {"mean": ..., "max": ...}}
+    """
+    errors = {}
+    for col_name in APPROXIMATE_COLUMNS:
+        error = (approximate[col_name] - exact[col_name]).abs() / exact[col_name]
+        errors[col_name] = {"mean": float(error.mean()), "max": float(error.max())}
+    return errors
+
+
+def main():
+    """Distinct count benchmark entry point."""
+    setup_logging()
+    args = parse_args()
+    try:
+        columns = [
+            args.date_column,
+            args.transaction_id_column,
+            args.customer_id_column,
+            args.article_id_column,
+        ]
+        features_raw = pd.read_parquet(Path(args.features_raw_file), columns=columns)
+        if args.scale > 1:
+            features_raw = pd.concat([features_raw] * args.scale, ignore_index=True)
+        features_raw = features_raw.sort_values(
+            args.date_column, kind="stable", ignore_index=True
+        )
+        logger.info(
+            f"Benchmarking distinct counts on {len(features_raw):,} rows "
+            f"({features_raw[args.date_column].nunique()} days)"
+        )
+
+        def make_feature_engineer(**kwargs) -> FeatureEngineer:
+            return FeatureEngineer(
+                target_col_name="",
+                date_col_name=args.date_column,
+                transaction_id_col_name=args.transaction_id_column,
+                customer_id_col_name=args.customer_id_column,
+                article_id_col_name=args.article_id_column,
+                revenue_col_name="",
+                **kwargs,
+            )
+
+        results: List[Dict] = []
+        exact = None
+        for method in ("pandas", "packed"):
+            seconds, exact = time_business_indicators(
+                features_raw, make_feature_engineer(count_distinct=method), args.repeats
+            )
+            results.append({"method": method, "seconds": seconds})
+        for precision in args.precisions:
+            seconds, approximate = time_business_indicators(
+                features_raw,
+                make_feature_engineer(count_distinct="hll", hll_precision=precision),
+                args.repeats,
+            )
+            results.append(
+                {
+                    "method": f"hll (p={precision}, {1 << precision:,} B/day/key)",
+                    "seconds": seconds,
+                    **{
+                        f"{col_name} {stat}": error[stat]
+                        for col_name, error in relative_errors(
+                            approximate, exact
+                        ).items()
+                        for stat in ("mean", "max")
+                    },
+                }
+            )
+
+        report = pd.DataFrame(results).set_index("method")
+        logger.info(
+            "Distinct count benchmark (relative errors vs exact):\n"
+            + report.to_string(float_format=lambda x: f"{x:.4f}", na_rep="exact")
+        )
+
+    except Exception:
+        logger.error("Error during distinct count benchmark", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import json
 import pandas as pd
 from darts import TimeSeries, concatenate
 
+from src.modules.data_processing.data_splitter import select_fold_rows
 from src.modules.model_handling.model_handler import ModelHandler
 from src.modules.log_config import setup_logging
 
@@ -74,6 +75,14 @@ def parse_args():
         required=True,
         help="Name of the time column",
     )
+    parser.add_argument(
+        "--folds_path",
+        type=str,
+        default=None,
+        help="Path to the rolling-origin folds JSON from split_data. If set, models "
+        "are backtested on the test segments of the folds that start after the split "
+        "date, instead of from the split date",
+    )
     parser.add_argument(
         "--scores_output",
         type=str,
@@ -145,6 +154,35 @@ def main():
         logger.error("Error converting data to TimeSeries", exc_info=True)
         sys.exit(1)
 
+    # Load folds. Only test segments after the split date are evaluated: the models
+    # were trained on all data up to the split date, earlier segments are in-sample
+    folds = None
+    if args.folds_path is not None:
+        try:
+            with open(args.folds_path) as f:
+                all_folds = json.load(f)["folds"]
+            folds = [
+                fold
+                for fold in all_folds
+                if fold["test_start"] and pd.Timestamp(fold["test_start"]) > split_date
+            ]
+            target_full_df = pd.concat(
+                [target_train_df, target_test_df], ignore_index=True
+            ).sort_values(time_column, ignore_index=True)
+        except Exception:
+            logger.error("Error reading folds file", exc_info=True)
+            sys.exit(1)
+        if not folds:
+            logger.error(
+                f"None of the {len(all_folds)} folds has a test segment after the "
+                f"split date {split_date.date()}. Exiting."
+            )
+            sys.exit(1)
+        logger.info(
+            f"Evaluating on the test segments of {len(folds)} of {len(all_folds)} "
+            f"folds (test start after {split_date.date()})"
+        )
+
     evaluation_dict = {}
     model_handler = ModelHandler()
 
@@ -169,17 +207,42 @@ def main():
         # Backtest model on full data
         logger.info(f"Running backtest on full data for model: {model_name}...")
         try:
-            backtest_scores = model_handler.backtest_model(
-                model=trained_model,
-                target_series=target_full,
-                past_covariates=past_covariates,
-                future_covariates=future_covariates,
-                start=split_date,
-                metrics=[
-                    "rmse",
-                    "wmape",
-                ],  # TODO: parameterize metrics in case new ones are added
-            )
+            if folds is None:
+                backtest_scores = model_handler.backtest_model(
+                    model=trained_model,
+                    target_series=target_full,
+                    past_covariates=past_covariates,
+                    future_covariates=future_covariates,
+                    start=split_date,
+                    metrics=[
+                        "rmse",
+                        "wmape",
+                    ],  # TODO: parameterize metrics in case new ones are added
+                )
+            else:
+                fold_scores = []
+                for fold in folds:
+                    fold_target = TimeSeries.from_dataframe(
+                        select_fold_rows(
+                            target_full_df, time_column, fold, "train", "test"
+                        ),
+                        value_cols=target_column,
+                        **time_series_kwargs,
+                    )
+                    scores = model_handler.backtest_model(
+                        model=trained_model,
+                        target_series=fold_target,
+                        past_covariates=past_covariates,
+                        future_covariates=future_covariates,
+                        start=pd.Timestamp(fold["test_start"]),
+                        metrics=["rmse", "wmape"],
+                    )
+                    fold_scores.append({"fold": fold["fold"], **scores})
+                backtest_scores = {
+                    metric: float(pd.DataFrame(fold_scores)[metric].mean())
+                    for metric in ["rmse", "wmape"]
+                }
+                backtest_scores["folds"] = fold_scores
             logger.info(f"Backtest scores for {model_name}: {backtest_scores}")
         except Exception:
             logger.error(f"Error during backtesting for {model_name}", exc_info=True)
@@ -2,14 +2,49 @@ import sys
 import argparse
 import logging
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
+from src.modules.artifact_cache import (
+    ArtifactCache,
+    fingerprint_code,
+    fingerprint_parquet,
+)
+from src.modules.data_processing import (
+    arrow_backend,
+    cancellation_matcher,
+    cleaning_stats,
+    data_cleaner,
+    schema_validation,
+    schemas,
+)
+from src.modules.data_processing.cleaning_stats import CleaningStatsCollector
 from src.modules.data_processing.data_cleaner import DataCleaner
+from src.modules.data_processing.schema_validation import validate_parquet_metadata
+from src.modules.data_processing.schemas import (
+    CLEANING_INPUT_COLUMN_SPECS,
+    log_memory_savings,
+)
 from src.modules.log_config import setup_logging
+from src.modules.utils import split_comma_separated
 
 logger = logging.getLogger(__name__)
 
+# Modules whose code determines the cleaned output, part of the cache key
+CLEANING_CODE_MODULES = [
+    sys.modules[__name__],
+    data_cleaner,
+    cancellation_matcher,
+    arrow_backend,
+    cleaning_stats,
+    schemas,
+    schema_validation,
+]
+
 
 def parse_args():
     """Parse command line arguments."""
@@ -26,7 +61,69 @@ def parse_args():
         type=str,
         nargs="+",
         default=None,
-        help="Comma-separated list of countries to keep in the data",
+        help="Countries to keep in the data (comma- or space-separated)",
+    )
+    parser.add_argument(
+        "--cancellation_window_days",
+        type=int,
+        default=None,
+        help="Match cancellations to purchases within this many days and remove both "
+        "(supports partial cancellations). Needs input ingested from the raw "
+        "transactions table, the processed table has no cancellations left. Matches on "
+        "StockCode, CustomerID, Description, Country and UnitPrice as far as they "
+        "were ingested (Description is not in the default ingest columns). If not "
+        "set, no matching is done",
+    )
+    parser.add_argument(
+        "--execution_mode",
+        type=str,
+        choices=["sequential", "fused"],
+        default="sequential",
+        help="'fused' applies all filter rules with one combined mask and a single copy",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["pandas", "arrow"],
+        default="pandas",
+        help="Execution backend: pandas, or Arrow compute kernels on pyarrow Tables "
+        "(no cancellation matching or streaming)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Clean the input row group by row group and write the output "
+        "incrementally, with memory bounded by the row group size",
+    )
+    parser.add_argument(
+        "--validate_statistics",
+        action="store_true",
+        help="Also validate value ranges of the input from parquet row group statistics",
+    )
+    parser.add_argument(
+        "--validation_sample_size",
+        type=int,
+        default=0,
+        help="Validate nullability and value ranges on this many sampled rows "
+        "(0 = schema only)",
+    )
+    parser.add_argument(
+        "--collect_stats",
+        action="store_true",
+        help="Write per-rule cleaning statistics as a JSON sidecar next to the "
+        "output (<output_data stem>.stats.json). Requires --execution_mode fused",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the cleaned data cache. If not set, no caching is done",
+    )
+    parser.add_argument(
+        "--cache_max_size_mb",
+        type=int,
+        default=2048,
+        help="Max size of the cleaned data cache; least recently used entries are evicted",
     )
     parser.add_argument(
         "--output_data",
@@ -34,7 +131,134 @@ def parse_args():
         required=True,
         help="Path to save the output Parquet file",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    args.countries = split_comma_separated(args.countries)
+    return args
+
+
+def iter_parquet_row_groups(input_path: Path) -> Iterator[pd.DataFrame]:
+    """
+    Read a Parquet file, or a directory of Parquet files, one row group at a time.
+    Args:
+        input_path: Path to a Parquet file or dataset directory.
+    Yields:
+        DataFrame per row group.
+    """
+    dataset = ds.dataset(input_path, format="parquet")
+    for fragment in dataset.get_fragments():
+        for row_group in fragment.split_by_row_group():
+            yield row_group.to_table().to_pandas()
+
+
+def write_dataframes_to_parquet(
+    dfs: Iterable[pd.DataFrame], input_schema: pa.Schema, output_path: Path
+) -> Tuple[int, int]:
+    """
+    Write an iterable of DataFrames to a single Parquet file, one row group each.
+    Columns taken over from the input keep their input Arrow types, so dictionary
+    index widths do not change between row groups. Without any DataFrame, an empty
+    file with the input schema is written.
+
+    Args:
+        dfs: Iterable of DataFrames with the same columns.
+        input_schema: Arrow schema of the input data.
+        output_path: Path of the Parquet file to write.
+    Returns:
+        Tuple of (number of row groups, total number of rows) written.
+    """
+    writer = None
+    num_row_groups = total_rows = 0
+    try:
+        for df in dfs:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                schema = pa.schema(
+                    [
+                        (
+                            input_schema.field(field.name)
+                            if field.name in input_schema.names
+                            else field
+                        )
+                        for field in table.schema
+                    ],
+                    metadata=table.schema.metadata,
+                )
+                writer = pq.ParquetWriter(output_path, schema)
+            writer.write_table(table.cast(schema))
+            num_row_groups += 1
+            total_rows += table.num_rows
+        if writer is None:
+            # no row groups in the input: still write a (empty) output file
+            logger.warning(f"No input row groups, writing empty {output_path}")
+            pq.write_table(input_schema.empty_table(), output_path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return num_row_groups, total_rows
+
+
+def clean_in_memory(
+    data_cleaner: DataCleaner,
+    input_path: Path,
+    output_path: Path,
+    countries: Optional[List[str]],
+    stats_collector: Optional[CleaningStatsCollector],
+) -> None:
+    """Clean the full input in memory with the pandas backend."""
+    logger.info(f"Reading input data from {input_path}...")
+    df = pd.read_parquet(input_path)
+    log_memory_savings(df, step="clean_data input")
+
+    df = data_cleaner.run(
+        df=df,
+        countries=countries,
+        stats_collector=stats_collector,
+    )
+
+    log_memory_savings(df, step="clean_data output")
+
+    df.to_parquet(output_path, index=False)
+    logger.info(f"Cleaned data saved to {output_path}")
+    logger.info(f"Cleaned data shape: {df.shape}")
+
+
+def clean_streaming(
+    data_cleaner: DataCleaner,
+    input_path: Path,
+    output_path: Path,
+    countries: Optional[List[str]],
+    stats_collector: Optional[CleaningStatsCollector],
+) -> None:
+    """Clean the input row group by row group with the pandas backend."""
+    logger.info(f"Streaming input data from {input_path}...")
+    num_row_groups, total_rows = write_dataframes_to_parquet(
+        dfs=data_cleaner.run_batches(
+            batches=iter_parquet_row_groups(input_path),
+            countries=countries,
+            stats_collector=stats_collector,
+        ),
+        input_schema=ds.dataset(input_path, format="parquet").schema,
+        output_path=output_path,
+    )
+    logger.info(f"Cleaned data saved to {output_path}")
+    logger.info(f"Rows written: {total_rows:,} in {num_row_groups} row groups")
+
+
+def clean_arrow(
+    data_cleaner: DataCleaner,
+    input_path: Path,
+    output_path: Path,
+    countries: Optional[List[str]],
+) -> None:
+    """Clean the full input with the Arrow compute backend."""
+    logger.info(f"Reading input data from {input_path}...")
+    table = data_cleaner.run_arrow(
+        table=pq.read_table(input_path),
+        countries=countries,
+    )
+    pq.write_table(table, output_path)
+    logger.info(f"Cleaned data saved to {output_path}")
+    logger.info(f"Cleaned data shape: ({table.num_rows}, {table.num_columns})")
 
 
 def main():
@@ -43,21 +267,70 @@ def main():
     args = parse_args()
     logger.info("Starting data cleaning component...")
     try:
-        logger.info(f"Reading input data from {args.input_data}...")
-        df = pd.read_parquet(Path(args.input_data))
+        if args.backend == "arrow" and (args.streaming or args.collect_stats):
+            raise ValueError(
+                "--streaming and --collect_stats are only available with the "
+                "pandas backend"
+            )
+        input_path = Path(args.input_data)
+        output_path = Path(args.output_data)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        stats_path = output_path.with_suffix(".stats.json")
+        outputs = {"cleaned_data.parquet": output_path}
+        if args.collect_stats:
+            outputs["cleaning_stats.json"] = stats_path
 
-        data_cleaner = DataCleaner()
-        df = data_cleaner.run(
-            df=df,
-            countries=args.countries,
+        # Fail fast on a bad input, from the parquet footer only. Runs before the
+        # cache lookup, so cached inputs are validated with the current settings too
+        validate_parquet_metadata(
+            input_path,
+            CLEANING_INPUT_COLUMN_SPECS,
+            check_statistics=args.validate_statistics,
         )
 
-        output_path = Path(args.output_data)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_parquet(output_path, index=False)
+        cache = None
+        if args.cache_dir is not None:
+            cache = ArtifactCache(
+                Path(args.cache_dir), max_size_bytes=args.cache_max_size_mb * 1024**2
+            )
+            # execution mode, backend and streaming do not change the output. The
+            # sampled row validation runs while cleaning, so its sample size is part
+            # of the key (the footer validation above runs on every call)
+            cache_key = cache.make_key(
+                input=fingerprint_parquet(input_path),
+                countries=args.countries,
+                cancellation_window_days=args.cancellation_window_days,
+                collect_stats=args.collect_stats,
+                validation_sample_size=args.validation_sample_size,
+                code=fingerprint_code(CLEANING_CODE_MODULES),
+            )
+            if cache.get(cache_key, outputs):
+                logger.info(f"Cleaned data restored from cache to {output_path}")
+                logger.info("Data cleaning component completed successfully.")
+                return
+
+        data_cleaner = DataCleaner(
+            cancellation_window_days=args.cancellation_window_days,
+            execution_mode=args.execution_mode,
+            validation_sample_size=args.validation_sample_size,
+        )
+        stats_collector = CleaningStatsCollector() if args.collect_stats else None
+
+        if args.backend == "arrow":
+            clean_arrow(data_cleaner, input_path, output_path, args.countries)
+        elif args.streaming:
+            clean_streaming(
+                data_cleaner, input_path, output_path, args.countries, stats_collector
+            )
+        else:
+            clean_in_memory(
+                data_cleaner, input_path, output_path, args.countries, stats_collector
+            )
 
-        logger.info(f"Cleaned data saved to {output_path}")
-        logger.info(f"Cleaned data shape: {df.shape}")
+        if stats_collector is not None:
+            stats_collector.write_json(stats_path)
+        if cache is not None:
+            cache.put(cache_key, outputs)
         logger.info("Data cleaning component completed successfully.")
 
     except Exception:
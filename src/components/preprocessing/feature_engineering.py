@@ -4,9 +4,26 @@ import logging
 from pathlib import Path
 
 import pandas as pd
+import pyarrow.parquet as pq
 
-from src.modules.data_processing.feature_engineer import FeatureEngineer
+from src.modules.data_processing import arrow_backend
+from src.modules.data_processing.feature_engineer import (
+    COUNT_DISTINCT_METHODS,
+    FeatureEngineer,
+)
+from src.modules.data_processing.feature_state import DailyFeatureState
+from src.modules.data_processing.holiday_calendar import (
+    CALENDAR_FLAGS,
+    DEFAULT_COUNTRIES,
+)
+from src.modules.data_processing.hyperloglog import (
+    DEFAULT_PRECISION,
+    MAX_PRECISION,
+    MIN_PRECISION,
+)
+from src.modules.data_processing.schemas import log_memory_savings
 from src.modules.log_config import setup_logging
+from src.modules.utils import split_comma_separated
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +86,77 @@ def parse_args():
         required=True,
         help="Name of the revenue column",
     )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["pandas", "arrow", "numpy"],
+        default="pandas",
+        help="Execution backend: pandas, Arrow compute kernels on pyarrow Tables, or "
+        "the single-pass numpy engine",
+    )
+    parser.add_argument(
+        "--count_distinct",
+        type=str,
+        choices=COUNT_DISTINCT_METHODS,
+        default="packed",
+        help="Distinct counting: packed (day, key) pairs, pandas groupby nunique "
+        "(pandas backend; the other backends count exactly), or hll (approximate "
+        "unique customers/articles from daily HyperLogLog sketches; pandas and numpy "
+        "backends and incremental mode)",
+    )
+    parser.add_argument(
+        "--hll_precision",
+        type=int,
+        choices=range(MIN_PRECISION, MAX_PRECISION + 1),
+        default=DEFAULT_PRECISION,
+        metavar=f"[{MIN_PRECISION}-{MAX_PRECISION}]",
+        help="Precision of the HyperLogLog sketches (2**precision registers per day)",
+    )
+    parser.add_argument(
+        "--output_sketches",
+        type=str,
+        default=None,
+        help="Optional directory to save the daily HyperLogLog sketches in "
+        "(one .npz per covariate, count_distinct=hll only)",
+    )
+    parser.add_argument(
+        "--holiday_countries",
+        type=str,
+        nargs="+",
+        default=list(DEFAULT_COUNTRIES),
+        help="Country codes (holidays package, comma- or space-separated) whose "
+        "holidays count for is_holiday",
+    )
+    parser.add_argument(
+        "--calendar_flags",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Extra calendar flags to add to the future covariates (comma- or "
+        f"space-separated, from {', '.join(CALENDAR_FLAGS)})",
+    )
+    parser.add_argument(
+        "--calendar_cache_dir",
+        type=str,
+        default=None,
+        help="Optional directory to cache holiday dates in (per country and years)",
+    )
+    parser.add_argument(
+        "--state_dir",
+        type=str,
+        default=None,
+        help="Optional directory of the persisted daily aggregate state. If given, "
+        "runs incrementally: only the days from the last processed days on are read "
+        "and recomputed (--backend is not used)",
+    )
+    parser.add_argument(
+        "--refresh_days",
+        type=int,
+        default=1,
+        help="Number of already processed days to recompute in incremental mode "
+        "(the last day may have been partial). Older days whose input row counts or "
+        "sums changed are recomputed as well",
+    )
     parser.add_argument(
         "--output_train_targets",
         type=str,
@@ -93,7 +181,73 @@ def parse_args():
         required=True,
         help="Path to save the future covariates Parquet file",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    args.holiday_countries = split_comma_separated(args.holiday_countries)
+    args.calendar_flags = split_comma_separated(args.calendar_flags)
+    unknown_flags = sorted(set(args.calendar_flags) - set(CALENDAR_FLAGS))
+    if unknown_flags:
+        parser.error(f"unknown --calendar_flags {unknown_flags}")
+    return args
+
+
+def run_incremental(feature_engineer: FeatureEngineer, args: argparse.Namespace):
+    """
+    Update the daily aggregate state in args.state_dir with the days from its
+    refresh start on, and derive the outputs from the state.
+    Returns:
+        Tuple of (engineered_train_targets, engineered_test_targets, past_covariates, future_covariates)
+    """
+    state_dir = Path(args.state_dir)
+    state = DailyFeatureState.load(state_dir, feature_engineer.state_params())
+    refresh_start = None
+    if state is not None:
+        # changed older days are found from the narrow columns of all rows
+        target_columns = [args.date_column, args.target_column]
+        input_fingerprint = feature_engineer.input_fingerprint(
+            target_train=pd.read_parquet(
+                Path(args.target_train_file), columns=target_columns
+            ),
+            target_test=pd.read_parquet(
+                Path(args.target_test_file), columns=target_columns
+            ),
+            features_raw=pd.read_parquet(
+                Path(args.features_raw_file),
+                columns=target_columns + [args.revenue_column],
+            ),
+        )
+        refresh_start = state.refresh_start(args.refresh_days, input_fingerprint)
+        if refresh_start is None:
+            # empty state (an earlier refresh read no rows): full build
+            state = None
+    # only the rows from refresh_start on are read (row groups are pruned by date)
+    filters = (
+        [(args.date_column, ">=", refresh_start)] if refresh_start is not None else None
+    )
+    target_train = pd.read_parquet(Path(args.target_train_file), filters=filters)
+    target_test = pd.read_parquet(Path(args.target_test_file), filters=filters)
+    features_raw = pd.read_parquet(Path(args.features_raw_file), filters=filters)
+    logger.info(
+        f"Incremental run from {refresh_start.date() if refresh_start is not None else 'start'}: "
+        f"{len(features_raw):,} feature rows to process"
+    )
+    # the test split only covers the last days, so reading its date column is cheap
+    test_start = pd.Timestamp(
+        arrow_backend.min_max(
+            pq.read_table(Path(args.target_test_file), columns=[args.date_column]),
+            args.date_column,
+        )[0]
+    )
+
+    outputs = feature_engineer.run_incremental(
+        target_train=target_train,
+        target_test=target_test,
+        features_raw=features_raw,
+        test_start=test_start,
+        state=state,
+        refresh_start=refresh_start,
+    )
+    feature_engineer.state.save(state_dir)
+    return outputs
 
 
 def main():
@@ -101,14 +255,19 @@ def main():
     setup_logging()
     args = parse_args()
     logger.info("Starting feature engineering component...")
+    if args.count_distinct == "hll" and args.backend == "arrow" and not args.state_dir:
+        logger.error(
+            "--count_distinct hll is not supported by the arrow backend. "
+            "Use --backend pandas or numpy."
+        )
+        sys.exit(1)
+    if args.output_sketches and args.count_distinct != "hll":
+        logger.error("--output_sketches requires --count_distinct hll.")
+        sys.exit(1)
     try:
         logger.info(
             f"Reading input data from {args.target_train_file}, {args.target_test_file}, and {args.features_raw_file}"
         )
-        target_train = pd.read_parquet(Path(args.target_train_file))
-        target_test = pd.read_parquet(Path(args.target_test_file))
-        features_raw = pd.read_parquet(Path(args.features_raw_file))
-
         feature_engineer = FeatureEngineer(
             target_col_name=args.target_column,
             date_col_name=args.date_column,
@@ -116,14 +275,42 @@ def main():
             customer_id_col_name=args.customer_id_column,
             article_id_col_name=args.article_id_column,
             revenue_col_name=args.revenue_column,
+            count_distinct=args.count_distinct,
+            hll_precision=args.hll_precision,
+            holiday_countries=args.holiday_countries,
+            calendar_flags=args.calendar_flags,
+            calendar_cache_dir=(
+                Path(args.calendar_cache_dir) if args.calendar_cache_dir else None
+            ),
         )
-        target_train, target_test, past_covariates, future_covariates = (
-            feature_engineer.run(
+        if args.state_dir:
+            target_train, target_test, past_covariates, future_covariates = (
+                run_incremental(feature_engineer, args)
+            )
+        elif args.backend == "arrow":
+            target_train, target_test, past_covariates, future_covariates = (
+                feature_engineer.run_arrow(
+                    target_train=pq.read_table(Path(args.target_train_file)),
+                    target_test=pq.read_table(Path(args.target_test_file)),
+                    features_raw=pq.read_table(Path(args.features_raw_file)),
+                )
+            )
+        else:
+            target_train = pd.read_parquet(Path(args.target_train_file))
+            target_test = pd.read_parquet(Path(args.target_test_file))
+            features_raw = pd.read_parquet(Path(args.features_raw_file))
+            log_memory_savings(features_raw, step="feature_engineering input")
+
+            run = (
+                feature_engineer.run_numpy
+                if args.backend == "numpy"
+                else feature_engineer.run
+            )
+            target_train, target_test, past_covariates, future_covariates = run(
                 target_train=target_train,
                 target_test=target_test,
                 features_raw=features_raw,
             )
-        )
 
         # Save train split
         target_train_path = Path(args.output_train_targets)
@@ -157,6 +344,11 @@ def main():
             f"Future covariates saved to {future_covariates_path} (shape: {future_covariates.shape})"
         )
 
+        # Save HyperLogLog sketches, so later runs can merge and roll them up
+        if args.output_sketches:
+            for name, sketches in feature_engineer.daily_sketches.items():
+                sketches.save(Path(args.output_sketches) / f"{name}.npz")
+
         logger.info("Feature engineering component completed successfully.")
 
     except Exception:
@@ -1,13 +1,29 @@
 import sys
+import json
 import argparse
 import logging
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Optional
 
-from src.modules.data_processing.data_loader import DataLoader
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.modules.data_processing.data_loader import DEFAULT_ARROW_BATCH_SIZE, DataLoader
+from src.modules.data_processing.schemas import (
+    COMPACT_TRANSACTIONS_ARROW_SCHEMA,
+    select_schema_columns,
+)
 from src.modules.log_config import setup_logging
+from src.modules.utils import split_comma_separated
 
 logger = logging.getLogger(__name__)
 
+# Schema metadata key of the watermark range of an incremental dataset part
+WATERMARK_METADATA_KEY = b"watermark"
+# Watermark file of incremental datasets written before parts carried their range
+LEGACY_WATERMARK_FILE_NAME = "_watermark.json"
+
 
 def parse_args():
     """Parse command line arguments."""
@@ -30,7 +46,206 @@ def parse_args():
         default="transactions",
         help="Name of the table to load from the database",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--columns",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Columns to load from the table (comma- or space-separated). If not set, "
+        "loads all",
+    )
+    parser.add_argument(
+        "--countries",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Countries to keep (comma- or space-separated), filtered in the SQL "
+        "query. If not set, keeps all",
+    )
+    parser.add_argument(
+        "--start_date",
+        type=str,
+        default=None,
+        help="Keep rows with InvoiceDate >= start_date (ISO format, e.g. 2011-01-01)",
+    )
+    parser.add_argument(
+        "--end_date",
+        type=str,
+        default=None,
+        help="Keep rows with InvoiceDate < end_date (ISO format, e.g. 2012-01-01)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the table in chunks of this many rows (one parquet row group per "
+        "chunk). If not set, the full table is loaded into memory at once",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only ingest rows past the persisted high-water mark, and append them as a "
+        "new part file to the dataset directory given by --output_data",
+    )
+    parser.add_argument(
+        "--watermark_column",
+        type=str,
+        default="rowid",
+        help="Monotonically increasing column used as high-water mark in incremental "
+        "mode (e.g. rowid or InvoiceDate)",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="Number of processes reading the table in parallel range partitions. "
+        "1 reads over a single connection",
+    )
+    parser.add_argument(
+        "--partition_column",
+        type=str,
+        default="rowid",
+        help="Column whose value range is split for parallel reads (rowid or InvoiceDate)",
+    )
+    args = parser.parse_args()
+    args.columns = split_comma_separated(args.columns)
+    args.countries = split_comma_separated(args.countries)
+    return args
+
+
+def write_batches_to_parquet(batches, schema: pa.Schema, output_path: Path) -> int:
+    """
+    Write an iterable of Arrow record batches to a single Parquet file.
+    Each batch becomes one row group, and only one batch is held in memory at a time.
+
+    Args:
+        batches: Iterable of record batches with the given schema.
+        schema: Arrow schema of the output file.
+        output_path: Path of the Parquet file to write.
+    Returns:
+        Total number of rows written.
+    """
+    total_rows = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            total_rows += batch.num_rows
+    return total_rows
+
+
+def read_watermark(dataset_dir: Path, watermark_column: str) -> Optional[Any]:
+    """
+    Read the high-water mark of an incremental dataset: the largest high-water mark
+    in the metadata of its parts. Datasets written before the parts carried their
+    watermark range have a '_watermark.json' file, which is taken into account too.
+
+    Args:
+        dataset_dir: Directory of the raw parquet dataset.
+        watermark_column: Column the caller expects the watermark to be on.
+    Returns:
+        The high-water mark of the dataset, or None if it has no parts yet.
+    Raises:
+        ValueError: if the persisted watermark is on a different column.
+    """
+    watermarks = []
+    legacy_path = dataset_dir / LEGACY_WATERMARK_FILE_NAME
+    if legacy_path.exists():
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            watermarks.append(json.load(f))
+    for part_path in sorted(dataset_dir.glob("part-*.parquet")):
+        metadata = pq.read_schema(part_path).metadata or {}
+        if WATERMARK_METADATA_KEY in metadata:
+            watermarks.append(json.loads(metadata[WATERMARK_METADATA_KEY]))
+    for watermark in watermarks:
+        if watermark["column"] != watermark_column:
+            raise ValueError(
+                f"Persisted watermark is on column '{watermark['column']}', "
+                f"not '{watermark_column}'. Re-ingest the dataset from scratch to "
+                "change it."
+            )
+    values = [watermark["value"] for watermark in watermarks]
+    return max(values) if values else None
+
+
+def ingest_incremental(
+    data_loader: DataLoader,
+    table_name: str,
+    dataset_dir: Path,
+    schema: pa.Schema,
+    watermark_column: str,
+    batch_size: int,
+) -> int:
+    """
+    Append rows past the persisted high-water mark as a new part of the dataset.
+
+    The dataset directory holds one parquet file per run ('part-<utc timestamp>.parquet').
+    Each part stores the watermark range it covers in its schema metadata, and the
+    low watermark of a run is derived from the existing parts. A part is written to a
+    temporary file and renamed, so rows and watermark are published in one step: a
+    crash before the rename leaves only a temporary file (removed by the next run),
+    and never a part whose rows are ingested again. Files starting with '_' or '.'
+    are ignored when the directory is read as a parquet dataset, e.g. with
+    pd.read_parquet(dataset_dir).
+
+    Args:
+        data_loader: DataLoader for the source database.
+        table_name: Name of the table to load.
+        dataset_dir: Directory of the raw parquet dataset.
+        schema: Arrow schema of the columns to load.
+        watermark_column: Monotonically increasing column used as high-water mark.
+        batch_size: Number of rows per record batch / row group.
+    Returns:
+        Number of new rows ingested.
+    """
+    if dataset_dir.exists() and not dataset_dir.is_dir():
+        raise ValueError(
+            f"{dataset_dir} is a file. Incremental mode writes a dataset directory; "
+            "remove the file or choose another output path."
+        )
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    for tmp_part_path in dataset_dir.glob(".part-*.tmp"):
+        logger.warning(f"Removing unfinished part {tmp_part_path.name}")
+        tmp_part_path.unlink()
+
+    low_watermark = read_watermark(dataset_dir, watermark_column)
+    high_watermark = data_loader.get_high_watermark(table_name, watermark_column)
+    logger.info(
+        f"Incremental load on '{watermark_column}': ({low_watermark}, {high_watermark}]"
+    )
+    if high_watermark is None or high_watermark == low_watermark:
+        logger.info("No new rows since last ingestion.")
+        return 0
+
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    part_path = dataset_dir / f"part-{run_id}.parquet"
+    tmp_part_path = dataset_dir / f".{part_path.name}.tmp"
+    total_rows = write_batches_to_parquet(
+        batches=data_loader.iter_table_batches(
+            table_name=table_name,
+            batch_size=batch_size,
+            schema=schema,
+            watermark_column=watermark_column,
+            low_watermark=low_watermark,
+            high_watermark=high_watermark,
+        ),
+        schema=schema.with_metadata(
+            {
+                **(schema.metadata or {}),
+                WATERMARK_METADATA_KEY: json.dumps(
+                    {
+                        "column": watermark_column,
+                        "value": high_watermark,
+                        "low_value": low_watermark,
+                        "updated_at": datetime.now(timezone.utc).isoformat(),
+                    }
+                ),
+            }
+        ),
+        output_path=tmp_part_path,
+    )
+    tmp_part_path.replace(part_path)
+    logger.info(f"Appended {total_rows:,} rows to dataset as {part_path.name}")
+    return total_rows
 
 
 def main():
@@ -42,17 +257,63 @@ def main():
         logger.info(
             f"Loading data from table {args.table_name} in database {args.db_path}..."
         )
-        data_loader = DataLoader(db_path=args.db_path)
-        df = data_loader.load_table_to_df(
-            table_name=args.table_name,
+        data_loader = DataLoader(
+            db_path=args.db_path,
+            countries=args.countries,
+            start_date=args.start_date,
+            end_date=args.end_date,
         )
-
+        schema = select_schema_columns(COMPACT_TRANSACTIONS_ARROW_SCHEMA, args.columns)
         output_path = Path(args.output_data)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_parquet(output_path, index=False)
 
-        logger.info(f"Ingested data saved to {output_path}")
-        logger.info(f"Dataframe shape: {df.shape}")
+        if args.num_workers > 1 and args.incremental:
+            raise ValueError(
+                "Parallel reads (--num_workers > 1) cannot be combined with --incremental"
+            )
+
+        if args.num_workers > 1:
+            table = data_loader.load_table_parallel(
+                table_name=args.table_name,
+                num_workers=args.num_workers,
+                schema=schema,
+                partition_column=args.partition_column,
+                batch_size=args.chunksize or DEFAULT_ARROW_BATCH_SIZE,
+            )
+            pq.write_table(table, output_path)
+            logger.info(f"Ingested data saved to {output_path}")
+            logger.info(f"Table shape: ({table.num_rows}, {table.num_columns})")
+        elif args.incremental:
+            ingest_incremental(
+                data_loader=data_loader,
+                table_name=args.table_name,
+                dataset_dir=output_path,
+                schema=schema,
+                watermark_column=args.watermark_column,
+                batch_size=args.chunksize or DEFAULT_ARROW_BATCH_SIZE,
+            )
+            logger.info(f"Ingested data saved to dataset {output_path}")
+        elif args.chunksize is not None:
+            logger.info(f"Streaming table in chunks of {args.chunksize:,} rows...")
+            total_rows = write_batches_to_parquet(
+                batches=data_loader.iter_table_batches(
+                    table_name=args.table_name,
+                    batch_size=args.chunksize,
+                    schema=schema,
+                ),
+                schema=schema,
+                output_path=output_path,
+            )
+            logger.info(f"Ingested data saved to {output_path}")
+            logger.info(f"Rows written: {total_rows:,}")
+        else:
+            table = data_loader.load_table_to_arrow(
+                table_name=args.table_name,
+                schema=schema,
+            )
+            pq.write_table(table, output_path)
+            logger.info(f"Ingested data saved to {output_path}")
+            logger.info(f"Table shape: ({table.num_rows}, {table.num_columns})")
         logger.info("Data ingestion component completed successfully.")
 
     except Exception:
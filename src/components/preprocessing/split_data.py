@@ -1,12 +1,16 @@
 import sys
+import json
 import argparse
 import logging
 from pathlib import Path
 
 import pandas as pd
+import pyarrow.dataset as ds
 
-from src.modules.data_processing.data_splitter import DataSplitter
+from src.modules.data_processing.data_splitter import FOLD_WINDOWS, DataSplitter
+from src.modules.data_processing.schemas import log_memory_savings
 from src.modules.log_config import setup_logging
+from src.modules.utils import split_comma_separated
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +43,21 @@ def parse_args():
         required=True,
         help="Number of calendar days to include in test set",
     )
+    parser.add_argument(
+        "--day_column",
+        type=str,
+        default=None,
+        help="Name of the precomputed day-level date column. If not set, the date "
+        "column is normalized to days",
+    )
+    parser.add_argument(
+        "--feature_columns",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Columns to keep in the features (comma- or space-separated). If not set, "
+        "keeps all",
+    )
     parser.add_argument(
         "--output_train_targets",
         type=str,
@@ -57,17 +76,87 @@ def parse_args():
         required=True,
         help="Path to save the features Parquet file",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--output_folds",
+        type=str,
+        default=None,
+        help="Path to save rolling-origin fold boundaries as JSON. If not set, no "
+        "folds are generated",
+    )
+    parser.add_argument(
+        "--num_folds",
+        type=int,
+        default=12,
+        help="Number of rolling-origin folds",
+    )
+    parser.add_argument(
+        "--fold_validation_days",
+        type=int,
+        default=28,
+        help="Number of calendar days in each fold's validation segment",
+    )
+    parser.add_argument(
+        "--fold_test_days",
+        type=int,
+        default=7,
+        help="Number of calendar days in each fold's test segment (0 = no test segment)",
+    )
+    parser.add_argument(
+        "--fold_step_days",
+        type=int,
+        default=None,
+        help="Days between fold origins. Defaults to the test (or validation) days",
+    )
+    parser.add_argument(
+        "--fold_window",
+        type=str,
+        choices=FOLD_WINDOWS,
+        default="expanding",
+        help="expanding: train from the first date; sliding: fixed fold_train_days",
+    )
+    parser.add_argument(
+        "--fold_train_days",
+        type=int,
+        default=None,
+        help="Number of calendar days in each fold's train segment (sliding window)",
+    )
+    parser.add_argument(
+        "--row_group_size",
+        type=int,
+        default=65536,
+        help="Max rows per Parquet row group of the date-sorted outputs, so readers "
+        "filtering on date (incremental feature engineering) skip older row groups",
+    )
+    args = parser.parse_args()
+    args.feature_columns = split_comma_separated(args.feature_columns)
+    return args
 
 
 def main():
     """Data splitting component entry point."""
     setup_logging()
     args = parse_args()
+    # DataSplitter returns column selections and row slices of one sorted frame, which
+    # only share its data with copy-on-write: the default from pandas 3.0, enabled
+    # here on older versions (without it, every selection is a full copy)
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
     logger.info("Starting data splitting component...")
     try:
+        # Only read the columns needed for targets and features
+        columns = None
+        if args.feature_columns:
+            input_columns = ds.dataset(args.input_data, format="parquet").schema.names
+            columns = list(
+                dict.fromkeys(
+                    [args.date_column, args.target_column]
+                    + ([args.day_column] if args.day_column in input_columns else [])
+                    + args.feature_columns
+                )
+            )
         logger.info(f"Reading input data from {args.input_data}...")
-        df = pd.read_parquet(Path(args.input_data))
+        df = pd.read_parquet(Path(args.input_data), columns=columns)
+        log_memory_savings(df, step="split_data input")
 
         data_splitter = DataSplitter()
         train_targets, test_targets, features = data_splitter.run(
@@ -75,12 +164,16 @@ def main():
             date_column=args.date_column,
             target_column=args.target_column,
             days_in_test_split=args.days_in_test_split,
+            feature_columns=args.feature_columns,
+            day_column=args.day_column,
         )
 
         # Save train targets
         train_path = Path(args.output_train_targets)
         train_path.parent.mkdir(parents=True, exist_ok=True)
-        train_targets.to_parquet(train_path, index=False)
+        train_targets.to_parquet(
+            train_path, index=False, row_group_size=args.row_group_size
+        )
         logger.info(
             f"Train targets saved to {train_path} (shape: {train_targets.shape})"
         )
@@ -88,15 +181,46 @@ def main():
         # Save test targets
         test_path = Path(args.output_test_targets)
         test_path.parent.mkdir(parents=True, exist_ok=True)
-        test_targets.to_parquet(test_path, index=False)
+        test_targets.to_parquet(
+            test_path, index=False, row_group_size=args.row_group_size
+        )
         logger.info(f"Test targets saved to {test_path} (shape: {test_targets.shape})")
 
         # Save features
         features_path = Path(args.output_features)
         features_path.parent.mkdir(parents=True, exist_ok=True)
-        features.to_parquet(features_path, index=False)
+        features.to_parquet(
+            features_path, index=False, row_group_size=args.row_group_size
+        )
         logger.info(f"Features saved to {features_path} (shape: {features.shape})")
 
+        # Save fold boundaries, over the full date range
+        if args.output_folds is not None:
+            folds = list(
+                data_splitter.generate_folds(
+                    dates=features[args.date_column],
+                    num_folds=args.num_folds,
+                    validation_days=args.fold_validation_days,
+                    test_days=args.fold_test_days,
+                    step_days=args.fold_step_days,
+                    window=args.fold_window,
+                    train_days=args.fold_train_days,
+                )
+            )
+            folds_path = Path(args.output_folds)
+            folds_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(folds_path, "w") as f:
+                json.dump(
+                    {
+                        "date_column": args.date_column,
+                        "window": args.fold_window,
+                        "folds": folds,
+                    },
+                    f,
+                    indent=2,
+                )
+            logger.info(f"{len(folds)} folds saved to {folds_path}")
+
         logger.info("Data splitting component completed successfully.")
 
     except Exception:
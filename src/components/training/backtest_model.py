@@ -8,6 +8,7 @@ import json
 import pandas as pd
 from darts import TimeSeries
 
+from src.modules.data_processing.data_splitter import select_fold_rows
 from src.modules.model_handling.model_handler import ModelHandler
 from src.modules.log_config import setup_logging
 
@@ -73,6 +74,14 @@ def parse_args():
         default=0.7,
         help="Fraction of series to start backtest (0.0-1.0)",
     )
+    parser.add_argument(
+        "--folds_path",
+        type=str,
+        default=None,
+        help="Path to the rolling-origin folds JSON from split_data. If set, the model "
+        "is backtested on the validation segment of each fold instead of from "
+        "backtest_start",
+    )
     parser.add_argument(
         "--scores_output_path",
         type=str,
@@ -150,14 +159,51 @@ def main():
     # Backtest model on training data
     logger.info("Running backtest on training data...")
     model_handler = ModelHandler()
-    backtest_scores = model_handler.backtest_model(
-        model=trained_model,
-        target_series=target_train,
-        past_covariates=past_covariates,
-        future_covariates=future_covariates,
-        start=backtest_start,
-        metrics=["rmse", "wmape"],
-    )
+    if args.folds_path is None:
+        backtest_scores = model_handler.backtest_model(
+            model=trained_model,
+            target_series=target_train,
+            past_covariates=past_covariates,
+            future_covariates=future_covariates,
+            start=backtest_start,
+            metrics=["rmse", "wmape"],
+        )
+    else:
+        with open(args.folds_path) as f:
+            folds = json.load(f)["folds"]
+        # Only folds validated within the training period
+        last_train_date = target_train_df[time_column].max()
+        fold_scores = []
+        for fold in folds:
+            if pd.Timestamp(fold["validation_end"]) > last_train_date:
+                logger.info(f"Skipping fold {fold['fold']}: ends after training data")
+                continue
+            fold_target = TimeSeries.from_dataframe(
+                select_fold_rows(target_train_df, time_column, fold),
+                time_col=time_column,
+                value_cols=target_column,
+                fill_missing_dates=True,
+                fillna_value=0,
+                freq="D",
+            )
+            scores = model_handler.backtest_model(
+                model=trained_model,
+                target_series=fold_target,
+                past_covariates=past_covariates,
+                future_covariates=future_covariates,
+                start=pd.Timestamp(fold["validation_start"]),
+                metrics=["rmse", "wmape"],
+            )
+            logger.info(f"Fold {fold['fold']} backtest scores: {scores}")
+            fold_scores.append({"fold": fold["fold"], **scores})
+        if not fold_scores:
+            logger.error("No fold is within the training data. Exiting with failure.")
+            sys.exit(1)
+        backtest_scores = {
+            metric: float(pd.DataFrame(fold_scores)[metric].mean())
+            for metric in ["rmse", "wmape"]
+        }
+        backtest_scores["folds"] = fold_scores
 
     logger.info(f"Backtest scores: {backtest_scores} for model {model_path.stem}")
 
@@ -0,0 +1,175 @@
+"""
+Fingerprint-keyed on-disk cache for pipeline artifacts.
+
+A component computes a cache key from everything its output depends on: a
+fingerprint of the input files (fingerprint_parquet), its parameters and the
+version of the code that produces the output (fingerprint_code). On a hit the
+cached artifacts are copied to the requested output paths, and the component can
+skip its work. On a miss the component runs as usual and stores its outputs.
+
+Layout: one directory per key, holding the artifact files and a meta.json. The
+cache is bounded in size: after each put, least recently used entries are evicted
+until the total size is below max_size_bytes.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+PARQUET_MAGIC = b"PAR1"
+META_FILE_NAME = "meta.json"
+
+
+def fingerprint_parquet(path: Path) -> Dict[str, Any]:
+    """
+    Fingerprint a Parquet file, or all Parquet files of a dataset directory, from
+    size, modification time and a hash of the footer. The footer holds the schema
+    and per row group statistics, so the data pages are never read.
+    Args:
+        path: Path to a Parquet file or dataset directory.
+    Returns:
+        JSON-serializable fingerprint.
+    """
+    path = Path(path)
+    files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+    return {
+        str(file.relative_to(path) if path.is_dir() else file.name): {
+            "size": file.stat().st_size,
+            "mtime_ns": file.stat().st_mtime_ns,
+            "footer_sha256": _hash_parquet_footer(file),
+        }
+        for file in files
+    }
+
+
+def fingerprint_code(modules: Iterable[ModuleType]) -> str:
+    """
+    Fingerprint the source files of the given modules.
+    Returns:
+        SHA-256 hex digest of the module sources.
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def _hash_parquet_footer(path: Path) -> str:
+    """Hash the footer of a Parquet file (metadata length + metadata + magic)."""
+    with open(path, "rb") as f:
+        f.seek(-8, os.SEEK_END)
+        tail = f.read(8)
+        if tail[4:] != PARQUET_MAGIC:
+            raise ValueError(f"{path} is not a Parquet file")
+        footer_length = int.from_bytes(tail[:4], "little")
+        f.seek(-(8 + footer_length), os.SEEK_END)
+        return hashlib.sha256(f.read(footer_length) + tail).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Size-bounded cache of pipeline artifacts, keyed by a hash of the inputs.
+
+    Example usage:
+    ```python
+        cache = ArtifactCache(Path("data/cache/clean_data"), max_size_bytes=2**30)
+        key = cache.make_key(input=fingerprint_parquet(input_path), countries=countries)
+        if not cache.get(key, {"data": output_path}):
+            ...  # compute output_path
+            cache.put(key, {"data": output_path})
+    ```
+    """
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int):
+        """
+        Args:
+            cache_dir: Directory of the cache. Created if it does not exist.
+            max_size_bytes: Max total size of the cached artifacts.
+        """
+        if max_size_bytes <= 0:
+            raise ValueError("max_size_bytes must be positive integer")
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        Build a cache key from JSON-serializable parts.
+        Returns:
+            SHA-256 hex digest of the parts.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, outputs: Dict[str, Path]) -> bool:
+        """
+        Copy the cached artifacts of a key to the output paths.
+        Args:
+            key: Cache key.
+            outputs: Output path per artifact name.
+        Returns:
+            True on a hit (all artifacts restored), False otherwise.
+        """
+        entry_dir = self.cache_dir / key
+        if not all((entry_dir / name).is_file() for name in outputs):
+            logger.info(f"Cache miss for key {key[:12]}")
+            return False
+        for name, output_path in outputs.items():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry_dir / name, output_path)
+        self._touch(entry_dir)
+        logger.info(f"Cache hit for key {key[:12]}: restored {sorted(outputs)}")
+        return True
+
+    def put(self, key: str, outputs: Dict[str, Path]) -> None:
+        """
+        Store artifacts under a key, then evict entries above the size limit.
+        The entry is written to a temporary directory and renamed, so readers
+        never see a partial entry.
+        Args:
+            key: Cache key.
+            outputs: Path of the artifact file per artifact name.
+        """
+        entry_dir = self.cache_dir / key
+        tmp_dir = self.cache_dir / f".{key}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        for name, output_path in outputs.items():
+            shutil.copyfile(output_path, tmp_dir / name)
+        self._touch(tmp_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        tmp_dir.rename(entry_dir)
+        logger.info(f"Stored {sorted(outputs)} in cache under key {key[:12]}")
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_size_bytes."""
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            meta_path = entry_dir / META_FILE_NAME
+            if entry_dir.name.startswith(".") or not meta_path.is_file():
+                continue
+            last_used = json.loads(meta_path.read_text())["last_used"]
+            size = sum(file.stat().st_size for file in entry_dir.iterdir())
+            entries.append((last_used, size, entry_dir))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_dir)
+            total_size -= size
+            logger.info(f"Evicted cache entry {entry_dir.name[:12]} ({size:,} bytes)")
+
+    def _touch(self, entry_dir: Path) -> None:
+        """Record the last use of an entry, for LRU eviction."""
+        (entry_dir / META_FILE_NAME).write_text(json.dumps({"last_used": time.time()}))
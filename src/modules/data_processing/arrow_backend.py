@@ -0,0 +1,203 @@
+"""
+Arrow compute backend for DataCleaner and FeatureEngineer.
+
+Same rules and aggregations as the pandas implementations, on pyarrow Tables with
+Arrow compute kernels (multithreaded, no conversion of the large tables to pandas):
+- filtering with boolean masks (pc.greater, pc.is_in, Table.filter)
+- string-prefix matching with pc.match_substring_regex, evaluated once per
+    dictionary value for dictionary-encoded columns
+- group-by sum, mean and count-distinct with Table.group_by
+
+Only the daily aggregates, which are small, are converted to pandas.
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_per_dictionary_value(
+    column: pa.ChunkedArray, predicate: Callable[[pa.Array], pa.Array]
+) -> pa.ChunkedArray:
+    """
+    Evaluate a predicate on a column. For dictionary-encoded chunks the predicate is
+    evaluated once per dictionary value and mapped back to the rows by index.
+    Arrow counterpart of data_cleaner.evaluate_per_distinct_value.
+
+    Args:
+        column: Column to evaluate.
+        predicate: Function taking an array of values, returning a boolean array.
+    Returns:
+        Boolean column with the predicate result per row.
+    """
+    chunks = []
+    for chunk in column.chunks:
+        if pa.types.is_dictionary(chunk.type):
+            chunks.append(pc.take(predicate(chunk.dictionary), chunk.indices))
+        else:
+            chunks.append(predicate(chunk))
+    return pa.chunked_array(chunks, type=pa.bool_())
+
+
+def clean_table(table: pa.Table, countries: Optional[List[str]] = None) -> pa.Table:
+    """
+    Apply the DataCleaner filter rules in one pass, and add the Revenue column.
+    Rows where a rule evaluates to null (missing values) are removed, as in pandas.
+
+    Args:
+        table: Table with raw transaction data.
+        countries: Optional list of country names to keep. If None, keeps all.
+    Returns:
+        Filtered table with Revenue column.
+    """
+    rules = [
+        (
+            "rows with non-positive Quantity or UnitPrice",
+            pc.and_(
+                pc.greater(table["Quantity"], 0), pc.greater(table["UnitPrice"], 0)
+            ),
+        ),
+        (
+            "rows with alphabetic StockCode prefix",
+            pc.invert(
+                evaluate_per_dictionary_value(
+                    table["StockCode"],
+                    lambda values: pc.match_substring_regex(
+                        values.cast(pa.string()), "^[A-Za-z]"
+                    ),
+                )
+            ),
+        ),
+    ]
+    if countries:
+        value_set = pa.array(countries, type=pa.string())
+        rules.append(
+            (
+                f"rows not in specified countries: {countries}",
+                evaluate_per_dictionary_value(
+                    table["Country"],
+                    lambda values: pc.is_in(values.cast(pa.string()), value_set),
+                ),
+            )
+        )
+    elif countries is not None:
+        logger.info("No countries specified for filtering. Returning all countries")
+
+    keep = None
+    for description, rule_mask in rules:
+        rule_mask = pc.fill_null(rule_mask, False)
+        if keep is None:
+            removed_mask = pc.invert(rule_mask)
+            keep = rule_mask
+        else:
+            removed_mask = pc.and_(keep, pc.invert(rule_mask))
+            keep = pc.and_(keep, rule_mask)
+        removed = pc.sum(removed_mask, min_count=0).as_py()
+        logger.info(f"Removed {removed:,} {description}")
+
+    table_cleaned = table.filter(keep)
+    revenue = pc.multiply(
+        table_cleaned["Quantity"].cast(pa.float64()), table_cleaned["UnitPrice"]
+    )
+    logger.info("Created Revenue column")
+    return table_cleaned.append_column("Revenue", revenue)
+
+
+def aggregate_daily_sum(
+    table: pa.Table, date_col_name: str, value_col_name: str
+) -> pa.Table:
+    """
+    Sum a column per day, keeping the column's type.
+    Returns:
+        Table with date and summed value columns, sorted by date.
+    """
+    daily = table.group_by(date_col_name).aggregate([(value_col_name, "sum")])
+    daily = daily.rename_columns([date_col_name, value_col_name])
+    daily = daily.set_column(
+        1,
+        value_col_name,
+        daily[value_col_name].cast(table.schema.field(value_col_name).type),
+    )
+    return daily.sort_by(date_col_name)
+
+
+def compute_past_covariates(
+    features_raw: pa.Table,
+    date_col_name: str,
+    target_col_name: str,
+    transaction_id_col_name: str,
+    customer_id_col_name: str,
+    article_id_col_name: str,
+    revenue_col_name: str,
+) -> pa.Table:
+    """
+    Compute the daily past covariates of FeatureEngineer.compute_past_covariates:
+    num_transactions, num_unique_customers, num_unique_articles (count-distinct),
+    avg_basket_size (mean of per-invoice quantity sums) and avg_unit_price
+    (revenue sum / quantity sum).
+
+    Returns:
+        Table with date column and past covariate columns, sorted by date.
+    """
+    # group-by on dictionary keys needs the same dictionary in every chunk
+    features_raw = features_raw.unify_dictionaries()
+
+    business_indicators = features_raw.group_by(date_col_name).aggregate(
+        [
+            (transaction_id_col_name, "count_distinct"),
+            (customer_id_col_name, "count_distinct"),
+            (article_id_col_name, "count_distinct"),
+            (revenue_col_name, "sum"),
+            (target_col_name, "sum"),
+        ]
+    )
+    basket_sizes = features_raw.group_by(
+        [date_col_name, transaction_id_col_name]
+    ).aggregate([(target_col_name, "sum")])
+    avg_basket_size = basket_sizes.group_by(date_col_name).aggregate(
+        [(f"{target_col_name}_sum", "mean")]
+    )
+
+    avg_unit_price = pc.divide(
+        business_indicators[f"{revenue_col_name}_sum"].cast(pa.float64()),
+        business_indicators[f"{target_col_name}_sum"].cast(pa.float64()),
+    )
+    business_indicators = pa.table(
+        {
+            date_col_name: business_indicators[date_col_name],
+            "num_transactions": business_indicators[
+                f"{transaction_id_col_name}_count_distinct"
+            ],
+            "num_unique_customers": business_indicators[
+                f"{customer_id_col_name}_count_distinct"
+            ],
+            "num_unique_articles": business_indicators[
+                f"{article_id_col_name}_count_distinct"
+            ],
+            "avg_unit_price": avg_unit_price,
+        }
+    )
+    avg_basket_size = avg_basket_size.rename_columns([date_col_name, "avg_basket_size"])
+    past_covariates = business_indicators.join(
+        avg_basket_size, keys=date_col_name, join_type="left outer"
+    )
+    return past_covariates.select(
+        [
+            date_col_name,
+            "num_transactions",
+            "num_unique_customers",
+            "num_unique_articles",
+            "avg_basket_size",
+            "avg_unit_price",
+        ]
+    ).sort_by(date_col_name)
+
+
+def min_max(table: pa.Table, col_name: str) -> Tuple:
+    """Return (min, max) of a column as Python values."""
+    result = pc.min_max(table[col_name])
+    return result["min"].as_py(), result["max"].as_py()
@@ -0,0 +1,288 @@
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.modules.data_processing.schemas import parse_dates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATCH_COLUMNS = [
+    "StockCode",
+    "CustomerID",
+    "Description",
+    "Country",
+    "UnitPrice",
+]
+
+
+class CancellationMatcher:
+    """
+    In-memory matching of cancelled transactions to the original purchases they cancel.
+
+    Cancellations (InvoiceNo starting with 'C') carry no reference to the original
+    invoice, so they are matched on article/customer keys and a date window instead:
+    the original purchase must have identical match keys (UnitPrice compared as
+    absolute value), and the cancellation must happen within `window_days` after it.
+    Same rule as the SQL match in setup_scripts/initialize_sqlite_database.py (with
+    the default match columns), but also supports partial cancellations.
+
+    The input must still contain the cancellations, i.e. come from the raw
+    transactions table (DB_TABLE_NAME_RAW). The processed table ingested by default
+    has the cancellation invoices removed at database initialization already, so
+    there is nothing to match; run logs a warning if there are no cancellation rows.
+
+    Matching is done in two passes over key-sorted arrays:
+    1. exact pass: each cancellation is matched to the latest earlier purchase with the
+        same quantity inside the window (merge_asof, vectorized). A purchase is used
+        by at most one cancellation.
+    2. greedy pass: the cancelled quantity that is left is allocated against the
+        remaining quantity of earlier purchases inside the window, latest purchase
+        first. Only the cancellations left over from the exact pass are visited, each
+        with a binary search into its key group.
+
+    Purchases whose quantity is fully cancelled are removed, partially cancelled
+    purchases keep their remaining quantity, and all cancellation rows are removed.
+    Rows with a missing match key are never matched (as with SQL NULL equality).
+
+    Example usage:
+    ```python
+        matcher = CancellationMatcher(window_days=50)
+        df_matched = matcher.run(df_raw)
+    ```
+    """
+
+    def __init__(
+        self,
+        window_days: int = 50,
+        match_columns: Optional[List[str]] = None,
+        invoice_col_name: str = "InvoiceNo",
+        quantity_col_name: str = "Quantity",
+        date_col_name: str = "InvoiceDate",
+        unit_price_col_name: str = "UnitPrice",
+    ):
+        """
+        Args:
+            window_days: Max days between an original purchase and its cancellation.
+            match_columns: Columns that must be equal between purchase and cancellation.
+                Defaults to StockCode, CustomerID, Description, Country and UnitPrice.
+            invoice_col_name: Name of the invoice number column.
+            quantity_col_name: Name of the quantity column.
+            date_col_name: Name of the invoice date column.
+            unit_price_col_name: Name of the unit price column (matched on absolute value).
+        """
+        if window_days <= 0:
+            raise ValueError("window_days must be positive integer")
+        self.window_days = window_days
+        self.match_columns = match_columns or DEFAULT_MATCH_COLUMNS
+        self.invoice_col_name = invoice_col_name
+        self.quantity_col_name = quantity_col_name
+        self.date_col_name = date_col_name
+        self.unit_price_col_name = unit_price_col_name
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Remove cancellations and the purchase quantity they cancel.
+
+        Args:
+            df: DataFrame with raw transactions, including cancellations.
+        Returns:
+            DataFrame without cancellation rows, where matched purchases are removed
+            (fully cancelled) or have their Quantity reduced (partially cancelled).
+        """
+        missing_columns = {
+            self.invoice_col_name,
+            self.quantity_col_name,
+            self.date_col_name,
+            *self.match_columns,
+        } - set(df.columns)
+        if missing_columns:
+            raise ValueError(
+                f"Columns {sorted(missing_columns)} not found in DataFrame"
+            )
+
+        is_cancellation = (
+            df[self.invoice_col_name]
+            .astype(str)
+            .str.startswith(("C", "c"))
+            .to_numpy(dtype=bool)
+        )
+        quantity = df[self.quantity_col_name].to_numpy()
+        dates = _to_datetime64(df[self.date_col_name])
+        if not is_cancellation.any():
+            logger.warning(
+                "No cancellation rows in the input, nothing to match. Cancellation "
+                "matching needs the raw transactions table, the processed table has "
+                "its cancellations removed at database initialization"
+            )
+        groups = self._compute_match_groups(df)
+        has_keys = groups >= 0
+
+        purchase_idx = np.flatnonzero(~is_cancellation & (quantity > 0) & has_keys)
+        cancel_idx = np.flatnonzero(is_cancellation & (quantity < 0) & has_keys)
+
+        # Purchases sorted by (group, date): each group is a contiguous, date-sorted run
+        order = np.lexsort((dates[purchase_idx], groups[purchase_idx]))
+        purchase_idx = purchase_idx[order]
+        purchase_groups = groups[purchase_idx]
+        purchase_dates = dates[purchase_idx]
+        remaining = quantity[purchase_idx].astype(np.int64)
+
+        cancel_idx = cancel_idx[np.argsort(dates[cancel_idx], kind="stable")]
+        cancel_need = -quantity[cancel_idx].astype(np.int64)
+
+        exact_cancel_pos, exact_purchase_pos = self._match_exact(
+            cancel_groups=groups[cancel_idx],
+            cancel_dates=dates[cancel_idx],
+            cancel_quantity=cancel_need,
+            purchase_groups=purchase_groups,
+            purchase_dates=purchase_dates,
+            purchase_quantity=remaining,
+        )
+        remaining[exact_purchase_pos] = 0
+        cancel_need[exact_cancel_pos] = 0
+
+        residual_pos = np.flatnonzero(cancel_need > 0)
+        unmatched_quantity = self._allocate_greedy(
+            cancel_groups=groups[cancel_idx[residual_pos]],
+            cancel_dates=dates[cancel_idx[residual_pos]],
+            cancel_need=cancel_need[residual_pos],
+            purchase_groups=purchase_groups,
+            purchase_dates=purchase_dates,
+            remaining=remaining,
+        )
+
+        new_quantity = quantity.copy()
+        new_quantity[purchase_idx] = remaining
+        fully_cancelled = np.zeros(len(df), dtype=bool)
+        fully_cancelled[purchase_idx[remaining == 0]] = True
+        keep = ~is_cancellation & ~fully_cancelled
+        df_matched = df.loc[keep].copy()
+        df_matched[self.quantity_col_name] = new_quantity[keep]
+
+        partially_cancelled = int(
+            np.count_nonzero((remaining > 0) & (remaining < quantity[purchase_idx]))
+        )
+        logger.info(
+            f"Matched {len(cancel_idx):,} cancellations within {self.window_days} days: "
+            f"{len(exact_cancel_pos):,} exact, {len(residual_pos):,} allocated greedily "
+            f"({int(unmatched_quantity.sum()):,} cancelled items without a purchase). "
+            f"Removed {int(np.count_nonzero(remaining == 0)):,} fully cancelled and "
+            f"reduced {partially_cancelled:,} partially cancelled purchases"
+        )
+        logger.info(
+            f"Removed {int(is_cancellation.sum()):,} cancellation rows. "
+            f"Rows: {len(df):,} -> {len(df_matched):,}"
+        )
+        return df_matched
+
+    def _compute_match_groups(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Label each row with an integer id of its match-key combination.
+        Returns:
+            Array of group ids; -1 for rows with a missing match key.
+        """
+        keys = df[self.match_columns]
+        if self.unit_price_col_name in self.match_columns:
+            keys = keys.assign(
+                **{self.unit_price_col_name: keys[self.unit_price_col_name].abs()}
+            )
+        groups = (
+            keys.groupby(self.match_columns, sort=False, dropna=False, observed=True)
+            .ngroup()
+            .to_numpy(dtype=np.int64, copy=True)
+        )
+        groups[keys.isna().any(axis=1).to_numpy()] = -1
+        return groups
+
+    def _match_exact(
+        self,
+        cancel_groups: np.ndarray,
+        cancel_dates: np.ndarray,
+        cancel_quantity: np.ndarray,
+        purchase_groups: np.ndarray,
+        purchase_dates: np.ndarray,
+        purchase_quantity: np.ndarray,
+    ) -> Sequence[np.ndarray]:
+        """
+        Match cancellations to the latest earlier purchase with equal quantity.
+        Cancellations are given in date order, so when two cancellations find the same
+        purchase, the earlier cancellation keeps it and the later one goes to the
+        greedy pass.
+        Returns:
+            Tuple of (cancellation positions, purchase positions) of the matches.
+        """
+        window = np.timedelta64(self.window_days, "D")
+        cancels = pd.DataFrame(
+            {
+                "group": cancel_groups,
+                "quantity": cancel_quantity,
+                "date": cancel_dates,
+                "cancel_pos": np.arange(len(cancel_groups)),
+            }
+        )
+        purchases = pd.DataFrame(
+            {
+                "group": purchase_groups,
+                "quantity": purchase_quantity,
+                "date": purchase_dates,
+                "purchase_pos": np.arange(len(purchase_groups)),
+            }
+        ).sort_values("date", kind="stable")
+        matches = pd.merge_asof(
+            cancels,
+            purchases.rename(columns={"date": "purchase_date"}),
+            left_on="date",
+            right_on="purchase_date",
+            by=["group", "quantity"],
+            direction="backward",
+        ).dropna(subset=["purchase_pos"])
+        matches = matches[matches["date"] - matches["purchase_date"] < window]
+        matches = matches.drop_duplicates(subset="purchase_pos", keep="first")
+        return (
+            matches["cancel_pos"].to_numpy(dtype=np.int64),
+            matches["purchase_pos"].to_numpy(dtype=np.int64),
+        )
+
+    def _allocate_greedy(
+        self,
+        cancel_groups: np.ndarray,
+        cancel_dates: np.ndarray,
+        cancel_need: np.ndarray,
+        purchase_groups: np.ndarray,
+        purchase_dates: np.ndarray,
+        remaining: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Allocate cancelled quantity against earlier purchases, latest purchase first.
+        Updates `remaining` in place.
+        Returns:
+            Cancelled quantity that could not be allocated, per cancellation.
+        """
+        window = np.timedelta64(self.window_days, "D")
+        group_starts = np.searchsorted(purchase_groups, cancel_groups, side="left")
+        group_ends = np.searchsorted(purchase_groups, cancel_groups, side="right")
+        unmatched = cancel_need.copy()
+        for i in range(len(cancel_need)):
+            lo, hi = group_starts[i], group_ends[i]
+            if lo == hi:
+                continue
+            group_dates = purchase_dates[lo:hi]
+            # purchase date p is eligible if cancel_date - window < p <= cancel_date
+            start = lo + np.searchsorted(group_dates, cancel_dates[i] - window, "right")
+            end = lo + np.searchsorted(group_dates, cancel_dates[i], "right")
+            need = unmatched[i]
+            for j in range(end - 1, start - 1, -1):
+                if need == 0:
+                    break
+                allocated = min(remaining[j], need)
+                remaining[j] -= allocated
+                need -= allocated
+            unmatched[i] = need
+        return unmatched
+
+
+def _to_datetime64(dates: pd.Series) -> np.ndarray:
+    """Return dates as a datetime64[ns] array, parsing them if stored as text."""
+    return parse_dates(dates).to_numpy(dtype="datetime64[ns]")
@@ -0,0 +1,150 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MISSING_GROUP = "<missing>"
+
+
+class CleaningStatsCollector:
+    """
+    Data quality statistics of the DataCleaner filter rules.
+
+    Collected from the rule masks that DataCleaner already builds in fused mode, so
+    no extra pass over the data is needed: each row gets a bit pattern of the rules
+    it fails, and one bincount over (group, pattern) gives the row counts of every
+    rule combination per group (country). All statistics are derived from these
+    counts:
+    - rows removed by each rule on its own (regardless of the other rules)
+    - rows removed only by that rule
+    - number of rules failed per row, and pairwise overlap of rules
+    - rows in, rows kept and rows removed per rule, per country
+
+    Counts are additive, so the collector can be updated batch by batch
+    (DataCleaner.run_batches).
+
+    Example usage:
+    ```python
+        stats_collector = CleaningStatsCollector()
+        df_cleaned = DataCleaner(execution_mode="fused").run(
+            df, countries, stats_collector=stats_collector
+        )
+        stats_collector.write_json(Path("cleaned_data.stats.json"))
+    ```
+    """
+
+    def __init__(self, group_col_name: str = "Country"):
+        """
+        Args:
+            group_col_name: Column to break the statistics down by.
+        """
+        self.group_col_name = group_col_name
+        self.rule_names: Optional[List[str]] = None
+        # group value -> row count per failed-rules bit pattern
+        self._pattern_counts: Dict[str, np.ndarray] = {}
+
+    def update(self, rule_masks: Dict[str, np.ndarray], df: pd.DataFrame) -> None:
+        """
+        Add the rule results of one batch of rows.
+        Args:
+            rule_masks: Keep mask per rule name (True = row passes the rule), in the
+                order the rules are applied.
+            df: DataFrame the masks were computed on.
+        Raises:
+            ValueError: if the rules differ from the ones of earlier batches.
+        """
+        rule_names = list(rule_masks)
+        if self.rule_names is None:
+            self.rule_names = rule_names
+        elif rule_names != self.rule_names:
+            raise ValueError(
+                f"Rules {rule_names} differ from earlier batches: {self.rule_names}"
+            )
+
+        num_patterns = 1 << len(rule_names)
+        failed_rules = np.zeros(len(df), dtype=np.int64)
+        for bit, rule_mask in enumerate(rule_masks.values()):
+            failed_rules |= (~rule_mask).astype(np.int64) << bit
+
+        groups = df[self.group_col_name]
+        if isinstance(groups.dtype, pd.CategoricalDtype):
+            codes = groups.cat.codes.to_numpy().astype(np.int64)
+            group_names = groups.cat.categories.tolist()
+        else:
+            codes, group_names = pd.factorize(groups)
+            group_names = group_names.tolist()
+        # missing group values get the last code
+        codes = np.where(codes < 0, len(group_names), codes)
+        group_names.append(MISSING_GROUP)
+
+        counts = np.bincount(
+            codes * num_patterns + failed_rules,
+            minlength=len(group_names) * num_patterns,
+        ).reshape(len(group_names), num_patterns)
+        for group_name, group_counts in zip(group_names, counts):
+            if not group_counts.any():
+                continue
+            group_name = str(group_name)
+            if group_name in self._pattern_counts:
+                self._pattern_counts[group_name] += group_counts
+            else:
+                self._pattern_counts[group_name] = group_counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the collected counts.
+        Returns:
+            Dictionary with overall, per-rule and per-group statistics.
+        """
+        rule_names = self.rule_names or []
+        num_patterns = 1 << len(rule_names)
+        patterns = np.arange(num_patterns)
+        fails_rule = [(patterns >> bit) & 1 == 1 for bit in range(len(rule_names))]
+        num_failed = sum(fail.astype(np.int64) for fail in fails_rule)
+
+        total = sum(self._pattern_counts.values(), np.zeros(num_patterns, np.int64))
+        rows_in = int(total.sum())
+        return {
+            "rows_in": rows_in,
+            "rows_kept": int(total[0]),
+            "rules": rule_names,
+            "removed_by_rule": {
+                rule: int(total[fails_rule[i]].sum())
+                for i, rule in enumerate(rule_names)
+            },
+            "removed_only_by_rule": {
+                rule: int(total[1 << i]) for i, rule in enumerate(rule_names)
+            },
+            "rows_by_number_of_failed_rules": {
+                str(k): int(total[num_failed == k].sum())
+                for k in range(len(rule_names) + 1)
+            },
+            "rule_overlaps": {
+                f"{rule_a}&{rule_b}": int(total[fails_rule[i] & fails_rule[j]].sum())
+                for i, rule_a in enumerate(rule_names)
+                for j, rule_b in enumerate(rule_names)
+                if i < j
+            },
+            f"by_{self.group_col_name.lower()}": {
+                group_name: {
+                    "rows_in": int(counts.sum()),
+                    "rows_kept": int(counts[0]),
+                    "removed_by_rule": {
+                        rule: int(counts[fails_rule[i]].sum())
+                        for i, rule in enumerate(rule_names)
+                    },
+                }
+                for group_name, counts in sorted(self._pattern_counts.items())
+            },
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Write the statistics as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        logger.info(f"Cleaning statistics saved to {path}")
@@ -1,39 +1,95 @@
 import logging
-from typing import List, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from src.modules.data_processing import arrow_backend
+from src.modules.data_processing.cancellation_matcher import (
+    DEFAULT_MATCH_COLUMNS,
+    CancellationMatcher,
+)
+from src.modules.data_processing.cleaning_stats import CleaningStatsCollector
+from src.modules.data_processing.schema_validation import (
+    validate_arrow_table,
+    validate_dataframe,
+)
+from src.modules.data_processing.schemas import (
+    CLEANING_INPUT_COLUMN_SPECS,
+    CLEANING_OUTPUT_COLUMN_SPECS,
+)
 
 logger = logging.getLogger(__name__)
 
+EXECUTION_MODES = ("sequential", "fused")
+
 
 class DataCleaner:
     """
     Stateless data cleaning for retail transaction data.
 
     Performs data quality operations:
+    - Optionally match cancellations to the purchases they cancel, and remove both
+        (including partial cancellations, see CancellationMatcher)
     - Remove non-positive values in Quantity or UnitPrice
     - Remove non-product StockCodes (alphabetic prefixes)
     - Create Revenue column (Quantity * UnitPrice)
     - Filter to specified countries
 
+    Execution modes:
+    - sequential: each step filters and copies the frame in turn.
+    - fused: the filter rules are combined into one boolean mask, the filtered frame
+        is materialized once and Revenue is added to that result. Same output as
+        sequential mode, with a single copy of the table instead of one per step.
+
+    The rules are row-local, except cancellation matching, so a table that does not
+    fit in memory can be cleaned batch by batch (e.g. per parquet row group) with
+    run_batches.
+
+    run_arrow applies the same rules to a pyarrow Table with Arrow compute kernels
+    (see arrow_backend), without converting the table to pandas.
+
     TODO before production grade:
-    - cancelled transactions can have a counterpart in positive sales, not just remove cancellations.
-        potentially complex matching logic
+    - cancellation matching (CancellationMatcher) is opt-in, as the database already
+        removes exact-quantity cancellations. Open questions:
         - which columns to match on?
-        - partial cancellations?
         - reasons for cancellations? are all cancellations equal?
-    - validation of input data schema
-    - validation of output data schema
 
 
     """
 
-    def __init__(self):
-        """Initialize DataCleaner. Stateless - no configuration needed."""
-        pass
+    def __init__(
+        self,
+        cancellation_window_days: Optional[int] = None,
+        execution_mode: str = "sequential",
+        validation_sample_size: int = 0,
+    ):
+        """
+        Initialize DataCleaner. Stateless - configuration only.
+        Args:
+            cancellation_window_days: If given, match cancellations to earlier purchases
+                within this many days and remove both (the input must come from the
+                raw transactions table, see CancellationMatcher). If None,
+                cancellations are only dropped with the other non-positive quantities.
+            execution_mode: 'sequential' or 'fused' (see class docstring).
+            validation_sample_size: Number of sampled rows on which input and output
+                nullability and value ranges are validated. 0 validates the schema
+                (column names and dtypes) only.
+        """
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"execution_mode must be one of {EXECUTION_MODES}, got '{execution_mode}'"
+            )
+        self.cancellation_window_days = cancellation_window_days
+        self.execution_mode = execution_mode
+        self.validation_sample_size = validation_sample_size
 
     def run(
-        self, df: pd.DataFrame, countries: Optional[List[str]] = None
+        self,
+        df: pd.DataFrame,
+        countries: Optional[List[str]] = None,
+        stats_collector: Optional[CleaningStatsCollector] = None,
     ) -> pd.DataFrame:
         """
         Execute full data cleaning procedure.
@@ -41,19 +97,37 @@ class DataCleaner:
         Args:
             df: Input DataFrame with raw transaction data.
             countries: Optional list of country names to keep. If None, keeps all.
+            stats_collector: Optional collector of per-rule cleaning statistics,
+                updated from the rule masks of the filter pass (fused mode only).
         Returns:
             Cleaned DataFrame.
+        Raises:
+            ValueError: if stats_collector is given in sequential mode.
         """
+        if stats_collector is not None and self.execution_mode != "fused":
+            raise ValueError("Cleaning statistics are only collected in fused mode")
         self._validate_input_dataframe_schema(df)
-        logger.info(f"Starting data cleaning pipeline. Input shape: {df.shape}")
+        logger.info(
+            f"Starting data cleaning pipeline ({self.execution_mode}). "
+            f"Input shape: {df.shape}"
+        )
         initial_rows = len(df)
 
-        df_cleaned = self.remove_non_positive_values(df)
-        df_cleaned = self.remove_articles_with_alphabetic_prefix(df_cleaned)
-        df_cleaned = self.create_revenue_column(df_cleaned)
+        df_cleaned = df
+        if self.cancellation_window_days is not None:
+            df_cleaned = self.remove_cancelled_transactions(df_cleaned)
+
+        if self.execution_mode == "fused":
+            df_cleaned = self.filter_fused(df_cleaned, countries, stats_collector)
+            df_cleaned["Revenue"] = df_cleaned["Quantity"] * df_cleaned["UnitPrice"]
+            logger.info("Created Revenue column")
+        else:
+            df_cleaned = self.remove_non_positive_values(df_cleaned)
+            df_cleaned = self.remove_articles_with_alphabetic_prefix(df_cleaned)
+            df_cleaned = self.create_revenue_column(df_cleaned)
 
-        if countries is not None:
-            df_cleaned = self.keep_countries(df_cleaned, countries)
+            if countries is not None:
+                df_cleaned = self.keep_countries(df_cleaned, countries)
 
         self._validate_output_dataframe_schema(df_cleaned)
 
@@ -68,6 +142,156 @@ class DataCleaner:
 
         return df_cleaned
 
+    def run_arrow(
+        self, table: pa.Table, countries: Optional[List[str]] = None
+    ) -> pa.Table:
+        """
+        Execute full data cleaning procedure with the Arrow compute backend.
+        Same output as run in fused mode.
+
+        Args:
+            table: Input Table with raw transaction data.
+            countries: Optional list of country names to keep. If None, keeps all.
+        Returns:
+            Cleaned Table.
+        Raises:
+            ValueError: if cancellation matching is enabled (pandas backend only).
+        """
+        if self.cancellation_window_days is not None:
+            raise ValueError("Cancellation matching is only available with pandas")
+        logger.info(
+            f"Starting data cleaning pipeline (arrow). "
+            f"Input shape: ({table.num_rows}, {table.num_columns})"
+        )
+        validate_arrow_table(table, CLEANING_INPUT_COLUMN_SPECS, "DataCleaner input")
+        initial_rows = table.num_rows
+        table_cleaned = arrow_backend.clean_table(table, countries=countries)
+        validate_arrow_table(
+            table_cleaned, CLEANING_OUTPUT_COLUMN_SPECS, "DataCleaner output"
+        )
+
+        rows_removed = initial_rows - table_cleaned.num_rows
+        removal_pct = (rows_removed / initial_rows * 100) if initial_rows > 0 else 0
+        logger.info(
+            f"Data cleaning complete. Removed {rows_removed:,} rows ({removal_pct:.1f}%). "
+            f"Final shape: ({table_cleaned.num_rows}, {table_cleaned.num_columns})"
+        )
+        return table_cleaned
+
+    def run_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        countries: Optional[List[str]] = None,
+        stats_collector: Optional[CleaningStatsCollector] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Clean a stream of DataFrames batch by batch, so only one batch is held in
+        memory at a time.
+
+        Args:
+            batches: Iterable of DataFrames with raw transaction data.
+            countries: Optional list of country names to keep. If None, keeps all.
+            stats_collector: Optional collector of per-rule cleaning statistics,
+                accumulated over all batches (fused mode only).
+        Yields:
+            Cleaned DataFrame per input batch.
+        Raises:
+            ValueError: if cancellation matching is enabled, since a cancellation can
+                match a purchase in another batch.
+        """
+        if self.cancellation_window_days is not None:
+            raise ValueError(
+                "Cancellation matching needs the full transaction history and cannot "
+                "be combined with batch-wise cleaning"
+            )
+        for batch in batches:
+            yield self.run(batch, countries=countries, stats_collector=stats_collector)
+
+    def remove_cancelled_transactions(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Remove cancellations together with the purchase quantity they cancel.
+        Business rule: a cancelled purchase did not result in a sale. Purchases are
+        removed when fully cancelled, or reduced when partially cancelled.
+        Matches on the default match columns that were ingested; the ones that are
+        missing (e.g. Description, which the default ingest columns leave out) are
+        dropped from the match keys with a warning.
+
+        Args:
+            df: Input DataFrame, including cancellations (InvoiceNo starting with 'C').
+        Returns:
+            DataFrame without cancellations and cancelled purchase quantity.
+        """
+        match_columns = [
+            col_name for col_name in DEFAULT_MATCH_COLUMNS if col_name in df.columns
+        ]
+        missing_columns = [
+            col_name for col_name in DEFAULT_MATCH_COLUMNS if col_name not in df.columns
+        ]
+        if missing_columns:
+            logger.warning(
+                f"Match columns {missing_columns} not in the data, matching "
+                f"cancellations on {match_columns} only. Ingest them for the same "
+                "match as the SQL cancellation removal"
+            )
+        matcher = CancellationMatcher(
+            window_days=self.cancellation_window_days, match_columns=match_columns
+        )
+        return matcher.run(df)
+
+    def filter_fused(
+        self,
+        df: pd.DataFrame,
+        countries: Optional[List[str]] = None,
+        stats_collector: Optional[CleaningStatsCollector] = None,
+    ) -> pd.DataFrame:
+        """
+        Apply all filter rules in one pass: the rule masks are combined into a single
+        mask, and the filtered frame is materialized once.
+        Removal counts are logged per rule, in the same order as in sequential mode
+        (rows already removed by an earlier rule are not counted again).
+
+        Args:
+            df: Input DataFrame.
+            countries: Optional list of country names to keep. If None, keeps all.
+            stats_collector: Optional collector, updated with the rule masks.
+        Returns:
+            New DataFrame with the rows passing all rules.
+        """
+        rules = [
+            (
+                "non_positive_values",
+                "rows with non-positive Quantity or UnitPrice",
+                self._positive_values_mask(df),
+            ),
+            (
+                "alphabetic_stock_code_prefix",
+                "rows with alphabetic StockCode prefix",
+                self._product_stock_code_mask(df),
+            ),
+        ]
+        if countries:
+            rules.append(
+                (
+                    "country_not_selected",
+                    f"rows not in specified countries: {countries}",
+                    self._countries_mask(df, countries),
+                )
+            )
+        elif countries is not None:
+            logger.info("No countries specified for filtering. Returning all countries")
+
+        keep = np.ones(len(df), dtype=bool)
+        for _, description, rule_mask in rules:
+            removed = int(np.count_nonzero(keep & ~rule_mask))
+            keep &= rule_mask
+            logger.info(f"Removed {removed:,} {description}")
+        if stats_collector is not None:
+            stats_collector.update(
+                {name: rule_mask for name, _, rule_mask in rules}, df
+            )
+        # take() returns a new frame (not a view), so columns can be added to it
+        return df.take(np.flatnonzero(keep))
+
     def remove_non_positive_values(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Remove rows with non-positive Quantity or UnitPrice values.
@@ -79,12 +303,7 @@ class DataCleaner:
             DataFrame with non-positive values removed.
         """
         initial_rows = len(df)
-        df_filtered = df[
-            (df["Quantity"] > 0)
-            & (df["UnitPrice"] > 0)
-            & df["Quantity"].notna()
-            & df["UnitPrice"].notna()
-        ].copy()
+        df_filtered = df[self._positive_values_mask(df)].copy()
         removed = initial_rows - len(df_filtered)
         logger.info(f"Removed {removed:,} rows with non-positive Quantity or UnitPrice")
         return df_filtered
@@ -101,7 +320,7 @@ class DataCleaner:
             DataFrame with non-product StockCodes removed.
         """
         initial_rows = len(df)
-        df_filtered = df[~df["StockCode"].astype(str).str.match(r"^[A-Za-z]")].copy()
+        df_filtered = df[self._product_stock_code_mask(df)].copy()
         removed = initial_rows - len(df_filtered)
         logger.info(f"Removed {removed:,} rows with alphabetic StockCode prefix")
         return df_filtered
@@ -134,15 +353,78 @@ class DataCleaner:
         if not countries:
             logger.info("No countries specified for filtering. Returning all countries")
             return df.copy()
-        df_filtered = df[df["Country"].isin(countries)].copy()
+        df_filtered = df[self._countries_mask(df, countries)].copy()
         removed = initial_rows - len(df_filtered)
         logger.info(f"Removed {removed:,} rows not in specified countries: {countries}")
         return df_filtered
 
+    def _positive_values_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Mask of rows with positive (non-missing) Quantity and UnitPrice."""
+        mask = (
+            (df["Quantity"] > 0)
+            & (df["UnitPrice"] > 0)
+            & df["Quantity"].notna()
+            & df["UnitPrice"].notna()
+        )
+        return mask.to_numpy(dtype=bool)
+
+    def _product_stock_code_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Mask of rows whose StockCode does not start with an alphabetic character."""
+        return ~evaluate_per_distinct_value(
+            df["StockCode"], lambda values: values.astype(str).str.match(r"^[A-Za-z]")
+        )
+
+    def _countries_mask(self, df: pd.DataFrame, countries: List[str]) -> np.ndarray:
+        """Mask of rows in the given countries (exact match)."""
+        return evaluate_per_distinct_value(
+            df["Country"], lambda values: values.isin(countries)
+        )
+
     def _validate_input_dataframe_schema(self, df: pd.DataFrame) -> None:
-        """TODO: schema validation logic."""
-        pass
+        """Validate input columns and dtypes, and a sample of rows if configured."""
+        validate_dataframe(
+            df,
+            CLEANING_INPUT_COLUMN_SPECS,
+            sample_size=self.validation_sample_size,
+            context="DataCleaner input",
+        )
 
     def _validate_output_dataframe_schema(self, df: pd.DataFrame) -> None:
-        """TODO: schema validation logic."""
-        pass
+        """Validate output columns and dtypes, and a sample of rows if configured."""
+        validate_dataframe(
+            df,
+            CLEANING_OUTPUT_COLUMN_SPECS,
+            sample_size=self.validation_sample_size,
+            context="DataCleaner output",
+        )
+
+
+def evaluate_per_distinct_value(
+    series: pd.Series, predicate: Callable[[pd.Series], Any]
+) -> np.ndarray:
+    """
+    Evaluate a predicate once per distinct value of a column, and map the results
+    back to the rows through the integer codes of the values.
+    Meant for string rules on low-cardinality columns (StockCode, Country), where a
+    per-row regex or lookup would repeat the same work for every row.
+    Categorical columns use their categories and codes directly, other columns are
+    factorized first. Missing values are evaluated as NaN.
+
+    Args:
+        series: Column to evaluate.
+        predicate: Function taking a Series of values, returning a boolean array-like
+            of the same length.
+    Returns:
+        Boolean array with the predicate result per row.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        distinct_values = series.cat.categories
+    else:
+        codes, distinct_values = pd.factorize(series)
+    # missing values have code -1, which indexes the NaN appended at the end
+    distinct_values = pd.Series(
+        np.append(np.asarray(distinct_values, dtype=object), np.nan)
+    )
+    results = np.asarray(predicate(distinct_values), dtype=bool)
+    return results[codes]
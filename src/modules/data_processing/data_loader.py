@@ -1,35 +1,475 @@
 import sqlite3
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.modules.data_processing.schemas import DAY_COLUMNS, TRANSACTIONS_ARROW_SCHEMA
+from src.modules.sqlite_connection import (
+    DEFAULT_CACHE_SIZE_KIB,
+    DEFAULT_MMAP_SIZE,
+    get_connection,
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_ARROW_BATCH_SIZE = 100_000
+
 
 class DataLoader:
     """
     Class for loading data in a SQLite database.
+
+    Loading modes:
+    - full load: whole table into a single DataFrame (load_table_to_df)
+    - streaming: fixed-size chunks of the table (iter_table_chunks), so peak memory
+        is bounded by the chunk size and not by the table size.
+    - arrow: typed Arrow columns built straight from the SQLite cursor
+        (load_table_to_arrow / iter_table_batches), using an explicit schema instead
+        of pandas dtype inference.
+    - incremental: only rows past a high-water mark on a monotonically increasing
+        column (rowid or InvoiceDate). See get_high_watermark and the watermark
+        arguments of iter_table_batches.
+    - parallel: the table is split into rowid or InvoiceDate ranges, and each range is
+        read over its own read-only connection in a process pool (load_table_parallel).
+
+    Row filters (countries, date range) given at initialization are pushed down into
+    the SQL query of every loading mode, so rows that the pipeline would discard later
+    never leave the database. Columns are projected through the Arrow schema
+    (see schemas.select_schema_columns). Day columns in the schema (schemas.DAY_COLUMNS)
+    are not read from the table but derived from their timestamp column.
+
+    All reads go over read-only connections from sqlite_connection.get_connection,
+    which are memory-mapped and reused across calls within a process.
     """
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        countries: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        country_column: str = "Country",
+        date_column: str = "InvoiceDate",
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+    ):
+        """
+        Args:
+            db_path: Path to the SQLite database file.
+            countries: Optional list of countries to keep. If None, keeps all.
+            start_date: Optional ISO date(time); keep rows with date_column >= start_date.
+            end_date: Optional ISO date(time); keep rows with date_column < end_date.
+            country_column: Name of the country column used by the country filter.
+            date_column: Name of the date column used by the date range filter.
+            mmap_size: Max bytes of the database file to memory-map per connection.
+            cache_size_kib: SQLite page cache size per connection, in KiB.
+        """
         self.db_path = db_path
+        self.countries = countries
+        self.start_date = start_date
+        self.end_date = end_date
+        self.country_column = country_column
+        self.date_column = date_column
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the (reused) read-only connection to the database."""
+        return get_connection(
+            self.db_path,
+            read_only=True,
+            mmap_size=self.mmap_size,
+            cache_size_kib=self.cache_size_kib,
+        )
 
     def load_table_to_df(
         self,
         table_name: str,
     ) -> pd.DataFrame:
         """
-        Load data for specified countries into a pandas DataFrame.
+        Load data for the configured countries and date range into a pandas DataFrame.
         Args:
             table_name: Name of the table to load.
-            countries: List of countries to filter the data.
         Returns:
             DataFrame containing the table data.
         """
-        with sqlite3.connect(self.db_path) as conn:
-            query = f"""
-                SELECT * FROM {table_name}
-            """
-            df = pd.read_sql_query(query, conn)
+        query, params = self._build_select_query(table_name=table_name)
+        df = pd.read_sql_query(query, self._connect(), params=params)
         logger.info(f"Loaded {len(df):,} rows from table '{table_name}'")
         return df
+
+    def iter_table_chunks(
+        self,
+        table_name: str,
+        chunksize: int,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a table from the database in chunks of fixed size.
+        Only one chunk is held in memory at a time, so the caller should write
+        each chunk out (e.g. as a parquet row group) before requesting the next.
+
+        Args:
+            table_name: Name of the table to load.
+            chunksize: Number of rows per chunk.
+        Yields:
+            DataFrames with at most `chunksize` rows each.
+        Raises:
+            ValueError: if chunksize is not a positive integer.
+        """
+        if chunksize <= 0:
+            raise ValueError("chunksize must be positive integer")
+
+        total_rows = 0
+        query, params = self._build_select_query(table_name=table_name)
+        for chunk in pd.read_sql_query(
+            query, self._connect(), params=params, chunksize=chunksize
+        ):
+            total_rows += len(chunk)
+            yield chunk
+        logger.info(f"Streamed {total_rows:,} rows from table '{table_name}'")
+
+    def load_table_to_arrow(
+        self,
+        table_name: str,
+        schema: pa.Schema = TRANSACTIONS_ARROW_SCHEMA,
+        batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+    ) -> pa.Table:
+        """
+        Load a table into a typed Arrow table.
+        Args:
+            table_name: Name of the table to load.
+            schema: Arrow schema of the columns to load. Columns are selected by name.
+            batch_size: Number of rows fetched from the cursor per batch.
+        Returns:
+            Arrow table with the given schema.
+        """
+        batches = list(
+            self.iter_table_batches(
+                table_name=table_name,
+                batch_size=batch_size,
+                schema=schema,
+            )
+        )
+        table = pa.Table.from_batches(batches, schema=schema)
+        logger.info(f"Loaded {table.num_rows:,} rows from table '{table_name}'")
+        return table
+
+    def iter_table_batches(
+        self,
+        table_name: str,
+        batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+        schema: pa.Schema = TRANSACTIONS_ARROW_SCHEMA,
+        watermark_column: Optional[str] = None,
+        low_watermark: Optional[Any] = None,
+        high_watermark: Optional[Any] = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Stream a table from the database as typed Arrow record batches.
+        Rows are fetched from the cursor in batches and converted column-wise
+        to the types declared in `schema`, so no pandas objects are created.
+
+        Args:
+            table_name: Name of the table to load.
+            batch_size: Number of rows per record batch.
+            schema: Arrow schema of the columns to load. Columns are selected by name.
+            watermark_column: Optional column to bound the rows by, e.g. 'rowid'.
+            low_watermark: Only load rows with watermark_column > low_watermark.
+            high_watermark: Only load rows with watermark_column <= high_watermark.
+        Yields:
+            Record batches with at most `batch_size` rows each.
+        Raises:
+            ValueError: if batch_size is not a positive integer, or watermarks are
+                given without a watermark column.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive integer")
+
+        query, params = self._build_select_query(
+            table_name=table_name,
+            columns=_table_columns(schema),
+            watermark_column=watermark_column,
+            low_watermark=low_watermark,
+            high_watermark=high_watermark,
+        )
+        yield from _fetch_record_batches(
+            self._connect(), query, params, schema, batch_size
+        )
+
+    def load_table_parallel(
+        self,
+        table_name: str,
+        num_workers: int,
+        schema: pa.Schema = TRANSACTIONS_ARROW_SCHEMA,
+        partition_column: str = "rowid",
+        num_partitions: Optional[int] = None,
+        batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+    ) -> pa.Table:
+        """
+        Load a table into a typed Arrow table with parallel range-partitioned reads.
+        The value range of `partition_column` is split into equal-width ranges, and each
+        range is read over its own read-only connection in a separate process.
+        Fragments are concatenated in range order.
+
+        Args:
+            table_name: Name of the table to load.
+            num_workers: Number of worker processes.
+            schema: Arrow schema of the columns to load. Columns are selected by name.
+            partition_column: 'rowid' (integer ranges) or a date column (time ranges).
+            num_partitions: Number of ranges. Defaults to 4 x num_workers, so a slow
+                range does not leave the other workers idle.
+            batch_size: Number of rows fetched from the cursor per batch.
+        Returns:
+            Arrow table with the given schema.
+        Raises:
+            ValueError: if num_workers or num_partitions is not a positive integer.
+        """
+        if num_workers <= 0:
+            raise ValueError("num_workers must be positive integer")
+        num_partitions = num_partitions or 4 * num_workers
+        if num_partitions <= 0:
+            raise ValueError("num_partitions must be positive integer")
+
+        bounds = self._compute_partition_bounds(
+            table_name=table_name,
+            partition_column=partition_column,
+            num_partitions=num_partitions,
+        )
+        queries = [
+            self._build_select_query(
+                table_name=table_name,
+                columns=_table_columns(schema),
+                watermark_column=partition_column,
+                low_watermark=low,
+                high_watermark=high,
+            )
+            for low, high in bounds
+        ]
+        logger.info(
+            f"Reading table '{table_name}' in {len(queries)} '{partition_column}' "
+            f"ranges with {num_workers} workers..."
+        )
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            fragments = list(
+                executor.map(
+                    _read_partition,
+                    [self.db_path] * len(queries),
+                    [query for query, _ in queries],
+                    [params for _, params in queries],
+                    [schema] * len(queries),
+                    [batch_size] * len(queries),
+                    [self.mmap_size] * len(queries),
+                    [self.cache_size_kib] * len(queries),
+                )
+            )
+        table = pa.concat_tables(fragments) if fragments else schema.empty_table()
+        logger.info(f"Loaded {table.num_rows:,} rows from table '{table_name}'")
+        return table
+
+    def _compute_partition_bounds(
+        self,
+        table_name: str,
+        partition_column: str,
+        num_partitions: int,
+    ) -> List[Tuple[Optional[Any], Any]]:
+        """
+        Split the value range of a column into equal-width (low, high] ranges.
+        The first range has no lower bound, and the last range ends at the current
+        maximum, so together the ranges cover every row present when called.
+
+        Args:
+            table_name: Name of the table.
+            partition_column: 'rowid' or an ISO-8601 text date column.
+            num_partitions: Number of ranges.
+        Returns:
+            List of (exclusive low, inclusive high) bounds. Empty if the table is empty.
+        """
+        min_value, max_value = (
+            self._connect()
+            .execute(
+                f"SELECT MIN({partition_column}), MAX({partition_column}) FROM {table_name}"
+            )
+            .fetchone()
+        )
+        if max_value is None:
+            return []
+
+        if partition_column.lower() == "rowid":
+            edges = np.linspace(min_value - 1, max_value, num_partitions + 1)[1:]
+            edges = np.unique(np.round(edges).astype(np.int64)).tolist()
+        else:
+            edges = pd.date_range(
+                start=pd.Timestamp(min_value),
+                end=pd.Timestamp(max_value),
+                periods=num_partitions + 1,
+            )[1:]
+            edges = edges.strftime("%Y-%m-%d %H:%M:%S").drop_duplicates().tolist()
+            edges[-1] = max_value  # compare against the exact stored maximum
+
+        lows = [None] + edges[:-1]
+        return list(zip(lows, edges))
+
+    def get_high_watermark(self, table_name: str, watermark_column: str) -> Any:
+        """
+        Get the current high-water mark (maximum value) of a column.
+        Reading up to this value, rather than to the end of the table, gives the
+        incremental load a fixed upper bound even if rows are appended meanwhile.
+
+        Args:
+            table_name: Name of the table.
+            watermark_column: Monotonically increasing column, e.g. 'rowid' or 'InvoiceDate'.
+        Returns:
+            Maximum value of the column, or None if the table is empty.
+        """
+        cursor = self._connect().execute(
+            f"SELECT MAX({watermark_column}) FROM {table_name}"
+        )
+        high_watermark = cursor.fetchone()[0]
+        logger.info(
+            f"High-water mark of '{watermark_column}' in table '{table_name}': "
+            f"{high_watermark}"
+        )
+        return high_watermark
+
+    def _build_select_query(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        watermark_column: Optional[str] = None,
+        low_watermark: Optional[Any] = None,
+        high_watermark: Optional[Any] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build a parameterized SELECT query for the given columns and row bounds,
+        including the country and date range filters of this loader.
+        Args:
+            table_name: Name of the table to load.
+            columns: Columns to select. If None, selects all columns.
+            watermark_column: Optional column to bound the rows by.
+            low_watermark: Exclusive lower bound on watermark_column.
+            high_watermark: Inclusive upper bound on watermark_column.
+        Returns:
+            Tuple of (query, parameters)
+        """
+        if watermark_column is None and (
+            low_watermark is not None or high_watermark is not None
+        ):
+            raise ValueError("watermark_column is required when watermarks are given")
+
+        conditions = []
+        params = []
+        if self.countries:
+            placeholders = ", ".join("?" for _ in self.countries)
+            conditions.append(f'"{self.country_column}" IN ({placeholders})')
+            params.extend(self.countries)
+        if self.start_date is not None:
+            conditions.append(f'"{self.date_column}" >= ?')
+            params.append(self.start_date)
+        if self.end_date is not None:
+            conditions.append(f'"{self.date_column}" < ?')
+            params.append(self.end_date)
+        if low_watermark is not None:
+            conditions.append(f"{watermark_column} > ?")
+            params.append(low_watermark)
+        if high_watermark is not None:
+            conditions.append(f"{watermark_column} <= ?")
+            params.append(high_watermark)
+
+        if columns is None:
+            select_columns = "*"
+        else:
+            select_columns = ", ".join(f'"{name}"' for name in columns)
+        query = f"SELECT {select_columns} FROM {table_name}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        logger.debug(f"Select query: {query} (params: {params})")
+        return query, params
+
+
+def rows_to_record_batch(rows: List[Tuple], schema: pa.Schema) -> pa.RecordBatch:
+    """
+    Convert a list of row tuples from a SQLite cursor into a typed record batch.
+    Each column is handed to Arrow as one sequence and cast to the schema type,
+    e.g. REAL CustomerID values to integers, text to dictionary-encoded strings and
+    ISO-8601 text dates to timestamps (Arrow's vectorized ISO-8601 cast).
+    Day columns are derived from their timestamp column by flooring to the day.
+
+    Args:
+        rows: Rows as returned by cursor.fetchmany(), in the column order of
+            _table_columns(schema).
+        schema: Target Arrow schema.
+    Returns:
+        Record batch with the given schema.
+    """
+    table_columns = _table_columns(schema)
+    arrays = {
+        name: _to_arrow_array(values, schema.field(name).type)
+        for name, values in zip(table_columns, zip(*rows))
+    }
+    for day_column, source_column in DAY_COLUMNS.items():
+        if day_column in schema.names:
+            arrays[day_column] = pc.floor_temporal(
+                arrays[source_column], unit="day"
+            ).cast(schema.field(day_column).type)
+    return pa.RecordBatch.from_arrays(
+        [arrays[name] for name in schema.names], schema=schema
+    )
+
+
+def _table_columns(schema: pa.Schema) -> List[str]:
+    """Columns of a schema that are read from the table (all but day columns)."""
+    return [name for name in schema.names if name not in DAY_COLUMNS]
+
+
+def _to_arrow_array(values: Sequence, arrow_type: pa.DataType) -> pa.Array:
+    """Build an Arrow array from Python values, casting to the target type."""
+    if pa.types.is_string(arrow_type):
+        return pa.array(values, type=arrow_type)
+    if pa.types.is_dictionary(arrow_type):
+        array = pa.array(values, type=arrow_type.value_type).dictionary_encode()
+        return array.cast(arrow_type)
+    array = pa.array(values)
+    if array.type != arrow_type:
+        array = array.cast(arrow_type)
+    return array
+
+
+def _fetch_record_batches(
+    conn: sqlite3.Connection,
+    query: str,
+    params: List[Any],
+    schema: pa.Schema,
+    batch_size: int,
+) -> Iterator[pa.RecordBatch]:
+    """Execute a query and convert the result to record batches of `batch_size` rows."""
+    cursor = conn.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows_to_record_batch(rows, schema)
+
+
+def _read_partition(
+    db_path: str,
+    query: str,
+    params: List[Any],
+    schema: pa.Schema,
+    batch_size: int,
+    mmap_size: int = DEFAULT_MMAP_SIZE,
+    cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+) -> pa.Table:
+    """
+    Read one range of a table into an Arrow table, over a read-only connection.
+    Module-level so it can be pickled to worker processes. Each worker process keeps
+    its connection open across the ranges it reads.
+    """
+    conn = get_connection(
+        db_path, read_only=True, mmap_size=mmap_size, cache_size_kib=cache_size_kib
+    )
+    batches = list(_fetch_record_batches(conn, query, params, schema, batch_size))
+    return pa.Table.from_batches(batches, schema=schema)
@@ -1,10 +1,16 @@
 import logging
-from typing import Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from src.modules.data_processing.schemas import parse_dates
+
 logger = logging.getLogger(__name__)
 
+FOLD_WINDOWS = ["expanding", "sliding"]
+FOLD_SEGMENTS = ["train", "validation", "test"]
+
 
 class DataSplitter:
     """
@@ -13,10 +19,16 @@ class DataSplitter:
     Features will be generated into past- and future covariates later.
 
     Performs data splitting operations:
-    - convert date column to datetime
+    - convert date column to day-level datetime (precomputed day column if available)
     - split in features and target
     - train and test split (validation splits are rolling windows in train set)
+    - rolling-origin folds for backtesting (generate_folds), as date boundaries only
 
+    The frame is sorted by date once (skipped if it already is), after which targets,
+    features and the train/test split are column selections and row slices of that
+    frame. With pandas copy-on-write (always on from pandas 3.0; split_data enables it
+    on pandas 2.x) these share the sorted frame's data. Without copy-on-write the
+    column selections are copies.
 
     Example usage:
     ```python
@@ -34,6 +46,8 @@ class DataSplitter:
         date_column: str,
         target_column: str,
         days_in_test_split: int,
+        feature_columns: Optional[List[str]] = None,
+        day_column: Optional[str] = None,
     ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
         Execute full data splitting procedure.
@@ -43,14 +57,18 @@ class DataSplitter:
             date_column: name of date column
             target_column: name of target column
             days_in_test_split: number of calendar days to include in test set
+            feature_columns: Optional columns to keep in the features (the ones used
+                by feature engineering). If None, keeps all columns.
+            day_column: Optional name of the precomputed day-level date column
+                (e.g. InvoiceDay, written at ingest).
         Returns:
             Tuple of (train_targets, test_targets, features)
         """
         logger.info(f"Starting data splitting component. Input shape: {df.shape}")
 
-        df = self.convert_date_column_to_datetime(df, date_column)
+        df = self.convert_date_column_to_datetime(df, date_column, day_column)
         df_targets, df_features_raw = self.split_targets_and_features(
-            df, target_column, date_column
+            df, target_column, date_column, feature_columns
         )
         train_targets, test_targets = self.split_train_test(
             target_df=df_targets,
@@ -69,25 +87,49 @@ class DataSplitter:
         self,
         df: pd.DataFrame,
         date_column: str,
+        day_column: Optional[str] = None,
     ) -> pd.DataFrame:
         """
-        convert date column to datetime format
+        convert date column to day-level datetime, and sort rows by date.
+        The rows are only reordered (one copy) if they are not already sorted. The
+        input DataFrame is not modified.
+        If day_column is in the DataFrame, its values replace the date column and it
+        is dropped. Otherwise the date column is normalized to midnight, after parsing
+        it if stored as text (schemas.parse_dates).
 
         Args:
             df: Input DataFrame.
             date_column: name of date column
+            day_column: Optional name of the precomputed day-level date column
         Returns:
-            DataFrame with date column converted to datetime
+            DataFrame sorted by date, with date column converted to datetime
         """
         if date_column not in df.columns:
             raise ValueError(f"Date column '{date_column}' not found in DataFrame")
-        df = df.sort_values(by=date_column).copy()
-        df[date_column] = pd.to_datetime(df[date_column])
-        df[date_column] = df[date_column].dt.normalize()  # set time to 00:00:00
+        dates = parse_dates(df[date_column])
+        if not dates.is_monotonic_increasing:
+            order = np.argsort(dates.to_numpy(), kind="stable")
+            df = df.take(order)
+            dates = dates.take(order)
+            logger.info("Sorted rows by date")
+        df = df.copy(deep=False)
+        if day_column is not None and day_column in df.columns:
+            df[date_column] = df.pop(day_column)
+        else:
+            if day_column is not None:
+                logger.warning(
+                    f"Day column '{day_column}' not found in DataFrame. "
+                    f"Normalizing '{date_column}' instead"
+                )
+            df[date_column] = dates.dt.normalize()  # set time to 00:00:00
         return df
 
     def split_targets_and_features(
-        self, df: pd.DataFrame, target_column: str, date_column: str
+        self,
+        df: pd.DataFrame,
+        target_column: str,
+        date_column: str,
+        feature_columns: Optional[List[str]] = None,
     ) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Split dataframe into targets and features
@@ -96,6 +138,8 @@ class DataSplitter:
             df: Input DataFrame.
             target_column: name of target column
             date_column: name of date column
+            feature_columns: Optional columns to keep in the features. If None,
+                keeps all columns.
         Returns:
             Tuple of (targets DataFrame, features DataFrame)
         Raises:
@@ -106,8 +150,14 @@ class DataSplitter:
                 f"Target column '{target_column}' or date column '{date_column}' "
                 "not found in DataFrame"
             )
-        df_targets = df[[date_column, target_column]].copy()
-        df_features = df.copy()
+        df_targets = df[[date_column, target_column]]
+        if feature_columns:
+            missing = [col for col in feature_columns if col not in df.columns]
+            if missing:
+                raise ValueError(f"Feature columns {missing} not found in DataFrame")
+            df_features = df[feature_columns]
+        else:
+            df_features = df
         logger.info(
             f"Split data into features (shape: {df_features.shape}) and "
             f"targets (shape: {df_targets.shape})"
@@ -123,6 +173,8 @@ class DataSplitter:
             - Zero-activity days are not yet imputed.
             - Split is done by calendar date, and not by number of rows.
             - Test split uses last N calendar days from max date.
+        If target_df is sorted by date (as after convert_date_column_to_datetime), the
+        split is a binary search and two row slices; otherwise a boolean mask.
         Args:
             target_df: targets DataFrame.
             date_column: name of date column
@@ -133,10 +185,136 @@ class DataSplitter:
         if days_in_test_split <= 0:
             raise ValueError("days_in_test_split must be positive integer")
 
-        max_date = target_df[date_column].max()
-        split_date = max_date - pd.Timedelta(days=days_in_test_split)
-        train_targets = target_df[target_df[date_column] <= split_date].copy()
-        test_targets = target_df[target_df[date_column] > split_date].copy()
+        dates = target_df[date_column]
+        if len(dates) > 0 and dates.is_monotonic_increasing:
+            split_date = dates.iloc[-1] - pd.Timedelta(days=days_in_test_split)
+            split_index = dates.searchsorted(split_date, side="right")
+            train_targets = target_df.iloc[:split_index]
+            test_targets = target_df.iloc[split_index:]
+        else:
+            split_date = dates.max() - pd.Timedelta(days=days_in_test_split)
+            train_targets = target_df[dates <= split_date]
+            test_targets = target_df[dates > split_date]
         logger.info(f"Splitting Test set after date: {split_date.date()}. ")
 
         return train_targets, test_targets
+
+    def generate_folds(
+        self,
+        dates: pd.Series,
+        num_folds: int,
+        validation_days: int,
+        test_days: int = 0,
+        step_days: Optional[int] = None,
+        window: str = "expanding",
+        train_days: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate rolling-origin folds over the calendar days of a date column.
+        Folds are descriptors with inclusive day boundaries per segment, no data is
+        copied. Consumers select the rows of a fold with select_fold_rows.
+
+        Business logic:
+            - Each fold is [train][validation][test], consecutive calendar days.
+            - The test segment of the last fold ends on the max date. Each earlier fold
+                is shifted step_days back.
+            - expanding window: train starts on the min date in every fold.
+            - sliding window: train is the train_days days before validation.
+        Args:
+            dates: Day-level dates (e.g. the date column after
+                convert_date_column_to_datetime).
+            num_folds: Number of folds.
+            validation_days: Number of calendar days in each validation segment.
+            test_days: Number of calendar days in each test segment. 0 = no test
+                segment.
+            step_days: Days between consecutive fold origins. Defaults to test_days,
+                or validation_days if there is no test segment.
+            window: 'expanding' or 'sliding'.
+            train_days: Number of calendar days in each train segment. Required for
+                sliding window.
+        Yields:
+            Fold dictionaries, oldest fold first: {"fold": i, "train_start": ...,
+            "train_end": ..., "validation_start": ..., ...} with ISO dates. Test
+            boundaries are None if test_days is 0.
+        Raises:
+            ValueError: if the parameters are invalid, or the first fold starts
+                before the min date.
+        """
+        if num_folds <= 0 or validation_days <= 0:
+            raise ValueError("num_folds and validation_days must be positive integers")
+        if test_days < 0:
+            raise ValueError("test_days must be non-negative integer")
+        if window not in FOLD_WINDOWS:
+            raise ValueError(f"window must be one of {FOLD_WINDOWS}, got '{window}'")
+        if window == "sliding" and (train_days is None or train_days <= 0):
+            raise ValueError("sliding window requires positive integer train_days")
+        step_days = step_days or test_days or validation_days
+        if step_days <= 0:
+            raise ValueError("step_days must be positive integer")
+
+        if len(dates) > 0 and dates.is_monotonic_increasing:
+            min_date, max_date = dates.iloc[0], dates.iloc[-1]
+        else:
+            min_date, max_date = dates.min(), dates.max()
+        min_date, max_date = min_date.normalize(), max_date.normalize()
+        day = pd.Timedelta(days=1)
+
+        for fold in range(num_folds):
+            segment_end = max_date - (num_folds - 1 - fold) * step_days * day
+            test_start = segment_end - (test_days - 1) * day
+            validation_end = test_start - day if test_days else segment_end
+            validation_start = validation_end - (validation_days - 1) * day
+            train_end = validation_start - day
+            if window == "sliding":
+                train_start = train_end - (train_days - 1) * day
+            else:
+                train_start = min_date
+            if train_start < min_date or train_end < train_start:
+                raise ValueError(
+                    f"Fold {fold} does not fit in the data ({min_date.date()} to "
+                    f"{max_date.date()}): reduce num_folds, step_days or segment days"
+                )
+            yield {
+                "fold": fold,
+                "train_start": train_start.date().isoformat(),
+                "train_end": train_end.date().isoformat(),
+                "validation_start": validation_start.date().isoformat(),
+                "validation_end": validation_end.date().isoformat(),
+                "test_start": test_start.date().isoformat() if test_days else None,
+                "test_end": segment_end.date().isoformat() if test_days else None,
+            }
+
+
+def select_fold_rows(
+    df: pd.DataFrame,
+    date_column: str,
+    fold: Dict[str, Any],
+    first_segment: str = "train",
+    last_segment: str = "validation",
+) -> pd.DataFrame:
+    """
+    Select the rows of a date-sorted DataFrame from the start of one fold segment to
+    the end of another, e.g. train through validation for a backtest. The rows are
+    found by binary search and returned as a row slice (no copy).
+    Args:
+        df: DataFrame sorted by date_column.
+        date_column: name of date column
+        fold: Fold dictionary from DataSplitter.generate_folds.
+        first_segment: Segment whose start is the first date selected.
+        last_segment: Segment whose end is the last date selected (inclusive).
+    Returns:
+        Row slice of df.
+    Raises:
+        ValueError: if a segment is unknown or not in the fold, or df is not sorted.
+    """
+    for segment in (first_segment, last_segment):
+        if segment not in FOLD_SEGMENTS or fold.get(f"{segment}_start") is None:
+            raise ValueError(f"Segment '{segment}' not in fold {fold['fold']}")
+    dates = df[date_column]
+    if not dates.is_monotonic_increasing:
+        raise ValueError(f"DataFrame must be sorted by '{date_column}'")
+    start = dates.searchsorted(pd.Timestamp(fold[f"{first_segment}_start"]), "left")
+    end = dates.searchsorted(
+        pd.Timestamp(fold[f"{last_segment}_end"]) + pd.Timedelta(days=1), "left"
+    )
+    return df.iloc[start:end]
@@ -1,11 +1,27 @@
 import logging
-from typing import Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-import holidays
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from src.modules.data_processing import arrow_backend, numpy_backend
+from src.modules.data_processing.feature_state import DailyFeatureState
+from src.modules.data_processing.holiday_calendar import (
+    DEFAULT_COUNTRIES,
+    build_calendar,
+)
+from src.modules.data_processing.hyperloglog import DEFAULT_PRECISION, DailyHyperLogLog
 
 logger = logging.getLogger(__name__)
 
+COUNT_DISTINCT_METHODS = ("packed", "pandas", "hll")
+# Covariates approximated in 'hll' mode
+HLL_COVARIATES = ("num_unique_customers", "num_unique_articles")
+# Days of future covariates after the last date, for lags_future_covariates
+FUTURE_COVARIATES_BUFFER_DAYS = 30
+
 
 class FeatureEngineer:
     """
@@ -23,7 +39,15 @@ class FeatureEngineer:
         - number of unique customers per day
         - number of unique articles sold per day
     Future covariates:
-        - holiday indicator (is_holiday)
+        - holiday indicator (is_holiday), per holiday country if more than one
+        - optional calendar flags (see holiday_calendar.CALENDAR_FLAGS)
+
+    run_arrow computes the same features from pyarrow Tables with Arrow compute
+    kernels (see arrow_backend); only the daily aggregates are converted to pandas.
+    run_numpy computes the same features from pandas DataFrames in one pass over
+    factorized day codes, without groupbys or merges (see numpy_backend).
+    run_incremental keeps a persisted daily aggregate state (see feature_state) and
+    only recomputes the days from a refresh start date on.
 
 
     TODO before production grade:
@@ -47,7 +71,51 @@ class FeatureEngineer:
         customer_id_col_name: str,
         article_id_col_name: str,
         revenue_col_name: str,
+        count_distinct: str = "packed",
+        hll_precision: int = DEFAULT_PRECISION,
+        holiday_countries: Optional[List[str]] = None,
+        calendar_flags: Optional[List[str]] = None,
+        calendar_cache_dir: Optional[Path] = None,
     ):
+        """
+        Args:
+            target_col_name: Name of the target column.
+            date_col_name: Name of the day-level date column.
+            transaction_id_col_name: Name of the transaction id column.
+            customer_id_col_name: Name of the customer id column.
+            article_id_col_name: Name of the article id column.
+            revenue_col_name: Name of the revenue column.
+            count_distinct: Distinct counting of the business indicators:
+                - 'packed': integer codes of (day, key) pairs packed into int64 and
+                    deduplicated (numpy_backend.count_distinct_per_day). Same result
+                    as pandas, several times faster.
+                - 'pandas': groupby nunique.
+                - 'hll': num_transactions as 'packed'; num_unique_customers and
+                    num_unique_articles approximated from one HyperLogLog sketch
+                    per day (see hyperloglog). The sketches are kept in
+                    daily_sketches, so they can be saved and merged later.
+            hll_precision: Precision of the HyperLogLog sketches (2**precision
+                registers per day; relative error about 1.04 / sqrt(2**precision)).
+            holiday_countries: Countries whose holidays count for is_holiday.
+                Defaults to UK.
+            calendar_flags: Extra future covariates from
+                holiday_calendar.CALENDAR_FLAGS, e.g. 'is_weekend'.
+            calendar_cache_dir: Optional directory to cache holiday dates in.
+        """
+        if count_distinct not in COUNT_DISTINCT_METHODS:
+            raise ValueError(
+                f"count_distinct must be one of {COUNT_DISTINCT_METHODS}, "
+                f"got '{count_distinct}'"
+            )
+        self.count_distinct = count_distinct
+        self.hll_precision = hll_precision
+        self.holiday_countries = list(holiday_countries or DEFAULT_COUNTRIES)
+        self.calendar_flags = list(calendar_flags or [])
+        self.calendar_cache_dir = calendar_cache_dir
+        # HyperLogLog sketches per covariate, filled in 'hll' mode
+        self.daily_sketches: Dict[str, DailyHyperLogLog] = {}
+        # daily aggregate state, filled by run_incremental
+        self.state: Optional[DailyFeatureState] = None
         self.target_col_name = target_col_name
         self.date_col_name = date_col_name
         self.transaction_id_col_name = transaction_id_col_name
@@ -87,6 +155,286 @@ class FeatureEngineer:
         )
         return agg_train, agg_test, past_covariates, future_covariates
 
+    def run_arrow(
+        self,
+        target_train: pa.Table,
+        target_test: pa.Table,
+        features_raw: pa.Table,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Execute full data engineering procedure with the Arrow compute backend.
+        Distinct counts are always exact (count_distinct='hll' is not supported).
+
+        Args:
+            target_train: Table with training target data.
+            target_test: Table with testing target data.
+            features_raw: Table with raw features data.
+        Returns:
+            Tuple of (engineered_train_targets, engineered_test_targets, past_covariates, future_covariates)
+        Raises:
+            ValueError: if count_distinct is 'hll'.
+        """
+        if self.count_distinct == "hll":
+            raise ValueError(
+                "count_distinct='hll' is not supported by the Arrow backend, "
+                "use the pandas or numpy backend"
+            )
+        agg_train, agg_test = [
+            arrow_backend.aggregate_daily_sum(
+                table, self.date_col_name, self.target_col_name
+            ).to_pandas()
+            for table in (target_train, target_test)
+        ]
+        past_covariates = arrow_backend.compute_past_covariates(
+            features_raw=features_raw,
+            date_col_name=self.date_col_name,
+            target_col_name=self.target_col_name,
+            transaction_id_col_name=self.transaction_id_col_name,
+            customer_id_col_name=self.customer_id_col_name,
+            article_id_col_name=self.article_id_col_name,
+            revenue_col_name=self.revenue_col_name,
+        ).to_pandas()
+        min_date, max_date = arrow_backend.min_max(features_raw, self.date_col_name)
+        future_covariates = self._build_future_covariates(
+            pd.Timestamp(min_date), pd.Timestamp(max_date)
+        )
+        return agg_train, agg_test, past_covariates, future_covariates
+
+    def run_numpy(
+        self,
+        target_train: pd.DataFrame,
+        target_test: pd.DataFrame,
+        features_raw: pd.DataFrame,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Execute full data engineering procedure with the single-pass numpy engine.
+        With count_distinct='hll', unique customers/articles are approximated as in
+        run; the other methods give the same exact counts.
+
+        Args:
+            target_train: DataFrame with training target data.
+            target_test: DataFrame with testing target data.
+            features_raw: DataFrame with raw features data.
+        Returns:
+            Tuple of (engineered_train_targets, engineered_test_targets, past_covariates, future_covariates)
+        """
+        agg_train, agg_test = [
+            numpy_backend.aggregate_daily_sum(
+                df, self.date_col_name, self.target_col_name
+            )
+            for df in (target_train, target_test)
+        ]
+        past_covariates = numpy_backend.compute_past_covariates(
+            features_raw=features_raw,
+            date_col_name=self.date_col_name,
+            target_col_name=self.target_col_name,
+            transaction_id_col_name=self.transaction_id_col_name,
+            customer_id_col_name=self.customer_id_col_name,
+            article_id_col_name=self.article_id_col_name,
+            revenue_col_name=self.revenue_col_name,
+        )
+        if self.count_distinct == "hll":
+            self.daily_sketches = {}
+            estimates = self._estimate_unique_counts(features_raw)
+            for name in HLL_COVARIATES:
+                past_covariates[name] = estimates[name].to_numpy()
+        future_covariates = self.compute_future_covariates(df=features_raw)
+        return agg_train, agg_test, past_covariates, future_covariates
+
+    def state_params(self) -> Dict[str, Any]:
+        """
+        Parameters the daily aggregate state depends on. A persisted state is only
+        reused with the same parameters.
+        """
+        return {
+            "target_column": self.target_col_name,
+            "date_column": self.date_col_name,
+            "transaction_id_column": self.transaction_id_col_name,
+            "customer_id_column": self.customer_id_col_name,
+            "article_id_column": self.article_id_col_name,
+            "revenue_column": self.revenue_col_name,
+            # 'packed' and 'pandas' give the same exact counts
+            "count_distinct": "hll" if self.count_distinct == "hll" else "exact",
+            "hll_precision": (
+                self.hll_precision if self.count_distinct == "hll" else None
+            ),
+            # future covariates are kept in the state
+            "holiday_countries": self.holiday_countries,
+            "calendar_flags": self.calendar_flags,
+        }
+
+    def input_fingerprint(
+        self,
+        target_train: pd.DataFrame,
+        target_test: pd.DataFrame,
+        features_raw: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """
+        Daily fingerprint of the inputs, to detect changed days in a persisted state:
+        row counts and target sums of the target splits, and row counts, target and
+        revenue sums of the raw features. Only the date, target and revenue columns
+        are used.
+        Returns:
+            DataFrame with date column and fingerprint columns, sorted by date.
+        """
+        targets = numpy_backend.compute_daily_fingerprint(
+            pd.concat(
+                [
+                    df[[self.date_col_name, self.target_col_name]]
+                    for df in (target_train, target_test)
+                ],
+                ignore_index=True,
+            ),
+            self.date_col_name,
+            [self.target_col_name],
+        )
+        features = numpy_backend.compute_daily_fingerprint(
+            features_raw,
+            self.date_col_name,
+            [self.target_col_name, self.revenue_col_name],
+        )
+        return (
+            targets.add_prefix("targets_")
+            .rename(columns={f"targets_{self.date_col_name}": self.date_col_name})
+            .merge(
+                features.add_prefix("features_").rename(
+                    columns={f"features_{self.date_col_name}": self.date_col_name}
+                ),
+                on=self.date_col_name,
+                how="outer",
+                sort=True,
+            )
+            .fillna(0)
+        )
+
+    def run_incremental(
+        self,
+        target_train: pd.DataFrame,
+        target_test: pd.DataFrame,
+        features_raw: pd.DataFrame,
+        test_start: pd.Timestamp,
+        state: Optional[DailyFeatureState] = None,
+        refresh_start: Optional[pd.Timestamp] = None,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Execute data engineering procedure incrementally from a daily aggregate state.
+
+        The inputs only need to hold the rows from refresh_start on (all rows for a
+        full build). The daily aggregates of these days are computed with the numpy
+        engine and replace the same days in the state; older days are taken from the
+        state as they are. Future covariates are only built for the dates beyond the
+        ones already in the state. The updated state is kept in self.state.
+
+        Args:
+            target_train: DataFrame with training target data from refresh_start on.
+            target_test: DataFrame with testing target data from refresh_start on.
+            features_raw: DataFrame with raw features data from refresh_start on.
+            test_start: First day of the test split.
+            state: Daily aggregate state of earlier runs. None for a full build.
+            refresh_start: First day of the input rows. Required with state.
+        Returns:
+            Tuple of (engineered_train_targets, engineered_test_targets, past_covariates, future_covariates)
+        """
+        if state is not None and refresh_start is None:
+            raise ValueError("refresh_start is required to update a state")
+        if state is not None and state.params != self.state_params():
+            raise ValueError("State was built with other parameters")
+
+        daily_targets = pd.concat(
+            [
+                numpy_backend.aggregate_daily_sum(
+                    df, self.date_col_name, self.target_col_name
+                )
+                for df in (target_train, target_test)
+            ],
+            ignore_index=True,
+        ).sort_values(self.date_col_name, ignore_index=True)
+        input_fingerprint = self.input_fingerprint(
+            target_train, target_test, features_raw
+        )
+        daily_aggregates = numpy_backend.compute_daily_aggregates(
+            features_raw=features_raw,
+            date_col_name=self.date_col_name,
+            target_col_name=self.target_col_name,
+            transaction_id_col_name=self.transaction_id_col_name,
+            customer_id_col_name=self.customer_id_col_name,
+            article_id_col_name=self.article_id_col_name,
+            revenue_col_name=self.revenue_col_name,
+        )
+        self.daily_sketches = {}
+        if self.count_distinct == "hll":
+            # replaces the exact unique counts with estimates from the sketches
+            estimates = self._estimate_unique_counts(features_raw)
+            for name in HLL_COVARIATES:
+                daily_aggregates[name] = estimates[name].to_numpy()
+
+        if state is None:
+            state = DailyFeatureState(
+                params=self.state_params(),
+                date_col_name=self.date_col_name,
+                daily_targets=daily_targets,
+                daily_aggregates=daily_aggregates,
+                input_fingerprint=input_fingerprint,
+                future_covariates=self._build_future_covariates(
+                    features_raw[self.date_col_name].min(),
+                    features_raw[self.date_col_name].max(),
+                ),
+                sketches=self.daily_sketches,
+            )
+        else:
+            state.replace_days(
+                refresh_start,
+                daily_targets,
+                daily_aggregates,
+                input_fingerprint,
+                self.daily_sketches,
+            )
+            state.future_covariates = self._extend_future_covariates(
+                state.future_covariates,
+                state.daily_aggregates[self.date_col_name].min(),
+                state.last_day,
+            )
+        self.state = state
+        self.daily_sketches = state.sketches
+
+        dates = state.daily_targets[self.date_col_name]
+        agg_train = state.daily_targets[dates < test_start].reset_index(drop=True)
+        agg_test = state.daily_targets[dates >= test_start].reset_index(drop=True)
+        past_covariates = numpy_backend.past_covariates_from_aggregates(
+            state.daily_aggregates, self.date_col_name
+        )
+        return agg_train, agg_test, past_covariates, state.future_covariates
+
+    def _extend_future_covariates(
+        self,
+        future_covariates: pd.DataFrame,
+        min_date: Optional[pd.Timestamp],
+        max_date: Optional[pd.Timestamp],
+    ) -> pd.DataFrame:
+        """
+        Extend future covariates to the horizon of a new last date. Only the dates
+        after the existing ones are built; dates beyond the horizon are dropped.
+        Args:
+            future_covariates: Future covariates built so far.
+            min_date: First date in the data, None if there is no data.
+            max_date: Last date in the data, None if there is no data.
+        Returns:
+            DataFrame with date column and future covariate columns.
+        """
+        if max_date is None or pd.isna(max_date):
+            # the refresh dropped every day of the state (no rows from refresh start on)
+            return future_covariates.iloc[:0]
+        dates = future_covariates[self.date_col_name]
+        extension = self._build_future_covariates(
+            dates.iloc[-1] + pd.Timedelta(days=1) if len(dates) else min_date,
+            max_date,
+        )
+        future_covariates = pd.concat([future_covariates, extension], ignore_index=True)
+        horizon_end = max_date + pd.Timedelta(days=FUTURE_COVARIATES_BUFFER_DAYS)
+        return future_covariates[
+            future_covariates[self.date_col_name] <= horizon_end
+        ].reset_index(drop=True)
+
     def aggregate_targets(
         self,
         df_train: pd.DataFrame,
@@ -139,28 +487,43 @@ class FeatureEngineer:
     ) -> pd.DataFrame:
         """
         Create a DataFrame with future known covariates.
-        Only holiday indicator for now.
+        Holiday indicator and calendar flags.
         Args:
             df: Input DataFrame containing the date index column
         Returns:
-            DataFrame with date column and 'is_holiday' column.
+            DataFrame with date column, 'is_holiday' and calendar flag columns.
+        """
+        return self._build_future_covariates(
+            df[self.date_col_name].min(), df[self.date_col_name].max()
+        )
+
+    def _build_future_covariates(
+        self, min_date: pd.Timestamp, max_date: pd.Timestamp
+    ) -> pd.DataFrame:
+        """
+        Build the future covariates for the date range of the data.
+        Args:
+            min_date: First date in the data.
+            max_date: Last date in the data.
+        Returns:
+            DataFrame with date column, 'is_holiday' and calendar flag columns.
         """
         # Create full date range based on min/max
-        min_date = df[self.date_col_name].min()
-        max_date = df[self.date_col_name].max() + pd.Timedelta(
-            days=30
+        max_date = max_date + pd.Timedelta(
+            days=FUTURE_COVARIATES_BUFFER_DAYS
         )  # add buffer for lags_future_covariates
         full_date_range = pd.date_range(start=min_date, end=max_date, freq="D")
 
-        uk_holidays = holidays.UK(years=(2010, 2011))
+        # holiday years are derived from the date range (see holiday_calendar)
+        calendar = build_calendar(
+            full_date_range,
+            countries=self.holiday_countries,
+            flags=self.calendar_flags,
+            cache_dir=self.calendar_cache_dir,
+        )
 
         future_covariates = pd.DataFrame(
-            {
-                self.date_col_name: full_date_range,
-                "is_holiday": [
-                    1 if d.date() in uk_holidays else 0 for d in full_date_range
-                ],
-            }
+            {self.date_col_name: full_date_range, **calendar}
         )
         return future_covariates
 
@@ -177,9 +540,9 @@ class FeatureEngineer:
         """
         # Basket size per transaction (preserve InvoiceDate)
         basket_sizes = (
-            features_raw.groupby([self.date_col_name, self.transaction_id_col_name])[
-                self.target_col_name
-            ]
+            features_raw.groupby(
+                [self.date_col_name, self.transaction_id_col_name], observed=True
+            )[self.target_col_name]
             .sum()
             .reset_index()
         )
@@ -217,6 +580,32 @@ class FeatureEngineer:
         )
         return daily_agg[[self.date_col_name, "avg_unit_price"]]
 
+    def _estimate_unique_counts(self, features_raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Approximate daily unique customers and articles from HyperLogLog sketches
+        (count_distinct='hll'). The sketches are kept in daily_sketches.
+        Args:
+            features_raw: Input DataFrame with transaction data.
+        Returns:
+            DataFrame with date column and HLL_COVARIATES columns, sorted by date
+            (same days as numpy_backend.factorize_days).
+        """
+        day_codes, days = numpy_backend.factorize_days(features_raw[self.date_col_name])
+        estimates = {self.date_col_name: days.to_numpy()}
+        for name, col_name in zip(
+            HLL_COVARIATES, (self.customer_id_col_name, self.article_id_col_name)
+        ):
+            sketches = DailyHyperLogLog.from_values(
+                dates=features_raw[self.date_col_name],
+                values=features_raw[col_name],
+                precision=self.hll_precision,
+                day_codes=day_codes,
+                days=days.to_numpy(),
+            )
+            self.daily_sketches[name] = sketches
+            estimates[name] = np.rint(sketches.estimate().to_numpy()).astype(np.int64)
+        return pd.DataFrame(estimates)
+
     def _compute_business_indicators(
         self,
         features_raw: pd.DataFrame,
@@ -232,6 +621,26 @@ class FeatureEngineer:
         Returns:
             DataFrame with time index and business indicator columns.
         """
+        columns = {
+            self.transaction_id_col_name: "num_transactions",
+            self.customer_id_col_name: "num_unique_customers",
+            self.article_id_col_name: "num_unique_articles",
+        }
+        if self.count_distinct == "packed":
+            return numpy_backend.count_distinct_per_day(
+                features_raw, self.date_col_name, columns
+            )
+        if self.count_distinct == "hll":
+            business_indicators = numpy_backend.count_distinct_per_day(
+                features_raw,
+                self.date_col_name,
+                {self.transaction_id_col_name: "num_transactions"},
+            )
+            estimates = self._estimate_unique_counts(features_raw)
+            for name in HLL_COVARIATES:
+                business_indicators[name] = estimates[name].to_numpy()
+            return business_indicators
+
         business_indicators = (
             features_raw.groupby(self.date_col_name)
             .agg(
@@ -242,13 +651,7 @@ class FeatureEngineer:
                 }
             )
             .reset_index()
-            .rename(
-                columns={
-                    self.transaction_id_col_name: "num_transactions",
-                    self.customer_id_col_name: "num_unique_customers",
-                    self.article_id_col_name: "num_unique_articles",
-                }
-            )
+            .rename(columns=columns)
         )
 
         return business_indicators
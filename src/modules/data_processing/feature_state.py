@@ -0,0 +1,297 @@
+"""
+Persisted daily aggregate state for incremental feature engineering.
+
+All FeatureEngineer outputs are derived from per-day values that only depend on
+the rows of that day:
+- daily target sums (train and test targets)
+- daily aggregates of the past covariates (sums and distinct counts, see
+    numpy_backend.compute_daily_aggregates)
+- in count_distinct='hll' mode, one HyperLogLog sketch per day and key column
+The state keeps these per-day values, plus the future covariates built so far.
+A refresh recomputes only the days from a refresh start date on (new days, and the
+last processed days that may have been partial or changed), replaces them in the
+state, and derives the artifacts from the state. Its cost depends on the number of
+refreshed rows and on the number of days, not on the number of historical rows.
+
+Older days can change too (e.g. late rows, or a rerun of the cleaning step with
+other settings). The state keeps a per-day fingerprint of the inputs (row counts
+and sums of the target and revenue columns, see
+FeatureEngineer.input_fingerprint), which only needs those narrow columns of all
+rows. The refresh starts at the first day whose fingerprint differs, if that is
+before the last refresh_days. Changes that keep the row counts and the sums of a
+day (e.g. another customer id on a row) are not detected; use a new state
+directory after such upstream changes.
+
+Layout of the state directory:
+    state.json                 parameters and date range of the state
+    daily_targets.parquet      date, target sum
+    daily_aggregates.parquet   date, aggregate columns
+    input_fingerprint.parquet  date, input row counts and sums
+    future_covariates.parquet  date, future covariate columns
+    sketches/<covariate>.npz   daily HyperLogLog sketches (hll mode only)
+The directory is written to a temporary directory and renamed, so an interrupted
+save never leaves a partial state.
+"""
+
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.modules.data_processing.hyperloglog import DailyHyperLogLog
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = "state.json"
+SKETCHES_DIR_NAME = "sketches"
+STATE_TABLES = (
+    "daily_targets",
+    "daily_aggregates",
+    "input_fingerprint",
+    "future_covariates",
+)
+
+
+class DailyFeatureState:
+    """
+    Daily aggregate state of FeatureEngineer.run_incremental.
+
+    Example usage:
+    ```python
+        state = DailyFeatureState.load(state_dir, feature_engineer.state_params())
+        refresh_start = state.refresh_start(refresh_days=1) if state else None
+        ...  # read only the rows from refresh_start on
+        outputs = feature_engineer.run_incremental(..., state=state,
+                                                   refresh_start=refresh_start)
+        feature_engineer.state.save(state_dir)
+    ```
+    """
+
+    def __init__(
+        self,
+        params: Dict[str, Any],
+        date_col_name: str,
+        daily_targets: pd.DataFrame,
+        daily_aggregates: pd.DataFrame,
+        input_fingerprint: pd.DataFrame,
+        future_covariates: pd.DataFrame,
+        sketches: Optional[Dict[str, DailyHyperLogLog]] = None,
+    ):
+        """
+        Args:
+            params: Parameters the state was computed with (column names, distinct
+                count method). A state is only reused with the same parameters.
+            date_col_name: Name of the date column of the state tables.
+            daily_targets: Daily target sums, sorted by date.
+            daily_aggregates: Daily aggregates of the past covariates, sorted by date.
+            input_fingerprint: Daily fingerprint of the inputs, sorted by date.
+            future_covariates: Future covariates, sorted by date.
+            sketches: Optional daily HyperLogLog sketches per covariate.
+        """
+        self.params = params
+        self.date_col_name = date_col_name
+        self.daily_targets = daily_targets
+        self.daily_aggregates = daily_aggregates
+        self.input_fingerprint = input_fingerprint
+        self.future_covariates = future_covariates
+        self.sketches = sketches or {}
+
+    @property
+    def last_day(self) -> Optional[pd.Timestamp]:
+        """Last day with aggregates, None for an empty state."""
+        if self.daily_aggregates.empty:
+            return None
+        return self.daily_aggregates[self.date_col_name].iloc[-1]
+
+    def refresh_start(
+        self, refresh_days: int, input_fingerprint: Optional[pd.DataFrame] = None
+    ) -> Optional[pd.Timestamp]:
+        """
+        First day to recompute: the last refresh_days processed days are recomputed
+        (the last day may have been partial), and all days after them are new.
+        With the fingerprint of the current inputs, the refresh starts earlier if an
+        older day changed.
+        Args:
+            refresh_days: Number of processed days to recompute (>= 1).
+            input_fingerprint: Optional daily fingerprint of all current input rows.
+        Returns:
+            First day to recompute, None for an empty state (full rebuild).
+        """
+        if refresh_days < 1:
+            raise ValueError("refresh_days must be positive integer")
+        if self.last_day is None:
+            return None
+        refresh_start = self.last_day - pd.Timedelta(days=refresh_days - 1)
+        if input_fingerprint is not None:
+            changed_day = self.first_changed_day(input_fingerprint)
+            if changed_day is not None and changed_day < refresh_start:
+                logger.warning(
+                    f"Inputs changed on {changed_day.date()}, before the last "
+                    f"{refresh_days} processed days: refreshing from that day on"
+                )
+                refresh_start = changed_day
+        return refresh_start
+
+    def first_changed_day(
+        self, input_fingerprint: pd.DataFrame
+    ) -> Optional[pd.Timestamp]:
+        """
+        First processed day whose fingerprint differs from the current inputs
+        (including days only in the state or only in the inputs).
+        Args:
+            input_fingerprint: Daily fingerprint of all current input rows.
+        Returns:
+            First changed day up to the last processed day, None if none changed.
+        """
+        days = self.input_fingerprint.merge(
+            input_fingerprint,
+            on=self.date_col_name,
+            how="outer",
+            suffixes=("_state", "_input"),
+            sort=True,
+        )
+        days = days[days[self.date_col_name] <= self.last_day]
+        value_cols = [
+            col_name
+            for col_name in self.input_fingerprint.columns
+            if col_name != self.date_col_name
+        ]
+        changed = np.zeros(len(days), dtype=bool)
+        for col_name in value_cols:
+            # missing days are NaN on one side, so they compare as changed
+            changed |= days[f"{col_name}_state"].to_numpy(dtype=np.float64) != days[
+                f"{col_name}_input"
+            ].to_numpy(dtype=np.float64)
+        if not changed.any():
+            return None
+        return days[self.date_col_name].iloc[int(np.argmax(changed))]
+
+    def replace_days(
+        self,
+        refresh_start: pd.Timestamp,
+        daily_targets: pd.DataFrame,
+        daily_aggregates: pd.DataFrame,
+        input_fingerprint: pd.DataFrame,
+        sketches: Optional[Dict[str, DailyHyperLogLog]] = None,
+    ) -> None:
+        """
+        Replace all days from refresh_start on with the recomputed days. Days from
+        refresh_start on that are not in the recomputed data are dropped.
+        Args:
+            refresh_start: First recomputed day.
+            daily_targets: Recomputed daily target sums.
+            daily_aggregates: Recomputed daily aggregates.
+            input_fingerprint: Daily fingerprint of the recomputed input rows.
+            sketches: Recomputed daily sketches per covariate (hll mode).
+        """
+        self.daily_targets = self._replace_rows(
+            self.daily_targets, daily_targets, refresh_start
+        )
+        self.daily_aggregates = self._replace_rows(
+            self.daily_aggregates, daily_aggregates, refresh_start
+        )
+        self.input_fingerprint = self._replace_rows(
+            self.input_fingerprint, input_fingerprint, refresh_start
+        )
+        for name, new_sketches in (sketches or {}).items():
+            if name in self.sketches:
+                kept = self.sketches[name].select_days(
+                    self.sketches[name].days < refresh_start.to_datetime64()
+                )
+                new_sketches = kept.merge(new_sketches)
+            self.sketches[name] = new_sketches
+        logger.info(
+            f"Replaced days from {refresh_start.date()} on: "
+            f"{len(daily_aggregates)} recomputed days, "
+            f"{len(self.daily_aggregates)} days in state"
+        )
+
+    def _replace_rows(
+        self, old: pd.DataFrame, new: pd.DataFrame, refresh_start: pd.Timestamp
+    ) -> pd.DataFrame:
+        """Keep the rows before refresh_start and append the recomputed rows."""
+        kept = old[old[self.date_col_name] < refresh_start]
+        return pd.concat([kept, new], ignore_index=True)
+
+    def save(self, state_dir: Path) -> None:
+        """Save the state to a directory, replacing any previous state."""
+        state_dir = Path(state_dir)
+        tmp_dir = state_dir.parent / f".{state_dir.name}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        for name in STATE_TABLES:
+            getattr(self, name).to_parquet(tmp_dir / f"{name}.parquet", index=False)
+        for name, sketches in self.sketches.items():
+            sketches.save(tmp_dir / SKETCHES_DIR_NAME / f"{name}.npz")
+        (tmp_dir / STATE_FILE_NAME).write_text(
+            json.dumps(
+                {
+                    "params": self.params,
+                    "date_column": self.date_col_name,
+                    "last_day": str(self.last_day),
+                },
+                indent=2,
+            )
+        )
+        shutil.rmtree(state_dir, ignore_errors=True)
+        tmp_dir.rename(state_dir)
+        logger.info(
+            f"Saved feature state ({len(self.daily_aggregates)} days) to {state_dir}"
+        )
+
+    @classmethod
+    def load(
+        cls, state_dir: Path, params: Dict[str, Any]
+    ) -> Optional["DailyFeatureState"]:
+        """
+        Load a saved state.
+        Args:
+            state_dir: Directory of the state.
+            params: Current parameters. A state saved with other parameters is not
+                reused.
+        Returns:
+            DailyFeatureState, or None if there is no usable state (full rebuild).
+        """
+        state_path = Path(state_dir) / STATE_FILE_NAME
+        if not state_path.is_file():
+            logger.info(f"No feature state in {state_dir}, running full build")
+            return None
+        meta = json.loads(state_path.read_text())
+        if meta["params"] != params:
+            logger.warning(
+                f"Feature state in {state_dir} was built with other parameters "
+                f"({meta['params']}), running full build"
+            )
+            return None
+        missing_tables = [
+            name
+            for name in STATE_TABLES
+            if not (Path(state_dir) / f"{name}.parquet").is_file()
+        ]
+        if missing_tables:
+            logger.warning(
+                f"Feature state in {state_dir} has no {missing_tables}, "
+                "running full build"
+            )
+            return None
+        tables = {
+            name: pd.read_parquet(Path(state_dir) / f"{name}.parquet")
+            for name in STATE_TABLES
+        }
+        sketches = {
+            path.stem: DailyHyperLogLog.load(path)
+            for path in sorted((Path(state_dir) / SKETCHES_DIR_NAME).glob("*.npz"))
+        }
+        logger.info(
+            f"Loaded feature state from {state_dir} (last day {meta['last_day']})"
+        )
+        return cls(
+            params=meta["params"],
+            date_col_name=meta["date_column"],
+            sketches=sketches,
+            **tables,
+        )
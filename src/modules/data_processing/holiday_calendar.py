@@ -0,0 +1,141 @@
+"""
+Vectorized holiday calendar for the future covariates of FeatureEngineer.
+
+Holiday dates are looked up once per country for the years covered by the dates
+(from the first to the last date, so later data never falls outside the calendar),
+and optionally cached on disk per country, year range and holidays package
+version. The calendar flags are then computed over the whole date array at once:
+- is_holiday: date is a holiday in any of the countries (np.isin on day values)
+- is_holiday_<country>: one column per country, when there is more than one
+- optional CALENDAR_FLAGS (e.g. is_weekend, is_day_before_holiday), from
+    DatetimeIndex attributes and shifted holiday masks
+No Python code runs per day.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import holidays
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTRIES = ("UK",)
+CALENDAR_FLAGS = (
+    "is_weekend",
+    "is_month_start",
+    "is_month_end",
+    "is_day_before_holiday",
+    "is_day_after_holiday",
+)
+
+
+def holiday_dates(
+    country: str, first_year: int, last_year: int, cache_dir: Optional[Path] = None
+) -> np.ndarray:
+    """
+    Holiday dates of a country for a range of years.
+    Args:
+        country: Country code known to the holidays package (e.g. 'UK', 'DE').
+        first_year: First year (inclusive).
+        last_year: Last year (inclusive).
+        cache_dir: Optional directory to cache the dates in, one JSON file per
+            country, year range and holidays package version.
+    Returns:
+        Sorted array of holiday dates (datetime64[D]).
+    """
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = (
+            Path(cache_dir)
+            / f"holidays_{country}_{first_year}-{last_year}_v{holidays.__version__}.json"
+        )
+        if cache_path.is_file():
+            logger.debug(f"Loaded holidays of {country} from {cache_path}")
+            return np.array(json.loads(cache_path.read_text()), dtype="datetime64[D]")
+
+    country_holidays = holidays.country_holidays(
+        country, years=range(first_year, last_year + 1)
+    )
+    dates = np.array(sorted(country_holidays), dtype="datetime64[D]")
+    logger.info(
+        f"Built holiday calendar of {country} for {first_year}-{last_year} "
+        f"({len(dates)} holidays)"
+    )
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps([str(date) for date in dates]))
+    return dates
+
+
+def build_calendar(
+    dates: pd.DatetimeIndex,
+    countries: Iterable[str] = DEFAULT_COUNTRIES,
+    flags: Iterable[str] = (),
+    cache_dir: Optional[Path] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calendar columns for a range of dates.
+    Args:
+        dates: Dates to build the calendar for.
+        countries: Countries whose holidays count for is_holiday.
+        flags: Extra flags, from CALENDAR_FLAGS.
+        cache_dir: Optional directory to cache the holiday dates in.
+    Returns:
+        Dictionary of column name -> int64 array (0/1) aligned with dates.
+    Raises:
+        ValueError: if no country or an unknown flag is given.
+    """
+    countries = list(countries)
+    flags = list(flags)
+    if not countries:
+        raise ValueError("At least one holiday country is required")
+    unknown_flags = sorted(set(flags) - set(CALENDAR_FLAGS))
+    if unknown_flags:
+        raise ValueError(
+            f"Unknown calendar flags {unknown_flags}, expected some of {CALENDAR_FLAGS}"
+        )
+
+    days = dates.to_numpy().astype("datetime64[D]")
+    if len(days) == 0:
+        return {
+            name: np.zeros(0, dtype=np.int64)
+            for name in ["is_holiday"] + _country_columns(countries) + flags
+        }
+    # one day margin for the day before/after flags at the range boundaries
+    first_year = pd.Timestamp(days.min() - 1).year
+    last_year = pd.Timestamp(days.max() + 1).year
+    holiday_sets = {
+        country: holiday_dates(country, first_year, last_year, cache_dir)
+        for country in countries
+    }
+    all_holidays = np.unique(np.concatenate(list(holiday_sets.values())))
+
+    calendar = {"is_holiday": np.isin(days, all_holidays)}
+    if len(countries) > 1:
+        for country, column in zip(countries, _country_columns(countries)):
+            calendar[column] = np.isin(days, holiday_sets[country])
+    for flag in flags:
+        if flag == "is_weekend":
+            calendar[flag] = dates.dayofweek.to_numpy() >= 5
+        elif flag == "is_month_start":
+            calendar[flag] = dates.is_month_start
+        elif flag == "is_month_end":
+            calendar[flag] = dates.is_month_end
+        elif flag == "is_day_before_holiday":
+            calendar[flag] = np.isin(days + 1, all_holidays)
+        elif flag == "is_day_after_holiday":
+            calendar[flag] = np.isin(days - 1, all_holidays)
+    return {
+        name: np.asarray(values, dtype=np.int64) for name, values in calendar.items()
+    }
+
+
+def _country_columns(countries: List[str]) -> List[str]:
+    """Per-country holiday column names (only used with more than one country)."""
+    if len(countries) <= 1:
+        return []
+    return [f"is_holiday_{country.lower()}" for country in countries]
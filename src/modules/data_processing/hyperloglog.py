@@ -0,0 +1,229 @@
+"""
+Vectorized HyperLogLog sketches for approximate distinct counts per day.
+
+A HyperLogLog sketch of precision p is an array of m = 2**p registers. Each value is
+hashed to 64 bits; the first p bits select a register, and the register keeps the
+max "rank" (position of the first 1-bit) of the remaining bits seen. The number of
+distinct values is estimated from the registers with a relative standard error of
+about 1.04 / sqrt(m) (p=12: 1.6%, p=14: 0.8%), using m bytes per sketch regardless
+of the number of rows or distinct values.
+
+Sketches are mergeable: the register-wise max of two sketches is the sketch of the
+union of their values. DailyHyperLogLog keeps one sketch per day, so
+- days from separate batches or runs are combined with merge, and
+- weekly/monthly distinct counts come from rolling up the daily registers (rollup),
+without rescanning raw rows. Sketches are persisted with save/load (.npz).
+
+Values are hashed with pandas' hash_array (fixed key), so the hash of a value, and
+thus the sketches, are the same across batches, runs and processes.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+DEFAULT_PRECISION = 14
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    64-bit hash per value. Missing values are dropped by the caller.
+    Integer columns are hashed as int64, other columns by their string value, so a
+    categorical and an object column with the same values give the same hashes.
+    Categorical columns are hashed once per category.
+    Returns:
+        uint64 array of hashes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_hashes = pd.util.hash_array(
+            values.cat.categories.to_numpy().astype(str)
+        )
+        return category_hashes[values.cat.codes.to_numpy()]
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.util.hash_array(values.to_numpy(dtype=np.int64))
+    return pd.util.hash_array(values.to_numpy().astype(str))
+
+
+def register_ranks(hashes: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split 64-bit hashes into register index (first `precision` bits) and rank
+    (1 + number of leading zeros of the remaining bits).
+    Returns:
+        Tuple of (register index, rank) arrays.
+    """
+    num_rest_bits = 64 - precision
+    index = (hashes >> np.uint64(num_rest_bits)).astype(np.int64)
+    rest = hashes & np.uint64((1 << num_rest_bits) - 1)
+    # exact bit length from the two 32-bit halves (exactly representable in float64)
+    high = (rest >> np.uint64(32)).astype(np.float64)
+    low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bit_length = np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+    rank = (num_rest_bits - bit_length + 1).astype(np.uint8)
+    return index, rank
+
+
+def estimate_cardinality(registers: np.ndarray) -> np.ndarray:
+    """
+    HyperLogLog estimate per sketch, with linear counting for small cardinalities.
+    Args:
+        registers: uint8 registers, shape (num_sketches, m).
+    Returns:
+        float64 estimate per sketch.
+    """
+    m = registers.shape[-1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    # 2**-rank for every possible register value (ranks are at most 64 - precision + 1)
+    inverse_powers = np.ldexp(1.0, -np.arange(66))
+    raw = alpha * m * m / inverse_powers[registers].sum(axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DailyHyperLogLog:
+    """
+    One HyperLogLog sketch per day for one key column (e.g. CustomerID).
+
+    Example usage:
+    ```python
+        sketches = DailyHyperLogLog.from_values(df["InvoiceDate"], df["CustomerID"])
+        daily_counts = sketches.estimate()            # Series indexed by day
+        weekly_counts = sketches.rollup("W-SUN")      # no raw rows needed
+        sketches.save(Path("customer_sketches.npz"))
+        merged = DailyHyperLogLog.load(path).merge(new_day_sketches)
+    ```
+    """
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        registers: np.ndarray,
+        precision: int = DEFAULT_PRECISION,
+    ):
+        """
+        Args:
+            days: Sorted distinct days (datetime64).
+            registers: uint8 registers, shape (len(days), 2**precision).
+            precision: Number of register index bits.
+        """
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}"
+            )
+        if registers.shape != (len(days), 1 << precision):
+            raise ValueError(
+                f"registers shape {registers.shape} does not match "
+                f"{len(days)} days and precision {precision}"
+            )
+        self.days = days
+        self.registers = registers
+        self.precision = precision
+
+    @classmethod
+    def from_values(
+        cls,
+        dates: pd.Series,
+        values: pd.Series,
+        precision: int = DEFAULT_PRECISION,
+        day_codes: Optional[np.ndarray] = None,
+        days: Optional[np.ndarray] = None,
+    ) -> "DailyHyperLogLog":
+        """
+        Build the daily sketches of a column in one pass over its rows.
+        Missing values and rows with a missing date are skipped.
+        Args:
+            dates: Day-level dates.
+            values: Values to count.
+            precision: Number of register index bits.
+            day_codes: Optional precomputed day code per row (-1 for missing),
+                e.g. from numpy_backend.factorize_days.
+            days: Sorted distinct days of day_codes. Required with day_codes.
+        Returns:
+            DailyHyperLogLog with one sketch per day in dates.
+        """
+        if day_codes is None:
+            day_codes, days = pd.factorize(dates.to_numpy(), sort=True)
+        days = np.asarray(days)
+        valid = (day_codes >= 0) & values.notna().to_numpy()
+        index, rank = register_ranks(hash_values(values[valid]), precision)
+        m = 1 << precision
+        registers = np.zeros(len(days) * m, dtype=np.uint8)
+        np.maximum.at(registers, day_codes[valid] * m + index, rank)
+        return cls(days, registers.reshape(len(days), m), precision)
+
+    def estimate(self) -> pd.Series:
+        """
+        Approximate number of distinct values per day.
+        Returns:
+            Series of estimates (float64) indexed by day.
+        """
+        return pd.Series(estimate_cardinality(self.registers), index=self.days)
+
+    def merge(self, other: "DailyHyperLogLog") -> "DailyHyperLogLog":
+        """
+        Union of two sets of daily sketches: days in both are merged register-wise.
+        Args:
+            other: Sketches with the same precision.
+        Returns:
+            New DailyHyperLogLog covering the days of both.
+        """
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Cannot merge sketches of precision {self.precision} and "
+                f"{other.precision}"
+            )
+        days = np.union1d(self.days, other.days)
+        registers = np.zeros((len(days), 1 << self.precision), dtype=np.uint8)
+        for sketches in (self, other):
+            positions = np.searchsorted(days, sketches.days)
+            registers[positions] = np.maximum(registers[positions], sketches.registers)
+        return DailyHyperLogLog(days, registers, self.precision)
+
+    def select_days(self, mask: np.ndarray) -> "DailyHyperLogLog":
+        """
+        Subset of the daily sketches, e.g. to drop days that are recomputed.
+        Args:
+            mask: Boolean mask over days.
+        Returns:
+            New DailyHyperLogLog with the selected days.
+        """
+        return DailyHyperLogLog(self.days[mask], self.registers[mask], self.precision)
+
+    def rollup(self, freq: str) -> pd.Series:
+        """
+        Approximate number of distinct values per period, from the daily sketches.
+        Args:
+            freq: pandas period frequency, e.g. 'W-SUN' or 'M'.
+        Returns:
+            Series of estimates indexed by period.
+        """
+        periods = pd.PeriodIndex(pd.DatetimeIndex(self.days), freq=freq)
+        period_codes, unique_periods = pd.factorize(periods, sort=True)
+        registers = np.zeros((len(unique_periods), 1 << self.precision), dtype=np.uint8)
+        np.maximum.at(registers, period_codes, self.registers)
+        return pd.Series(estimate_cardinality(registers), index=unique_periods)
+
+    def save(self, path: Path) -> None:
+        """Save the sketches as a compressed .npz file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            days=self.days,
+            registers=self.registers,
+            precision=self.precision,
+        )
+        logger.info(f"Saved {len(self.days)} daily sketches to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "DailyHyperLogLog":
+        """Load sketches saved with save."""
+        with np.load(path) as data:
+            return cls(data["days"], data["registers"], int(data["precision"]))
@@ -0,0 +1,312 @@
+"""
+Single-pass numpy engine for the daily covariates of FeatureEngineer.
+
+The pandas implementation runs one groupby per covariate (plus a two-level groupby
+for the basket size) and merges the results. Here the date column is factorized
+once into day codes, and every daily covariate is computed from those codes with
+flat numpy kernels, with no merges:
+- sums (target, revenue) with np.bincount(day_codes, weights=...)
+- distinct counts per day from packed 64-bit (day, value) pairs, each distinct pair
+    counted once for its day (count_distinct_per_group). The distinct pairs are
+    marked in a bitmap of all (day, value) cells if it is small enough, otherwise
+    found with a hash-based unique.
+- avg_basket_size as the day's target sum over its number of distinct transactions
+    (the mean of the per-transaction sums, without computing them)
+- avg_unit_price as revenue sum over target sum
+
+If the rows are sorted by date (as DataSplitter writes them), the day codes come
+from one scan for day boundaries instead of a hash-based factorize.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Max (group, value) cells for the bitmap count-distinct (1 byte per cell)
+MAX_BITMAP_CELLS = 64 * 1024 * 1024
+
+
+def factorize_days(dates: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """
+    Map each row to the code of its day. Missing dates get code -1.
+    Args:
+        dates: Day-level dates.
+    Returns:
+        Tuple of (day code per row, sorted distinct days)
+    """
+    values = dates.to_numpy()
+    if dates.is_monotonic_increasing:
+        # sorted: a new code starts wherever the date changes
+        starts = np.flatnonzero(values[1:] != values[:-1]) + 1
+        codes = np.zeros(len(values), dtype=np.int64)
+        codes[starts] = 1
+        codes = np.cumsum(codes)
+        days = values[np.concatenate(([0], starts))] if len(values) else values[:0]
+    else:
+        codes, days = pd.factorize(values, sort=True)
+    return codes, pd.Series(days, name=dates.name)
+
+
+def value_codes(series: pd.Series) -> Tuple[np.ndarray, int]:
+    """
+    Integer codes of a column's values, -1 for missing values.
+    Categorical columns use their existing codes (no hashing).
+    Returns:
+        Tuple of (code per row, number of distinct codes)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), len(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), len(uniques)
+
+
+def count_distinct_per_group(
+    group_codes: np.ndarray,
+    num_groups: int,
+    codes: np.ndarray,
+    num_codes: int,
+) -> np.ndarray:
+    """
+    Exact number of distinct values per group. Each (group, value) pair is packed
+    into one int64 (group * num_codes + value). The distinct pairs are marked in a
+    bitmap of num_groups * num_codes cells (up to MAX_BITMAP_CELLS), or found with a
+    hash-based unique for larger products, and counted per group with bincount.
+    Rows with a missing value (code -1) are not counted, as in pandas nunique.
+
+    Args:
+        group_codes: Group code per row, in [0, num_groups).
+        num_groups: Number of groups.
+        codes: Value code per row, in [0, num_codes), or -1 for missing.
+        num_codes: Number of distinct value codes.
+    Returns:
+        Array of num_groups distinct counts.
+    """
+    valid = codes >= 0
+    if not valid.all():
+        group_codes, codes = group_codes[valid], codes[valid]
+    num_codes = max(num_codes, 1)
+    pairs = group_codes * np.int64(num_codes) + codes
+    if num_groups * num_codes <= MAX_BITMAP_CELLS:
+        seen = np.zeros(num_groups * num_codes, dtype=bool)
+        seen[pairs] = True
+        pairs = np.flatnonzero(seen)
+    else:
+        pairs = pd.unique(pairs)
+    return np.bincount(pairs // num_codes, minlength=num_groups)
+
+
+def count_distinct_per_day(
+    df: pd.DataFrame, date_col_name: str, columns: Dict[str, str]
+) -> pd.DataFrame:
+    """
+    Exact number of distinct values per day for several columns, the equivalent of
+    df.groupby(date_col_name).agg({col: "nunique", ...}) with renamed columns.
+    Missing values are not counted; rows with a missing date are dropped.
+    Args:
+        df: Input DataFrame.
+        date_col_name: Name of the day-level date column.
+        columns: Output column name per input column name.
+    Returns:
+        DataFrame with date column and one count column per input column, sorted
+        by date.
+    """
+    day_codes, days = factorize_days(df[date_col_name])
+    has_date = day_codes >= 0
+    if not has_date.all():
+        df, day_codes = df[has_date], day_codes[has_date]
+    counts = {}
+    for col_name, output_name in columns.items():
+        codes, num_codes = value_codes(df[col_name])
+        counts[output_name] = count_distinct_per_group(
+            day_codes, len(days), codes, num_codes
+        )
+    return pd.DataFrame({date_col_name: days.to_numpy(), **counts})
+
+
+def compute_daily_aggregates(
+    features_raw: pd.DataFrame,
+    date_col_name: str,
+    target_col_name: str,
+    transaction_id_col_name: str,
+    customer_id_col_name: str,
+    article_id_col_name: str,
+    revenue_col_name: str,
+) -> pd.DataFrame:
+    """
+    Compute the additive daily aggregates the past covariates are derived from:
+    target_sum, revenue_sum, basket_target_sum (target sum of rows with a
+    transaction id) and the distinct counts num_transactions,
+    num_unique_customers and num_unique_articles.
+    Each day only depends on its own rows, so the aggregates of a set of days can
+    be recomputed without the rest of the history (see feature_state).
+
+    Returns:
+        DataFrame with date column and aggregate columns, sorted by date.
+    """
+    day_codes, days = factorize_days(features_raw[date_col_name])
+    has_date = day_codes >= 0
+    if not has_date.all():
+        # rows without a date are not part of any day, as in pandas groupby
+        features_raw, day_codes = features_raw[has_date], day_codes[has_date]
+    num_days = len(days)
+    target = features_raw[target_col_name].to_numpy(dtype=np.float64)
+    revenue = features_raw[revenue_col_name].to_numpy(dtype=np.float64)
+    target_sum = np.bincount(day_codes, weights=target, minlength=num_days)
+    revenue_sum = np.bincount(day_codes, weights=revenue, minlength=num_days)
+
+    transaction_codes, num_transaction_codes = value_codes(
+        features_raw[transaction_id_col_name]
+    )
+    num_transactions = count_distinct_per_group(
+        day_codes, num_days, transaction_codes, num_transaction_codes
+    )
+    # basket sizes only include rows with a transaction id
+    has_transaction = transaction_codes >= 0
+    if has_transaction.all():
+        basket_target_sum = target_sum
+    else:
+        basket_target_sum = np.bincount(
+            day_codes[has_transaction],
+            weights=target[has_transaction],
+            minlength=num_days,
+        )
+
+    distinct_counts = {"num_transactions": num_transactions}
+    for name, col_name in (
+        ("num_unique_customers", customer_id_col_name),
+        ("num_unique_articles", article_id_col_name),
+    ):
+        codes, num_codes = value_codes(features_raw[col_name])
+        distinct_counts[name] = count_distinct_per_group(
+            day_codes, num_days, codes, num_codes
+        )
+
+    return pd.DataFrame(
+        {
+            date_col_name: days.to_numpy(),
+            "target_sum": target_sum,
+            "revenue_sum": revenue_sum,
+            "basket_target_sum": basket_target_sum,
+            **distinct_counts,
+        }
+    )
+
+
+def past_covariates_from_aggregates(
+    daily_aggregates: pd.DataFrame, date_col_name: str
+) -> pd.DataFrame:
+    """
+    Derive the past covariates from the daily aggregates of
+    compute_daily_aggregates: avg_basket_size (mean of per-transaction target sums)
+    and avg_unit_price (revenue sum / target sum), next to the distinct counts.
+
+    Returns:
+        DataFrame with date column and past covariate columns.
+    """
+    num_transactions = daily_aggregates["num_transactions"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_basket_size = np.where(
+            num_transactions > 0,
+            daily_aggregates["basket_target_sum"].to_numpy() / num_transactions,
+            np.nan,
+        )
+        avg_unit_price = (
+            daily_aggregates["revenue_sum"].to_numpy()
+            / daily_aggregates["target_sum"].to_numpy()
+        )
+    return pd.DataFrame(
+        {
+            date_col_name: daily_aggregates[date_col_name].to_numpy(),
+            "num_transactions": num_transactions,
+            "num_unique_customers": daily_aggregates["num_unique_customers"].to_numpy(),
+            "num_unique_articles": daily_aggregates["num_unique_articles"].to_numpy(),
+            "avg_basket_size": avg_basket_size,
+            "avg_unit_price": avg_unit_price,
+        }
+    )
+
+
+def compute_past_covariates(
+    features_raw: pd.DataFrame,
+    date_col_name: str,
+    target_col_name: str,
+    transaction_id_col_name: str,
+    customer_id_col_name: str,
+    article_id_col_name: str,
+    revenue_col_name: str,
+) -> pd.DataFrame:
+    """
+    Compute the daily past covariates of FeatureEngineer.compute_past_covariates:
+    num_transactions, num_unique_customers, num_unique_articles (distinct counts),
+    avg_basket_size (mean of per-transaction target sums) and avg_unit_price
+    (revenue sum / target sum).
+
+    Returns:
+        DataFrame with date column and past covariate columns, sorted by date.
+    """
+    daily_aggregates = compute_daily_aggregates(
+        features_raw,
+        date_col_name,
+        target_col_name,
+        transaction_id_col_name,
+        customer_id_col_name,
+        article_id_col_name,
+        revenue_col_name,
+    )
+    return past_covariates_from_aggregates(daily_aggregates, date_col_name)
+
+
+def aggregate_daily_sum(
+    df: pd.DataFrame, date_col_name: str, value_col_name: str
+) -> pd.DataFrame:
+    """
+    Sum a column per day, keeping the column's dtype.
+    Returns:
+        DataFrame with date and summed value columns, sorted by date.
+    """
+    day_codes, days = factorize_days(df[date_col_name])
+    values = df[value_col_name]
+    has_date = day_codes >= 0
+    # float64 weights are exact for integer sums below 2**53
+    sums = np.bincount(
+        day_codes[has_date],
+        weights=values.to_numpy(dtype=np.float64)[has_date],
+        minlength=len(days),
+    )
+    return pd.DataFrame(
+        {
+            date_col_name: days.to_numpy(),
+            value_col_name: sums.astype(values.dtype),
+        }
+    )
+
+
+def compute_daily_fingerprint(
+    df: pd.DataFrame, date_col_name: str, value_col_names: List[str]
+) -> pd.DataFrame:
+    """
+    Per-day row count and float64 sums of a few columns, to detect days whose rows
+    were added, removed or changed between two runs (see feature_state).
+    Rows of a day are summed in file order, so the same rows give the same sums.
+    Returns:
+        DataFrame with date, num_rows and value sum columns, sorted by date.
+    """
+    day_codes, days = factorize_days(df[date_col_name])
+    has_date = day_codes >= 0
+    if not has_date.all():
+        df, day_codes = df[has_date], day_codes[has_date]
+    fingerprint = {
+        date_col_name: days.to_numpy(),
+        "num_rows": np.bincount(day_codes, minlength=len(days)),
+    }
+    for col_name in value_col_names:
+        fingerprint[col_name] = np.bincount(
+            day_codes,
+            weights=df[col_name].to_numpy(dtype=np.float64, na_value=0.0),
+            minlength=len(days),
+        )
+    return pd.DataFrame(fingerprint)
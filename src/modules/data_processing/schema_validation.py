@@ -0,0 +1,243 @@
+"""
+Schema validation of pipeline artifacts that does not scan the data.
+
+Column expectations are given as specs (see schemas.CLEANING_INPUT_COLUMN_SPECS):
+    {"Quantity": {"kind": "integer", "nullable": False, "greater_than": 0}, ...}
+with kind one of 'string', 'integer', 'number' or 'timestamp', and optional bounds
+'greater_than' / 'less_than' for numeric and timestamp columns.
+
+Two tiers:
+1. schema tier (always): column names and types, from the Arrow schema / parquet
+    footer or the DataFrame dtypes. Nullability from parquet footer null counts or
+    Arrow null counts, which are stored metadata. Cost does not grow with row count.
+2. statistics tier (optional): value bounds from the min/max statistics of each
+    parquet row group (footer only, no data pages read). For DataFrames, which have
+    no statistics, nullability and bounds are checked on randomly drawn rows.
+
+All problems found are collected and raised together as one ValueError.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+logger = logging.getLogger(__name__)
+
+ColumnSpecs = Dict[str, Dict[str, Any]]
+
+
+def validate_arrow_schema(
+    schema: pa.Schema,
+    column_specs: ColumnSpecs,
+    null_counts: Optional[Dict[str, int]] = None,
+    context: str = "data",
+) -> None:
+    """
+    Schema tier: check column names and types of an Arrow schema, and nullability
+    if null counts are known.
+    Args:
+        schema: Arrow schema to validate.
+        column_specs: Expected columns.
+        null_counts: Optional number of nulls per column.
+        context: Name of the validated data, used in the error message.
+    Raises:
+        ValueError: if a column is missing, has the wrong type or unexpected nulls.
+    """
+    problems = []
+    for name, spec in column_specs.items():
+        if name not in schema.names:
+            problems.append(f"missing column '{name}'")
+            continue
+        arrow_type = schema.field(name).type
+        if not _arrow_type_matches(arrow_type, spec["kind"]):
+            problems.append(
+                f"column '{name}' has type {arrow_type}, expected {spec['kind']}"
+            )
+        if null_counts and not spec.get("nullable", True) and null_counts.get(name):
+            problems.append(f"column '{name}' has {null_counts[name]:,} null values")
+    _raise_problems(problems, context)
+
+
+def validate_arrow_table(
+    table: pa.Table, column_specs: ColumnSpecs, context: str = "data"
+) -> None:
+    """
+    Schema tier for an in-memory Arrow table. Null counts are stored per array,
+    so nullability is checked without a scan.
+    """
+    null_counts = {
+        name: table[name].null_count
+        for name in column_specs
+        if name in table.schema.names
+    }
+    validate_arrow_schema(table.schema, column_specs, null_counts, context)
+    logger.debug(f"Validated schema of {context}")
+
+
+def validate_parquet_metadata(
+    path: Path,
+    column_specs: ColumnSpecs,
+    check_statistics: bool = False,
+) -> None:
+    """
+    Validate a Parquet file or dataset directory from its footer(s) only.
+    Schema tier: column names, types and footer null counts.
+    Statistics tier (check_statistics): per row group min/max against the bounds
+    of the specs. Row groups without statistics are skipped.
+
+    Args:
+        path: Path to a Parquet file or dataset directory.
+        column_specs: Expected columns.
+        check_statistics: Also check value bounds from row group statistics.
+    Raises:
+        ValueError: if validation fails.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    null_counts: Dict[str, int] = {}
+    problems: List[str] = []
+    num_row_groups = 0
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        for i in range(metadata.num_row_groups):
+            num_row_groups += 1
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                name = column.path_in_schema
+                statistics = column.statistics
+                if name not in column_specs or statistics is None:
+                    continue
+                if statistics.has_null_count:
+                    null_counts[name] = null_counts.get(name, 0) + statistics.null_count
+                if check_statistics and statistics.has_min_max:
+                    problems.extend(
+                        _check_bounds(
+                            name,
+                            column_specs[name],
+                            statistics.min,
+                            statistics.max,
+                            f"row group {i} of {Path(fragment.path).name}",
+                        )
+                    )
+
+    validate_arrow_schema(dataset.schema, column_specs, null_counts, context=str(path))
+    _raise_problems(problems, str(path))
+    logger.info(
+        f"Validated {path} from parquet metadata ({num_row_groups} row groups"
+        f"{', with statistics' if check_statistics else ''})"
+    )
+
+
+def validate_dataframe(
+    df: pd.DataFrame,
+    column_specs: ColumnSpecs,
+    sample_size: int = 0,
+    context: str = "DataFrame",
+) -> None:
+    """
+    Validate a DataFrame.
+    Schema tier: column names and dtypes.
+    Statistics tier (sample_size > 0): nullability and value bounds on sample_size
+    rows drawn at random positions (with replacement, so the cost depends on
+    sample_size only, not on the number of rows).
+
+    Args:
+        df: DataFrame to validate.
+        column_specs: Expected columns.
+        sample_size: Number of rows to sample for the statistics tier. 0 disables it.
+        context: Name of the validated data, used in the error message.
+    Raises:
+        ValueError: if validation fails.
+    """
+    problems = []
+    for name, spec in column_specs.items():
+        if name not in df.columns:
+            problems.append(f"missing column '{name}'")
+        elif not _pandas_dtype_matches(df[name].dtype, spec["kind"]):
+            problems.append(
+                f"column '{name}' has dtype {df[name].dtype}, expected {spec['kind']}"
+            )
+    _raise_problems(problems, context)
+
+    if sample_size > 0 and len(df) > 0:
+        positions = np.random.default_rng(0).integers(0, len(df), size=sample_size)
+        sample = df.take(positions)
+        for name, spec in column_specs.items():
+            values = sample[name]
+            if not spec.get("nullable", True) and values.isna().any():
+                problems.append(f"column '{name}' has null values in sample")
+            if (
+                spec["kind"] in ("integer", "number", "timestamp")
+                and values.notna().any()
+            ):
+                problems.extend(
+                    _check_bounds(name, spec, values.min(), values.max(), "sample")
+                )
+        _raise_problems(problems, context)
+    logger.debug(
+        f"Validated schema of {context}"
+        f"{f' and a sample of {sample_size:,} rows' if sample_size > 0 else ''}"
+    )
+
+
+def _arrow_type_matches(arrow_type: pa.DataType, kind: str) -> bool:
+    """Check if an Arrow type is of the expected kind."""
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if kind == "string":
+        return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+    if kind == "integer":
+        return pa.types.is_integer(arrow_type)
+    if kind == "number":
+        return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+    if kind == "timestamp":
+        return pa.types.is_timestamp(arrow_type)
+    raise ValueError(f"Unknown column kind '{kind}'")
+
+
+def _pandas_dtype_matches(dtype: Any, kind: str) -> bool:
+    """Check if a pandas dtype is of the expected kind."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if kind == "string":
+        return pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(
+            dtype
+        )
+    if kind == "integer":
+        return pd.api.types.is_integer_dtype(dtype)
+    if kind == "number":
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(
+            dtype
+        )
+    if kind == "timestamp":
+        return pd.api.types.is_datetime64_any_dtype(dtype)
+    raise ValueError(f"Unknown column kind '{kind}'")
+
+
+def _check_bounds(
+    name: str, spec: Dict[str, Any], min_value: Any, max_value: Any, where: str
+) -> List[str]:
+    """Check a min/max pair against the bounds of a column spec."""
+    problems = []
+    if "greater_than" in spec and min_value <= spec["greater_than"]:
+        problems.append(
+            f"column '{name}' has min {min_value} in {where}, "
+            f"expected > {spec['greater_than']}"
+        )
+    if "less_than" in spec and max_value >= spec["less_than"]:
+        problems.append(
+            f"column '{name}' has max {max_value} in {where}, "
+            f"expected < {spec['less_than']}"
+        )
+    return problems
+
+
+def _raise_problems(problems: List[str], context: str) -> None:
+    """Raise a ValueError listing all validation problems, if any."""
+    if problems:
+        raise ValueError(f"Validation of {context} failed: " + "; ".join(problems))
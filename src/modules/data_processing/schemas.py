@@ -0,0 +1,239 @@
+"""
+Explicit data schemas for the UCI Online Retail pipeline artifacts.
+
+Declaring the column types up front means the ingest step does not have to guess
+dtypes from the data, and every downstream component receives the same types
+regardless of which rows happened to be loaded.
+
+The compact schema (COMPACT_TRANSACTIONS_ARROW_SCHEMA) is the one written at ingest:
+- low-cardinality string columns are dictionary encoded, and read by pandas as
+    categoricals (integer codes plus one copy of each distinct string).
+- Quantity and CustomerID are stored as int32. CustomerID has missing values, so it
+    is read as pandas' nullable Int32 instead of being widened to float64.
+The pandas dtypes are stored in the parquet metadata, so pd.read_parquet restores
+them and DataCleaner, DataSplitter and FeatureEngineer keep them through to_parquet.
+
+Dates are parsed once, at ingest: InvoiceDate is stored as a timestamp, and the
+day-level InvoiceDay column (see DAY_COLUMNS) is derived from it, so downstream
+components neither parse nor normalize dates. Text dates from other sources are
+parsed with parse_dates.
+"""
+
+import sys
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Format of the text dates in the source database
+INVOICE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Day-level columns derived at ingest, and the timestamp column each is derived from
+DAY_COLUMNS: Dict[str, str] = {"InvoiceDay": "InvoiceDate"}
+
+# Schema of the transactions table as read from the database.
+TRANSACTIONS_ARROW_SCHEMA = pa.schema(
+    [
+        pa.field("InvoiceNo", pa.string()),
+        pa.field("StockCode", pa.string()),
+        pa.field("Description", pa.string()),
+        pa.field("Quantity", pa.int64()),
+        pa.field("InvoiceDate", pa.timestamp("us")),
+        pa.field("UnitPrice", pa.float64()),
+        pa.field("CustomerID", pa.int64()),
+        pa.field("Country", pa.string()),
+    ]
+)
+
+# Pandas dtypes of the compact transactions schema.
+COMPACT_TRANSACTIONS_PANDAS_DTYPES: Dict[str, str] = {
+    "InvoiceNo": "category",
+    "StockCode": "category",
+    "Description": "category",
+    "Quantity": "int32",
+    "InvoiceDate": "datetime64[us]",
+    "InvoiceDay": "datetime64[us]",
+    "UnitPrice": "float64",
+    "CustomerID": "Int32",
+    "Country": "category",
+}
+
+
+# Columns DataCleaner reads, and writes (see schema_validation for the spec format).
+# Input bounds are sanity limits of the source system, not cleaning rules: returns
+# (negative quantities) and adjustments (negative prices) are valid input rows, but
+# values beyond these limits, or dates outside the bounds (e.g. epoch dates from a
+# unit error), point to a broken extract.
+CLEANING_INPUT_COLUMN_SPECS: Dict[str, Dict[str, Any]] = {
+    "StockCode": {"kind": "string", "nullable": False},
+    "Quantity": {
+        "kind": "integer",
+        "nullable": False,
+        "greater_than": -100_000,
+        "less_than": 100_000,
+    },
+    "InvoiceDate": {
+        "kind": "timestamp",
+        "nullable": False,
+        "greater_than": pd.Timestamp("2000-01-01"),
+        "less_than": pd.Timestamp("2100-01-01"),
+    },
+    "UnitPrice": {
+        "kind": "number",
+        "nullable": False,
+        "greater_than": -100_000,
+        "less_than": 100_000,
+    },
+    "Country": {"kind": "string", "nullable": False},
+}
+CLEANING_OUTPUT_COLUMN_SPECS: Dict[str, Dict[str, Any]] = {
+    **CLEANING_INPUT_COLUMN_SPECS,
+    "Quantity": {"kind": "integer", "nullable": False, "greater_than": 0},
+    "UnitPrice": {"kind": "number", "nullable": False, "greater_than": 0},
+    "Revenue": {"kind": "number", "nullable": False, "greater_than": 0},
+}
+
+
+def with_pandas_metadata(schema: pa.Schema, pandas_dtypes: Dict[str, str]) -> pa.Schema:
+    """
+    Attach pandas metadata to an Arrow schema, so pandas restores the given dtypes
+    (e.g. nullable Int32 instead of float64) when reading a file with this schema.
+    Args:
+        schema: Arrow schema.
+        pandas_dtypes: Pandas dtype per column of the schema.
+    Returns:
+        Arrow schema with pandas metadata.
+    """
+    empty_df = pd.DataFrame(
+        {name: pd.Series(dtype=pandas_dtypes[name]) for name in schema.names}
+    )
+    pandas_schema = pa.Schema.from_pandas(empty_df, preserve_index=False)
+    return schema.with_metadata(pandas_schema.metadata)
+
+
+# Schema of the transactions table as written at ingest.
+COMPACT_TRANSACTIONS_ARROW_SCHEMA = with_pandas_metadata(
+    pa.schema(
+        [
+            pa.field("InvoiceNo", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("StockCode", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("Description", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("Quantity", pa.int32()),
+            pa.field("InvoiceDate", pa.timestamp("us")),
+            pa.field("InvoiceDay", pa.timestamp("us")),
+            pa.field("UnitPrice", pa.float64()),
+            pa.field("CustomerID", pa.int32()),
+            pa.field("Country", pa.dictionary(pa.int32(), pa.string())),
+        ]
+    ),
+    COMPACT_TRANSACTIONS_PANDAS_DTYPES,
+)
+
+
+def select_schema_columns(
+    schema: pa.Schema, columns: Optional[List[str]] = None
+) -> pa.Schema:
+    """
+    Project a schema to a subset of its columns, keeping the schema's column order.
+    Pandas metadata, if any, is projected to the same columns.
+    Args:
+        schema: Full Arrow schema.
+        columns: Column names to keep. If None or empty, returns the full schema.
+    Returns:
+        Arrow schema with only the requested columns.
+    Raises:
+        ValueError: if a requested column is not in the schema, or a day column is
+            requested without the column it is derived from.
+    """
+    if not columns:
+        return schema
+    unknown_columns = set(columns) - set(schema.names)
+    if unknown_columns:
+        raise ValueError(
+            f"Columns {sorted(unknown_columns)} not found in schema. "
+            f"Available columns: {schema.names}"
+        )
+    for day_column, source_column in DAY_COLUMNS.items():
+        if day_column in columns and source_column not in columns:
+            raise ValueError(
+                f"Column '{day_column}' is derived from '{source_column}', "
+                f"which must also be selected"
+            )
+    projected = pa.schema([field for field in schema if field.name in columns])
+    if schema.pandas_metadata is not None:
+        pandas_metadata = dict(schema.pandas_metadata)
+        pandas_metadata["columns"] = [
+            column for column in pandas_metadata["columns"] if column["name"] in columns
+        ]
+        projected = projected.with_metadata(
+            {b"pandas": json.dumps(pandas_metadata).encode()}
+        )
+    return projected
+
+
+def parse_dates(dates: pd.Series, date_format: str = INVOICE_DATE_FORMAT) -> pd.Series:
+    """
+    Parse text dates with a known format. Each distinct string is parsed once and
+    the result is mapped back to the rows, so the cost grows with the number of
+    distinct dates rather than the number of rows. Datetime input is returned as is.
+    Args:
+        dates: Dates as text (object, string or categorical) or datetime.
+        date_format: strptime format of the text dates.
+    Returns:
+        Series of datetime64 values.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        codes = dates.cat.codes.to_numpy()
+        uniques = dates.cat.categories
+    else:
+        codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Index(uniques), format=date_format).to_numpy()
+    # missing values have code -1, which picks the appended NaT
+    parsed = np.append(parsed, np.datetime64("NaT"))
+    return pd.Series(parsed[codes], index=dates.index, name=dates.name)
+
+
+def log_memory_savings(df: pd.DataFrame, step: str) -> None:
+    """
+    Log the memory used by a DataFrame, and the memory it would use with object
+    strings and 64-bit numbers (the dtypes inferred without an explicit schema).
+    Args:
+        df: DataFrame to report on.
+        step: Name of the pipeline step, used in the log message.
+    """
+    compact_bytes = int(df.memory_usage(deep=True, index=False).sum())
+    wide_bytes = sum(_estimate_wide_nbytes(df[column]) for column in df.columns)
+    saved = 1 - compact_bytes / wide_bytes if wide_bytes else 0.0
+    logger.info(
+        f"[{step}] DataFrame memory: {compact_bytes / 1e6:,.1f} MB, vs. "
+        f"{wide_bytes / 1e6:,.1f} MB with object/64-bit dtypes ({saved:.0%} saved)"
+    )
+
+
+def _estimate_wide_nbytes(series: pd.Series) -> int:
+    """
+    Estimate the bytes a column would take as object strings (one pointer plus one
+    string object per row) or as a 64-bit numeric column.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        categories = series.cat.categories
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        sizes = np.fromiter(
+            (sys.getsizeof(str(value)) for value in categories),
+            dtype=np.int64,
+            count=len(categories),
+        )
+        return int(counts @ sizes) + 8 * len(series)
+    if pd.api.types.is_numeric_dtype(
+        series.dtype
+    ) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return 8 * len(series)
+    return int(series.memory_usage(deep=True, index=False))
@@ -0,0 +1,99 @@
+"""
+Shared SQLite connection factory for the project.
+
+All database access (pipeline reads in DataLoader, database initialization in
+setup_scripts) goes through get_connection, so connections are tuned the same way:
+- readers open the file in read-only URI mode, with query_only set, and read pages
+  through a memory map (mmap_size) instead of a read() syscall per page.
+- the writer switches the database to WAL journal mode, so readers in concurrent
+  pipeline runs are not blocked while it writes, and vice versa.
+- both get a larger page cache (cache_size) and a busy timeout instead of failing
+  immediately on a lock.
+
+Connections are reused within a process (and thread): repeated calls with the same
+database and mode return the same connection. Callers should therefore not close
+reused connections themselves. close_connections() closes them, and is registered
+with atexit, so the connections of a component are closed when it exits (also on
+sys.exit after an error).
+"""
+
+import os
+import atexit
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_CACHE_SIZE_KIB = 64 * 1024  # KiB
+DEFAULT_BUSY_TIMEOUT_MS = 30_000
+
+# Reused connections, keyed by (database path, read_only, process id, thread id).
+# The process id keeps forked worker processes from using their parent's connection.
+_CONNECTIONS: Dict[Tuple[str, bool, int, int], sqlite3.Connection] = {}
+
+
+def get_connection(
+    db_path: str,
+    read_only: bool = True,
+    mmap_size: int = DEFAULT_MMAP_SIZE,
+    cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+    reuse: bool = True,
+) -> sqlite3.Connection:
+    """
+    Get a tuned SQLite connection.
+    Args:
+        db_path: Path to the SQLite database file.
+        read_only: Open in read-only mode (pipeline reads). If False, opens a writer
+            connection and sets the database to WAL journal mode.
+        mmap_size: Max bytes of the database file to memory-map. 0 disables mmap.
+        cache_size_kib: Page cache size in KiB.
+        reuse: Return the existing connection for this database and mode in this
+            process/thread if there is one. If False, the caller owns (and closes)
+            the new connection.
+    Returns:
+        SQLite connection.
+    Raises:
+        FileNotFoundError: if read_only and the database file does not exist.
+    """
+    path = Path(db_path).resolve()
+    key = (str(path), read_only, os.getpid(), threading.get_ident())
+    if reuse and key in _CONNECTIONS:
+        return _CONNECTIONS[key]
+
+    if read_only:
+        if not path.exists():
+            raise FileNotFoundError(f"Database file not found: {path}")
+        conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {DEFAULT_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.execute(f"PRAGMA cache_size = {-int(cache_size_kib)}")
+    logger.debug(
+        f"Opened {'read-only' if read_only else 'writer'} connection to {path} "
+        f"(mmap_size={mmap_size}, cache_size={cache_size_kib} KiB)"
+    )
+
+    if reuse:
+        _CONNECTIONS[key] = conn
+    return conn
+
+
+def close_connections() -> None:
+    """Close all reused connections opened by this process."""
+    pid = os.getpid()
+    for key in [key for key in _CONNECTIONS if key[2] == pid]:
+        _CONNECTIONS.pop(key).close()
+        logger.debug(
+            f"Closed {'read-only' if key[1] else 'writer'} connection to {key[0]}"
+        )
+
+
+atexit.register(close_connections)
@@ -3,7 +3,7 @@ Utility functions for the UCI Online Retail project.
 """
 
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Optional, Union
 import yaml
 
 
@@ -27,3 +27,21 @@ def read_yaml(file_path: Union[str, Path]) -> Dict[str, Any]:
         config = yaml.safe_load(f)
 
     return config
+
+
+def split_comma_separated(values: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Split command line list values given as comma-separated strings.
+    Pipeline inputs have no list type, so list parameters are passed as one
+    comma-separated string; space-separated values are accepted as well.
+    Args:
+        values: Parsed argument values, e.g. ["InvoiceNo,StockCode", "Quantity"]
+    Returns:
+        List of the separate values (e.g. ["InvoiceNo", "StockCode", "Quantity"]),
+        or None if values is None.
+    """
+    if values is None:
+        return None
+    return [
+        value.strip() for item in values for value in item.split(",") if value.strip()
+    ]
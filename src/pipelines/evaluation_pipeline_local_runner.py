@@ -58,6 +58,7 @@ def run_evaluation_pipeline(config_path: str) -> None:
     ]
     TIME_COLUMN_NAME = config["inputs"]["evaluate_models__time_column_name"]["default"]
     SCORES_OUTPUT = config["inputs"]["evaluate_models__scores_output"]["default"]
+    FOLDS_PATH = config["inputs"]["evaluate_models__folds_path"]["default"]
 
     subprocess.run(
         [
@@ -90,7 +91,8 @@ def run_evaluation_pipeline(config_path: str) -> None:
             TIME_COLUMN_NAME,
             "--scores_output",
             SCORES_OUTPUT,
-        ],
+        ]
+        + (["--folds_path", FOLDS_PATH] if FOLDS_PATH else []),
         check=True,
     )
 
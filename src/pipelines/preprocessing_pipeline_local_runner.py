@@ -43,6 +43,19 @@ def run_preprocessing_pipeline(config_path: str) -> None:
     DB_PATH = config["inputs"]["ingest_data__db_path"]["default"]
     DB_INPUT_TABLE_NAME = config["inputs"]["ingest_data__table_name"]["default"]
     RAW_DATA_OUTPUT_PATH = config["inputs"]["ingest_data__output_data"]["default"]
+    INGEST_CHUNKSIZE = config["inputs"]["ingest_data__chunksize"]["default"]
+    INGEST_INCREMENTAL = config["inputs"]["ingest_data__incremental"]["default"]
+    INGEST_WATERMARK_COLUMN = config["inputs"]["ingest_data__watermark_column"][
+        "default"
+    ]
+    INGEST_COLUMNS = config["inputs"]["ingest_data__columns"]["default"]
+    INGEST_START_DATE = config["inputs"]["ingest_data__start_date"]["default"]
+    INGEST_END_DATE = config["inputs"]["ingest_data__end_date"]["default"]
+    INGEST_NUM_WORKERS = config["inputs"]["ingest_data__num_workers"]["default"]
+    INGEST_PARTITION_COLUMN = config["inputs"]["ingest_data__partition_column"][
+        "default"
+    ]
+    COUNTRIES = config["inputs"]["clean_data__countries"]["default"]
     subprocess.run(
         [
             sys.executable,
@@ -54,13 +67,44 @@ def run_preprocessing_pipeline(config_path: str) -> None:
             DB_INPUT_TABLE_NAME,
             "--output_data",
             RAW_DATA_OUTPUT_PATH,
-        ],
+            "--chunksize",
+            str(INGEST_CHUNKSIZE),
+            "--num_workers",
+            str(INGEST_NUM_WORKERS),
+            "--partition_column",
+            INGEST_PARTITION_COLUMN,
+            "--watermark_column",
+            INGEST_WATERMARK_COLUMN,
+            "--countries",
+            COUNTRIES,
+            "--columns",
+            INGEST_COLUMNS,
+        ]
+        + (["--start_date", str(INGEST_START_DATE)] if INGEST_START_DATE else [])
+        + (["--end_date", str(INGEST_END_DATE)] if INGEST_END_DATE else [])
+        + (["--incremental"] if INGEST_INCREMENTAL else []),
         check=True,
     )
 
     # Step 2: Clean data
-    COUNTRIES = config["inputs"]["clean_data__countries"]["default"]
     CLEANED_DATA_OUTPUT_PATH = config["inputs"]["clean_data__output_data"]["default"]
+    CANCELLATION_WINDOW_DAYS = config["inputs"]["clean_data__cancellation_window_days"][
+        "default"
+    ]
+    CLEAN_EXECUTION_MODE = config["inputs"]["clean_data__execution_mode"]["default"]
+    CLEAN_STREAMING = config["inputs"]["clean_data__streaming"]["default"]
+    CLEAN_BACKEND = config["inputs"]["clean_data__backend"]["default"]
+    CLEAN_VALIDATE_STATISTICS = config["inputs"]["clean_data__validate_statistics"][
+        "default"
+    ]
+    CLEAN_COLLECT_STATS = config["inputs"]["clean_data__collect_stats"]["default"]
+    CLEAN_VALIDATION_SAMPLE_SIZE = config["inputs"][
+        "clean_data__validation_sample_size"
+    ]["default"]
+    CLEAN_CACHE_DIR = config["inputs"]["clean_data__cache_dir"]["default"]
+    CLEAN_CACHE_MAX_SIZE_MB = config["inputs"]["clean_data__cache_max_size_mb"][
+        "default"
+    ]
     subprocess.run(
         [
             sys.executable,
@@ -72,7 +116,24 @@ def run_preprocessing_pipeline(config_path: str) -> None:
             COUNTRIES,
             "--output_data",
             CLEANED_DATA_OUTPUT_PATH,
-        ],
+            "--execution_mode",
+            CLEAN_EXECUTION_MODE,
+            "--backend",
+            CLEAN_BACKEND,
+            "--validation_sample_size",
+            str(CLEAN_VALIDATION_SAMPLE_SIZE),
+            "--cache_max_size_mb",
+            str(CLEAN_CACHE_MAX_SIZE_MB),
+        ]
+        + (
+            ["--cancellation_window_days", str(CANCELLATION_WINDOW_DAYS)]
+            if CANCELLATION_WINDOW_DAYS is not None
+            else []
+        )
+        + (["--streaming"] if CLEAN_STREAMING else [])
+        + (["--validate_statistics"] if CLEAN_VALIDATE_STATISTICS else [])
+        + (["--collect_stats"] if CLEAN_COLLECT_STATS else [])
+        + (["--cache_dir", CLEAN_CACHE_DIR] if CLEAN_CACHE_DIR is not None else []),
         check=True,
     )
 
@@ -80,6 +141,9 @@ def run_preprocessing_pipeline(config_path: str) -> None:
     TARGET_COLUMN = config["inputs"]["split_data__target_column"]["default"]
     DATE_COLUMN = config["inputs"]["split_data__date_column"]["default"]
     DAYS_IN_TEST_SPLIT = config["inputs"]["split_data__days_in_test_split"]["default"]
+    SPLIT_DAY_COLUMN = config["inputs"]["split_data__day_column"]["default"]
+    SPLIT_FEATURE_COLUMNS = config["inputs"]["split_data__feature_columns"]["default"]
+    SPLIT_ROW_GROUP_SIZE = config["inputs"]["split_data__row_group_size"]["default"]
     SPLIT_OUTPUT_TRAIN_TARGETS = config["inputs"]["split_data__output_train_targets"][
         "default"
     ]
@@ -89,6 +153,15 @@ def run_preprocessing_pipeline(config_path: str) -> None:
     SPLIT_OUTPUT_FEATURES_RAW = config["inputs"]["split_data__output_features"][
         "default"
     ]
+    SPLIT_OUTPUT_FOLDS = config["inputs"]["split_data__output_folds"]["default"]
+    SPLIT_NUM_FOLDS = config["inputs"]["split_data__num_folds"]["default"]
+    SPLIT_FOLD_VALIDATION_DAYS = config["inputs"]["split_data__fold_validation_days"][
+        "default"
+    ]
+    SPLIT_FOLD_TEST_DAYS = config["inputs"]["split_data__fold_test_days"]["default"]
+    SPLIT_FOLD_STEP_DAYS = config["inputs"]["split_data__fold_step_days"]["default"]
+    SPLIT_FOLD_WINDOW = config["inputs"]["split_data__fold_window"]["default"]
+    SPLIT_FOLD_TRAIN_DAYS = config["inputs"]["split_data__fold_train_days"]["default"]
     subprocess.run(
         [
             sys.executable,
@@ -108,7 +181,34 @@ def run_preprocessing_pipeline(config_path: str) -> None:
             SPLIT_OUTPUT_TEST_TARGETS,
             "--output_features",
             SPLIT_OUTPUT_FEATURES_RAW,
-        ],
+            "--num_folds",
+            str(SPLIT_NUM_FOLDS),
+            "--fold_validation_days",
+            str(SPLIT_FOLD_VALIDATION_DAYS),
+            "--fold_test_days",
+            str(SPLIT_FOLD_TEST_DAYS),
+            "--fold_window",
+            SPLIT_FOLD_WINDOW,
+            "--row_group_size",
+            str(SPLIT_ROW_GROUP_SIZE),
+        ]
+        + (["--day_column", SPLIT_DAY_COLUMN] if SPLIT_DAY_COLUMN else [])
+        + (
+            ["--feature_columns", SPLIT_FEATURE_COLUMNS]
+            if SPLIT_FEATURE_COLUMNS
+            else []
+        )
+        + (["--output_folds", SPLIT_OUTPUT_FOLDS] if SPLIT_OUTPUT_FOLDS else [])
+        + (
+            ["--fold_step_days", str(SPLIT_FOLD_STEP_DAYS)]
+            if SPLIT_FOLD_STEP_DAYS is not None
+            else []
+        )
+        + (
+            ["--fold_train_days", str(SPLIT_FOLD_TRAIN_DAYS)]
+            if SPLIT_FOLD_TRAIN_DAYS is not None
+            else []
+        ),
         check=True,
     )
 
@@ -135,6 +235,33 @@ def run_preprocessing_pipeline(config_path: str) -> None:
     FEATURE_ENGINEERING_OUTPUT_FUTURE_COVARIATES = config["inputs"][
         "feature_engineering__output_future_covariates"
     ]["default"]
+    FEATURE_ENGINEERING_BACKEND = config["inputs"]["feature_engineering__backend"][
+        "default"
+    ]
+    FEATURE_ENGINEERING_COUNT_DISTINCT = config["inputs"][
+        "feature_engineering__count_distinct"
+    ]["default"]
+    FEATURE_ENGINEERING_HLL_PRECISION = config["inputs"][
+        "feature_engineering__hll_precision"
+    ]["default"]
+    FEATURE_ENGINEERING_OUTPUT_SKETCHES = config["inputs"][
+        "feature_engineering__output_sketches"
+    ]["default"]
+    FEATURE_ENGINEERING_HOLIDAY_COUNTRIES = config["inputs"][
+        "feature_engineering__holiday_countries"
+    ]["default"]
+    FEATURE_ENGINEERING_CALENDAR_FLAGS = config["inputs"][
+        "feature_engineering__calendar_flags"
+    ]["default"]
+    FEATURE_ENGINEERING_CALENDAR_CACHE_DIR = config["inputs"][
+        "feature_engineering__calendar_cache_dir"
+    ]["default"]
+    FEATURE_ENGINEERING_STATE_DIR = config["inputs"]["feature_engineering__state_dir"][
+        "default"
+    ]
+    FEATURE_ENGINEERING_REFRESH_DAYS = config["inputs"][
+        "feature_engineering__refresh_days"
+    ]["default"]
     subprocess.run(
         [
             sys.executable,
@@ -158,6 +285,14 @@ def run_preprocessing_pipeline(config_path: str) -> None:
             ARTICLE_ID_COLUMN,
             "--revenue_column",
             REVENUE_COLUMN,
+            "--backend",
+            FEATURE_ENGINEERING_BACKEND,
+            "--count_distinct",
+            FEATURE_ENGINEERING_COUNT_DISTINCT,
+            "--hll_precision",
+            str(FEATURE_ENGINEERING_HLL_PRECISION),
+            "--refresh_days",
+            str(FEATURE_ENGINEERING_REFRESH_DAYS),
             "--output_train_targets",
             FEATURE_ENGINEERING_OUTPUT_TRAIN_TARGETS,
             "--output_test_targets",
@@ -166,7 +301,28 @@ def run_preprocessing_pipeline(config_path: str) -> None:
             FEATURE_ENGINEERING_OUTPUT_PAST_COVARIATES,
             "--output_future_covariates",
             FEATURE_ENGINEERING_OUTPUT_FUTURE_COVARIATES,
-        ],
+        ]
+        + (
+            ["--output_sketches", FEATURE_ENGINEERING_OUTPUT_SKETCHES]
+            if FEATURE_ENGINEERING_OUTPUT_SKETCHES
+            else []
+        )
+        + ["--holiday_countries", FEATURE_ENGINEERING_HOLIDAY_COUNTRIES]
+        + (
+            ["--calendar_flags", FEATURE_ENGINEERING_CALENDAR_FLAGS]
+            if FEATURE_ENGINEERING_CALENDAR_FLAGS
+            else []
+        )
+        + (
+            ["--calendar_cache_dir", FEATURE_ENGINEERING_CALENDAR_CACHE_DIR]
+            if FEATURE_ENGINEERING_CALENDAR_CACHE_DIR
+            else []
+        )
+        + (
+            ["--state_dir", FEATURE_ENGINEERING_STATE_DIR]
+            if FEATURE_ENGINEERING_STATE_DIR
+            else []
+        ),
         check=True,
     )
 
@@ -86,6 +86,7 @@ def run_training_pipeline(config_path: str) -> None:
     )
 
     # Step 2: Backtest model
+    FOLDS_PATH = config["inputs"]["backtest_model__folds_path"]["default"]
 
     subprocess.run(
         [
@@ -116,7 +117,8 @@ def run_training_pipeline(config_path: str) -> None:
             str(config["inputs"]["backtest_model__backtest_start"]["default"]),
             "--scores_output_path",
             config["inputs"]["backtest_model__scores_output_path"]["default"],
-        ],
+        ]
+        + (["--folds_path", FOLDS_PATH] if FOLDS_PATH else []),
         check=True,
     )
 
@@ -13,25 +13,98 @@ Such cleaning should not be part of an ML pipeline.
 Final database will have 3 tables:
 - raw transactions table: all data as-is from the Excel file
 - cancelled transactions table: only transactions that were later cancelled
+    (with typed match-key columns and a composite index for the cancellation match)
 - processed transactions table: all transactions except those cancelled
     (original debited transaction + later credited transaction)
+
+Bulk-load mode (--bulk_load) is for rebuilding the database quickly:
+- the Excel file is cached as parquet, keyed by a hash of the Excel file
+- tables are created with explicit column types up front
+- rows are inserted with large executemany batches inside one transaction,
+    with pragmas tuned for a one-off load (no rollback journal, no fsync)
+- indexes are built after the data is loaded
+
+Usage:
+    python -m src.setup_scripts.initialize_sqlite_database [--bulk_load] [--explain_queries]
 """
 
 import os
+import time
+import hashlib
 import sqlite3
 import logging
+import argparse
+from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 from dotenv import load_dotenv
 
 from src.modules.log_config import setup_logging
+from src.modules.sqlite_connection import get_connection
 
 logger = logging.getLogger(__name__)
 
+BULK_INSERT_BATCH_SIZE = 100_000
+
+# Column types of the transactions tables, as created by pandas.to_sql from the Excel file
+TRANSACTIONS_TABLE_COLUMNS = {
+    "InvoiceNo": "TEXT",
+    "StockCode": "TEXT",
+    "Description": "TEXT",
+    "Quantity": "INTEGER",
+    "InvoiceDate": "TIMESTAMP",
+    "UnitPrice": "REAL",
+    "CustomerID": "REAL",
+    "Country": "TEXT",
+}
+
+# Pragmas for a one-off bulk load. The load writes a temporary database file that
+# only replaces the database on success (deleted on failure), so durability during
+# the load is not needed.
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -512_000,  # negative = KiB, i.e. ~500 MB page cache
+    "locking_mode": "EXCLUSIVE",
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Initialize mock SQLite database")
+    parser.add_argument(
+        "--cancellation_window_days",
+        type=int,
+        default=50,
+        help="Max days between an original transaction and its cancellation",
+    )
+    parser.add_argument(
+        "--explain_queries",
+        action="store_true",
+        help="Log the query plan and elapsed time of the cancellation matching query",
+    )
+    parser.add_argument(
+        "--bulk_load",
+        action="store_true",
+        help="Fast rebuild: parquet cache of the Excel file, typed tables, batched "
+        "inserts in one transaction with tuned pragmas, indexes built after loading",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory for the parquet cache of the Excel file in bulk-load mode. "
+        "Defaults to '.cache' next to the Excel file",
+    )
+    return parser.parse_args()
+
 
 def main():
     setup_logging()
     load_dotenv()
+    args = parse_args()
     logger.info("Starting SQLite database initialization...")
 
     excel_path = os.getenv("INPUT_DATA_FILE")
@@ -39,6 +112,20 @@ def main():
     table_name_raw = os.getenv("DB_TABLE_NAME_RAW")
     table_name_processed = os.getenv("DB_TABLE_NAME_PROCESSED")
     cancelled_table_name = "cancelled_transactions"  # TODO: don't hardcode name
+    if args.bulk_load:
+        bulk_load_database(
+            excel_path=excel_path,
+            db_path=db_path,
+            table_name_raw=table_name_raw,
+            table_name_processed=table_name_processed,
+            cancelled_table_name=cancelled_table_name,
+            cache_dir=args.cache_dir,
+            window_days=args.cancellation_window_days,
+            explain=args.explain_queries,
+        )
+        logger.info("Done!")
+        return
+
     logger.info(f"Reading {excel_path}...")
     df = pd.read_excel(excel_path)
     logger.info(f"Loaded {len(df):,} rows, {len(df.columns)} columns")
@@ -46,7 +133,8 @@ def main():
     logger.info(f"Creating database at {db_path}...")
 
     # Context manager to commit to DB only on successful completion.
-    with sqlite3.connect(database=db_path) as conn:
+    conn = get_connection(db_path, read_only=False, reuse=False)
+    with conn:
         try:
             # Write raw table
             logger.info(f"Creating raw transactions table: '{table_name_raw}'...")
@@ -62,15 +150,188 @@ def main():
                 processed_table_name=table_name_processed,
                 cancelled_table_name=cancelled_table_name,
                 conn=conn,
+                window_days=args.cancellation_window_days,
+                explain=args.explain_queries,
             )
         except Exception as e:
             logger.error(f"Error during database initialization: {e}")
             raise
         conn.commit()
+    conn.close()
 
     logger.info("Done!")
 
 
+def bulk_load_database(
+    excel_path: str,
+    db_path: str,
+    table_name_raw: str,
+    table_name_processed: str,
+    cancelled_table_name: str,
+    cache_dir: Optional[str] = None,
+    window_days: int = 50,
+    explain: bool = False,
+) -> None:
+    """Build the database with the bulk-load path.
+    Same tables as the default path, but the raw and cancelled tables are loaded with
+    batched inserts in a single transaction, and indexes are built afterwards.
+    The database is built in a temporary file next to db_path, which replaces db_path
+    only when the load succeeds. With journaling off a failed load cannot be rolled
+    back, so the temporary file is deleted instead and db_path is left untouched.
+    Args:
+        excel_path: Path to the UCI online retail Excel file.
+        db_path: Path to the SQLite database file.
+        table_name_raw: Name of the SQLite table with raw transactions.
+        table_name_processed: Name of the SQLite table to store processed transactions.
+        cancelled_table_name: Name of the SQLite table with cancelled transactions.
+        cache_dir: Directory of the parquet cache. Defaults to '.cache' next to the Excel file.
+        window_days: Max days between original transaction and its cancellation.
+        explain: If True, log the query plan and elapsed time of the cancellation match.
+    """
+    start_time = time.perf_counter()
+    cache_dir = Path(cache_dir) if cache_dir else Path(excel_path).parent / ".cache"
+    df = read_excel_with_parquet_cache(excel_path=excel_path, cache_dir=cache_dir)
+
+    tmp_db_path = f"{db_path}.tmp"
+    _remove_database_files(tmp_db_path)
+    logger.info(f"Bulk loading database at {tmp_db_path}...")
+    conn = get_connection(tmp_db_path, read_only=False, reuse=False)
+    try:
+        for pragma, value in BULK_LOAD_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+        conn.execute("BEGIN")
+        create_typed_table(table_name=table_name_raw, conn=conn)
+        bulk_insert_dataframe(df=df, table_name=table_name_raw, conn=conn)
+        logger.info(f"Table '{table_name_raw}' created with {len(df):,} rows.")
+        create_typed_table(table_name=cancelled_table_name, conn=conn)
+        conn.execute(
+            f"""
+            INSERT INTO {cancelled_table_name}
+            SELECT * FROM {table_name_raw} WHERE InvoiceNo LIKE 'C%'
+            """
+        )
+        conn.commit()
+        logger.info("Loaded raw and cancelled tables in one transaction.")
+
+        # Indexes after loading: one sorted build instead of per-row index updates
+        index_cancellation_match_keys(
+            cancelled_table_name=cancelled_table_name, conn=conn
+        )
+        remove_original_transactions_cancelled_later(
+            raw_table_name=table_name_raw,
+            processed_table_name=table_name_processed,
+            cancelled_table_name=cancelled_table_name,
+            conn=conn,
+            window_days=window_days,
+            explain=explain,
+        )
+        conn.executescript(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table_name_processed}_country_date
+            ON {table_name_processed} (Country, InvoiceDate);
+            ANALYZE {table_name_processed};
+            """
+        )
+        conn.commit()
+        # Leave the database in WAL mode, like the default path
+        conn.execute("PRAGMA locking_mode = NORMAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+    except Exception as e:
+        conn.close()
+        _remove_database_files(tmp_db_path)
+        logger.error(f"Error during database bulk load, {db_path} left unchanged: {e}")
+        raise
+    conn.close()
+    # The WAL/shared-memory files of the old database must not be applied to the new one
+    for suffix in ("-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    os.replace(tmp_db_path, db_path)
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"Bulk load completed in {elapsed:.1f} s")
+
+
+def _remove_database_files(db_path: str) -> None:
+    """Delete a SQLite database file and its WAL and shared-memory files, if present."""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+
+def read_excel_with_parquet_cache(excel_path: str, cache_dir: Path) -> pd.DataFrame:
+    """Read the Excel file, through a parquet cache keyed by the file's content hash.
+    Parsing the Excel file dominates the rebuild time, and the file rarely changes.
+    Mixed-type identifier columns are stored as strings, which is also what the
+    TEXT columns of the database hold.
+    Args:
+        excel_path: Path to the Excel file.
+        cache_dir: Directory of the parquet cache.
+    Returns:
+        DataFrame with the Excel file's contents.
+    """
+    file_hash = hashlib.sha256()
+    with open(excel_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(block)
+    cache_path = (
+        cache_dir / f"{Path(excel_path).stem}-{file_hash.hexdigest()[:16]}.parquet"
+    )
+
+    if cache_path.exists():
+        logger.info(f"Reading cached {cache_path}...")
+        df = pd.read_parquet(cache_path)
+    else:
+        logger.info(f"Reading {excel_path} (no cache at {cache_path})...")
+        df = pd.read_excel(excel_path)
+        for column in ["InvoiceNo", "StockCode", "Description", "Country"]:
+            df[column] = df[column].astype("string")
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cache_path, index=False)
+    logger.info(f"Loaded {len(df):,} rows, {len(df.columns)} columns")
+    return df
+
+
+def create_typed_table(table_name: str, conn: sqlite3.Connection) -> None:
+    """Create (or replace) an empty transactions table with explicit column types.
+    Args:
+        table_name: Name of the SQLite table.
+        conn: SQLite connection object.
+    """
+    columns = ", ".join(
+        f'"{name}" {sql_type}' for name, sql_type in TRANSACTIONS_TABLE_COLUMNS.items()
+    )
+    conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+    conn.execute(f"CREATE TABLE {table_name} ({columns})")
+    return
+
+
+def bulk_insert_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    conn: sqlite3.Connection,
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+) -> None:
+    """Insert a DataFrame into an existing table with large executemany batches.
+    The caller owns the transaction, so all batches are committed together.
+    Dates are written as ISO-8601 text, and missing values as NULL.
+    Args:
+        df: DataFrame with the table's columns.
+        table_name: Name of the SQLite table.
+        conn: SQLite connection object.
+        batch_size: Number of rows per executemany call.
+    """
+    columns = list(TRANSACTIONS_TABLE_COLUMNS)
+    placeholders = ", ".join("?" for _ in columns)
+    query = f"INSERT INTO {table_name} VALUES ({placeholders})"
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start : start + batch_size][columns]
+        batch = batch.assign(
+            InvoiceDate=batch["InvoiceDate"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        )
+        batch = batch.astype(object).where(batch.notna(), None)
+        conn.executemany(query, batch.itertuples(index=False, name=None))
+    return
+
+
 def create_cancelled_transactions(
     df: pd.DataFrame, cancelled_table_name: str, conn: sqlite3.Connection
 ) -> None:
@@ -96,6 +357,45 @@ def create_cancelled_transactions(
     logger.info(
         f"Table '{cancelled_table_name}' created with {len(cancelled_df):,} rows."
     )
+    index_cancellation_match_keys(cancelled_table_name=cancelled_table_name, conn=conn)
+    return
+
+
+def index_cancellation_match_keys(
+    cancelled_table_name: str, conn: sqlite3.Connection
+) -> None:
+    """Add typed match-key columns and a composite index to the cancelled table.
+
+    The cancellation match compares ABS(Quantity), ABS(UnitPrice) and a date window.
+    Storing these once as typed columns (InvoiceDate as a sortable julian day number)
+    lets the match probe one composite index range per original transaction, instead
+    of evaluating the expressions against every cancelled row.
+
+    Index column order: equality keys first, the range key (InvoiceJulianDay) last.
+    Args:
+        cancelled_table_name: Name of the SQLite table with cancelled transactions.
+        conn: SQLite connection object.
+    """
+    logger.info(f"Indexing match keys of table '{cancelled_table_name}'...")
+    conn.executescript(
+        f"""
+        ALTER TABLE {cancelled_table_name} ADD COLUMN AbsQuantity INTEGER;
+        ALTER TABLE {cancelled_table_name} ADD COLUMN AbsUnitPrice REAL;
+        ALTER TABLE {cancelled_table_name} ADD COLUMN InvoiceJulianDay REAL;
+
+        UPDATE {cancelled_table_name}
+        SET AbsQuantity = ABS(Quantity),
+            AbsUnitPrice = ABS(UnitPrice),
+            InvoiceJulianDay = julianday(InvoiceDate);
+
+        CREATE INDEX IF NOT EXISTS idx_{cancelled_table_name}_match_keys
+        ON {cancelled_table_name} (
+            StockCode, CustomerID, AbsQuantity, AbsUnitPrice, InvoiceJulianDay
+        );
+
+        ANALYZE {cancelled_table_name};
+        """
+    )
     return
 
 
@@ -104,6 +404,8 @@ def remove_original_transactions_cancelled_later(
     processed_table_name: str,
     cancelled_table_name: str,
     conn: sqlite3.Connection,
+    window_days: int = 50,
+    explain: bool = False,
 ) -> None:
     """Create SQLite table where cancelled transactions are filtered out.
 
@@ -113,37 +415,54 @@ def remove_original_transactions_cancelled_later(
         Original transactions are identified by matching StockCode, CustomerID, ABS(Quantity),
         Description, Country, and ABS(UnitPrice) with cancelled_transactions table.
         Original transaction's InvoiceDate must be before cancelled transaction's InvoiceDate,
-        and within 50 days. (since we cannot match on transaction IDs)
+        and within window_days days. (since we cannot match on transaction IDs)
+
+    The match probes the composite index built by index_cancellation_match_keys:
+    equality on the match keys, then a range on InvoiceJulianDay. Each original
+    transaction costs one index seek, so the query scales near-linearly.
     Args:
         raw_table_name: Name of the SQLite table with raw transactions.
         processed_table_name: Name of the SQLite table to store processed transactions.
         cancelled_table_name: Name of the SQLite table with cancelled transactions.
         conn: SQLite connection object.
+        window_days: Max days between original transaction and its cancellation.
+        explain: If True, log the query plan and elapsed time of the query.
     """
     logger.info(
         f"Creating table '{processed_table_name}' without transactions that were later cancelled..."
     )
-    query = f"""
-    DROP TABLE IF EXISTS {processed_table_name};
-
-    CREATE TABLE {processed_table_name} AS
-    SELECT *
+    select_query = f"""
+    SELECT o.*
     FROM {raw_table_name} o
     WHERE (o.InvoiceNo NOT LIKE 'C%' AND o.InvoiceNo NOT LIKE 'c%')
         AND NOT EXISTS (
             SELECT 1
             FROM {cancelled_table_name} c
-            WHERE o.StockCode = c.StockCode
-                AND o.CustomerID = c.CustomerID
-                AND ABS(o.Quantity) = ABS(c.Quantity)
-                AND o.Description = c.Description
-                AND o.Country = c.Country
-                AND ABS(o.UnitPrice) = ABS(c.UnitPrice)
-                AND o.InvoiceDate <= c.InvoiceDate
-                AND (julianday(c.InvoiceDate) - julianday(o.InvoiceDate)) < 50 -- TODO: parameterize this threshold
-        );
+            WHERE c.StockCode = o.StockCode
+                AND c.CustomerID = o.CustomerID
+                AND c.AbsQuantity = ABS(o.Quantity)
+                AND c.AbsUnitPrice = ABS(o.UnitPrice)
+                AND c.InvoiceJulianDay >= julianday(o.InvoiceDate)
+                AND c.InvoiceJulianDay < julianday(o.InvoiceDate) + {int(window_days)}
+                AND c.Description = o.Description
+                AND c.Country = o.Country
+        )
     """
-    conn.executescript(query)
+    if explain:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {select_query}").fetchall()
+        plan_lines = "\n".join(f"    {row[-1]}" for row in plan)
+        logger.info(f"Query plan for '{processed_table_name}':\n{plan_lines}")
+
+    start_time = time.perf_counter()
+    conn.executescript(
+        f"""
+        DROP TABLE IF EXISTS {processed_table_name};
+        CREATE TABLE {processed_table_name} AS {select_query};
+        """
+    )
+    if explain:
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Created '{processed_table_name}' in {elapsed:.2f} s")
     cursor = conn.cursor()
     cursor.execute(f"SELECT COUNT(*) FROM {processed_table_name}")
     count = cursor.fetchone()[0]